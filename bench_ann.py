@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+ANN索引基准脚本
+对比IVF-Flat、IVF-PQ、HNSW相对扁平索引（精确检索）的召回率和单次查询延迟，
+以及fp16/int8/PQ向量编码相对float32节省的内存和损失的召回率
+
+用法:
+    python bench_ann.py                       # 使用 lib/faiss_index 中的真实向量
+    python bench_ann.py --synthetic 1000000   # 使用随机向量模拟大语料
+"""
+
+import sys
+import os
+import time
+import argparse
+
+import faiss
+import numpy as np
+
+# 添加项目路径
+sys.path.append(os.path.dirname(__file__))
+
+from lib.modules.config import CONFIG
+from lib.modules.ann_index import create_index, apply_search_params, index_memory_bytes, VECTOR_CODECS
+
+# 每种索引类型扫描的查询参数
+SWEEPS = {
+    "ivf_flat": ("FAISS_NPROBE", [1, 4, 16, 64]),
+    "ivf_pq": ("FAISS_NPROBE", [1, 4, 16, 64]),
+    "hnsw": ("FAISS_EF_SEARCH", [16, 32, 64, 128]),
+}
+
+
+def load_vectors(synthetic: int, dimension: int) -> np.ndarray:
+    """读取现有索引中的向量，或生成归一化的随机向量"""
+    if synthetic:
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((synthetic, dimension), dtype=np.float32)
+    else:
+        from lib.modules.vectorstore_manager import current_index_dir
+        directory = current_index_dir() or CONFIG["VECTORSTORE_PATH"]
+        index = faiss.read_index(os.path.join(directory, "index.faiss"))
+        vectors = index.reconstruct_n(0, index.ntotal)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def make_queries(vectors: np.ndarray, count: int) -> np.ndarray:
+    """从库中抽样并加噪声，模拟与文档相近但不完全相同的问题"""
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), size=count, replace=False)].copy()
+    queries += rng.normal(scale=0.05, size=queries.shape).astype(np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def measure(index, queries: np.ndarray, k: int):
+    """逐条查询，返回 (结果id矩阵, 平均延迟毫秒)"""
+    results = np.empty((len(queries), k), dtype=np.int64)
+    start = time.perf_counter()
+    for i in range(len(queries)):
+        _, ids = index.search(queries[i:i + 1], k)
+        results[i] = ids[0]
+    elapsed = time.perf_counter() - start
+    return results, elapsed / len(queries) * 1000
+
+
+def recall_at_k(results: np.ndarray, truth: np.ndarray) -> float:
+    """召回率@k：近似结果中命中精确top-k的比例"""
+    hits = sum(len(set(row) & set(expected)) for row, expected in zip(results, truth))
+    return hits / truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ANN索引召回率/延迟基准")
+    parser.add_argument("--synthetic", type=int, default=0, help="使用N条随机向量代替现有索引")
+    parser.add_argument("--dim", type=int, default=768, help="随机向量维度")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    # 测单次查询延迟，固定单线程
+    faiss.omp_set_num_threads(1)
+
+    vectors = load_vectors(args.synthetic, args.dim)
+    queries = make_queries(vectors, min(args.queries, len(vectors)))
+    print(f"向量数: {len(vectors)}, 维度: {vectors.shape[1]}, 查询数: {len(queries)}, k={args.k}")
+    print("=" * 70)
+
+    flat = create_index(vectors.shape[1], index_type="flat")
+    flat.add(vectors)
+    truth, flat_latency = measure(flat, queries, args.k)
+    print(f"{'flat':<10} {'-':>14} | recall@{args.k} 1.000 | {flat_latency:.3f} ms/query")
+
+    rng = np.random.default_rng(2)
+    sample_size = min(CONFIG["FAISS_TRAIN_SAMPLE"], len(vectors))
+    training = vectors[rng.choice(len(vectors), size=sample_size, replace=False)]
+
+    for index_type, (param, values) in SWEEPS.items():
+        start = time.perf_counter()
+        index = create_index(vectors.shape[1], training, index_type=index_type)
+        index.add(vectors)
+        build_time = time.perf_counter() - start
+        print("-" * 70)
+        print(f"{index_type}: 构建 {build_time:.1f}s")
+
+        original = CONFIG[param]
+        for value in values:
+            CONFIG[param] = value
+            apply_search_params(index)
+            results, latency = measure(index, queries, args.k)
+            setting = f"{param[6:].lower()}={value}"
+            print(f"{index_type:<10} {setting:>14} | recall@{args.k} "
+                  f"{recall_at_k(results, truth):.3f} | {latency:.3f} ms/query "
+                  f"(x{flat_latency / latency:.1f})")
+        CONFIG[param] = original
+
+    print("=" * 70)
+    print("向量编码对比（扁平索引）")
+    print("-" * 70)
+    flat_bytes = index_memory_bytes(flat)
+    for codec in VECTOR_CODECS:
+        index = create_index(vectors.shape[1], training, index_type="flat", codec=codec)
+        index.add(vectors)
+        results, latency = measure(index, queries, args.k)
+        size = index_memory_bytes(index)
+        print(f"{codec:<10} | {size / 1024 / 1024:8.2f} MB (节省 {1 - size / flat_bytes:6.1%}) | "
+              f"recall@{args.k} {recall_at_k(results, truth):.3f} | {latency:.3f} ms/query")
+
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
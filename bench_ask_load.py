@@ -0,0 +1,93 @@
+"""并发压测脚本 - 验证/ask接口的吞吐量（LLM调用）随并发数增长
+
+每个请求的问题都不相同（带本次运行的编号和请求序号），精确答案缓存不会命中；
+语义缓存仍可能把同一模板的问题判为相似，压测时在服务端关闭两级答案缓存:
+
+    ANSWER_CACHE_ENABLED=false SEMANTIC_CACHE_ENABLED=false python api/ask.py
+    python bench_ask_load.py 1 4 16 32
+"""
+
+import sys
+import time
+import uuid
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+URL = "http://127.0.0.1:8000/ask"
+QUESTIONS = [
+    "什么是xv6",
+    "OpenHarmony烧录失败怎么办",
+    "博客里有没有MIT 6.S081的笔记",
+    "怎么使用git",
+]
+
+
+RUN_ID = uuid.uuid4().hex[:6]
+
+
+def send_question(question):
+    """发送一次请求，返回(耗时秒数, 是否成功, 是否命中答案缓存)"""
+    start = time.perf_counter()
+    cached = False
+    try:
+        response = requests.post(URL, json={"question": question}, timeout=120)
+        ok = response.status_code == 200
+        if ok:
+            cached = bool(response.json().get("metadata", {}).get("cache"))
+    except (requests.exceptions.RequestException, ValueError):
+        ok = False
+    return time.perf_counter() - start, ok, cached
+
+
+def run_level(concurrency, requests_per_worker):
+    """以指定并发数发起请求，返回统计结果"""
+    total = concurrency * requests_per_worker
+    # 问题各不相同，每个请求都要走完检索和LLM调用
+    questions = [f"{QUESTIONS[i % len(QUESTIONS)]}（{RUN_ID}-{concurrency}-{i}）" for i in range(total)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send_question, questions))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _, _ in results)
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": sum(1 for _, ok, _ in results if not ok),
+        "cache_hits": sum(1 for _, _, cached in results if cached),
+        "throughput": total / elapsed if elapsed > 0 else 0.0,
+        "p50": statistics.median(latencies),
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+if __name__ == "__main__":
+    levels = [int(arg) for arg in sys.argv[1:]] or [1, 4, 16, 32]
+    requests_per_worker = 4
+
+    print("并发压测 /ask")
+    print("=" * 60)
+
+    baseline = None
+    cache_hits = 0
+    for level in levels:
+        stats = run_level(level, requests_per_worker)
+        cache_hits += stats["cache_hits"]
+        if baseline is None:
+            baseline = stats["throughput"] or 1.0
+        stats["speedup"] = stats["throughput"] / baseline
+        print(
+            f"并发 {stats['concurrency']:>3} | 请求 {stats['requests']:>4} | 错误 {stats['errors']:>3} | "
+            f"缓存命中 {stats['cache_hits']:>3} | "
+            f"吞吐 {stats['throughput']:.2f} req/s (x{stats['speedup']:.1f}) | "
+            f"p50 {stats['p50']:.2f}s | p99 {stats['p99']:.2f}s"
+        )
+
+    print("=" * 60)
+    print("吞吐量应随并发数近似线性增长，直到达到 ASK_MAX_CONCURRENCY 或上游限流")
+    if cache_hits:
+        print(f"⚠️ 有 {cache_hits} 个请求命中了答案缓存，结果不反映LLM调用的扩展性，"
+              f"请以 ANSWER_CACHE_ENABLED=false SEMANTIC_CACHE_ENABLED=false 启动服务后重测")
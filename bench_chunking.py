@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+分块效果对比脚本
+对比逐元素片段（UnstructuredMarkdownLoader elements模式）与合并后片段的
+向量数量、片段长度，以及检索命中率、MRR和top-k上下文长度
+
+用法:
+    python bench_chunking.py                          # 从博客目录加载
+    python bench_chunking.py --from-index lib/faiss_index   # 使用现有逐元素索引中的片段
+    python bench_chunking.py --queries eval.json      # 使用标注的问题 [{"question": ..., "source": ...}]
+
+未提供问题集时，用每篇文章的标题和小节标题作为问题、所在文件作为正确答案。
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import argparse
+from collections import OrderedDict
+
+import faiss
+import numpy as np
+
+# 添加项目路径
+sys.path.append(os.path.dirname(__file__))
+
+from lib.modules.config import CONFIG
+from lib.modules.chunker import chunk_documents, count_tokens
+from lib.modules.embeddings import create_embeddings
+
+_TITLE = re.compile(r"title:\s*(.+?)\s+(?:date|tags|categories):")
+
+
+def load_elements(from_index: str):
+    """加载逐元素片段"""
+    if from_index:
+        from lib.modules.disk_docstore import SqliteDocstore, SqliteIdMap
+        from lib.modules.vectorstore_manager import current_index_dir
+        # 向量库根目录时读取当前版本目录
+        CONFIG["VECTORSTORE_PATH"] = from_index
+        directory = current_index_dir() or from_index
+        docstore = SqliteDocstore(directory)
+        return [docstore.search(doc_id) for doc_id in SqliteIdMap(directory).values()]
+
+    from lib.modules.document_loader import load_documents
+    CONFIG["CHUNK_MAX_TOKENS"] = 0
+    return load_documents()
+
+
+def make_queries(elements, path: str):
+    """读取标注问题，或用文章标题和小节标题生成问题"""
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            return [(item["question"], item["source"]) for item in json.load(f)]
+
+    queries = OrderedDict()
+    seen_sources = set()
+    for doc in elements:
+        source = doc.metadata["source"]
+        if source not in seen_sources:
+            seen_sources.add(source)
+            match = _TITLE.search(doc.page_content)
+            title = match.group(1) if match else os.path.splitext(os.path.basename(source))[0]
+            queries.setdefault(title, source)
+        if doc.metadata.get("category") == "Title":
+            queries.setdefault(doc.page_content.strip(), source)
+    return list(queries.items())
+
+
+def build_index(documents, embeddings, batch_size: int):
+    """计算嵌入并建立内积扁平索引，返回 (索引, 耗时秒)"""
+    start = time.perf_counter()
+    index = None
+    for i in range(0, len(documents), batch_size):
+        batch = [doc.page_content for doc in documents[i:i + batch_size]]
+        vectors = np.asarray(embeddings.embed_documents(batch), dtype=np.float32)
+        if index is None:
+            index = faiss.IndexFlatIP(vectors.shape[1])
+        index.add(vectors)
+    return index, time.perf_counter() - start
+
+
+def evaluate(name, documents, query_vectors, queries, embeddings, k: int, batch_size: int):
+    index, build_time = build_index(documents, embeddings, batch_size)
+    start = time.perf_counter()
+    _, positions = index.search(query_vectors, k)
+    latency = (time.perf_counter() - start) / len(queries) * 1000
+
+    hits, reciprocal_ranks, context_tokens = 0, 0.0, 0
+    for (_, source), row in zip(queries, positions):
+        retrieved = [documents[i] for i in row if i >= 0]
+        context_tokens += sum(count_tokens(doc.page_content) for doc in retrieved)
+        for rank, doc in enumerate(retrieved, start=1):
+            if doc.metadata["source"] == source:
+                hits += 1
+                reciprocal_ranks += 1 / rank
+                break
+
+    tokens = [count_tokens(doc.page_content) for doc in documents]
+    print(f"{name:<8} | 向量数 {len(documents):6d} | 片段tokens 平均 {np.mean(tokens):6.1f} 最大 {max(tokens):5d} | "
+          f"hit@{k} {hits / len(queries):.3f} | MRR {reciprocal_ranks / len(queries):.3f} | "
+          f"top-{k}上下文 {context_tokens / len(queries):6.1f} tokens | "
+          f"嵌入 {build_time:.1f}s | 检索 {latency:.3f} ms/query")
+    return len(documents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分块前后检索效果对比")
+    parser.add_argument("--from-index", default="", help="从现有逐元素向量库目录读取片段")
+    parser.add_argument("--queries", default="", help="标注问题集JSON")
+    parser.add_argument("--k", type=int, default=CONFIG["RETRIEVAL_K"])
+    parser.add_argument("--max-tokens", type=int, default=CONFIG["CHUNK_MAX_TOKENS"] or 384)
+    parser.add_argument("--overlap", type=int, default=CONFIG["CHUNK_OVERLAP_TOKENS"])
+    args = parser.parse_args()
+
+    elements = load_elements(args.from_index)
+    chunks = chunk_documents(elements, args.max_tokens, args.overlap)
+    queries = make_queries(elements, args.queries)
+
+    embeddings = create_embeddings()
+    query_vectors = np.asarray(embeddings.embed_documents([question for question, _ in queries]),
+                               dtype=np.float32)
+    print(f"文件数: {len({doc.metadata['source'] for doc in elements})}, 问题数: {len(queries)}, "
+          f"片段上限 {args.max_tokens} tokens, 重叠 {args.overlap} tokens")
+    print("=" * 110)
+    before = evaluate("逐元素", elements, query_vectors, queries, embeddings, args.k, CONFIG["EMBED_BATCH_SIZE"])
+    after = evaluate("合并后", chunks, query_vectors, queries, embeddings, args.k, CONFIG["EMBED_BATCH_SIZE"])
+    print("=" * 110)
+    print(f"向量数减少 {1 - after / before:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+嵌入后端基准脚本
+对比torch、onnx、onnx_int8三种后端的模型加载时间、单条查询延迟（p50/p99）和批量嵌入吞吐，
+以及相对torch后端的向量偏差（余弦相似度）和在现有索引上的top-k一致率
+
+用法:
+    python bench_embeddings.py                         # 测试全部后端
+    python bench_embeddings.py --backends torch onnx_int8 --queries 100
+"""
+
+import sys
+import os
+import time
+import argparse
+
+import faiss
+import numpy as np
+
+# 添加项目路径
+sys.path.append(os.path.dirname(__file__))
+
+from lib.modules.config import CONFIG
+from lib.modules.embeddings import create_embeddings, EMBEDDING_BACKENDS
+from lib.modules.disk_docstore import SqliteDocstore, docstore_exists
+from lib.modules.vectorstore_manager import current_index_dir
+
+# 没有现成文档库时使用的样例文本
+SAMPLE_TEXTS = [
+    "你好",
+    "xv6的进程调度是怎么实现的？",
+    "介绍一下OpenHarmony的分布式软总线",
+    "如何联系博主？",
+    "C++中虚函数表的内存布局",
+    "计算机网络中TCP三次握手的过程",
+    "Linux内核中的页表是如何组织的",
+    "最近在读什么书",
+]
+
+
+def load_texts(count: int):
+    """从文档库中取片段作为测试文本，文档库不存在时使用样例文本"""
+    path = current_index_dir() or CONFIG["VECTORSTORE_PATH"]
+    if docstore_exists(path):
+        texts = [doc.page_content for _, doc in SqliteDocstore(path).iter_documents()]
+    else:
+        texts = []
+    texts = texts or SAMPLE_TEXTS
+    return [texts[i % len(texts)] for i in range(count)]
+
+
+def measure_queries(embeddings, queries):
+    """逐条嵌入查询，返回 (向量矩阵, 每条延迟毫秒)"""
+    vectors, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        vectors.append(embeddings.embed_query(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.asarray(vectors, dtype=np.float32), np.asarray(latencies)
+
+
+def load_index():
+    """读取现有索引用于检查top-k一致率，不存在时返回None"""
+    path = os.path.join(current_index_dir() or CONFIG["VECTORSTORE_PATH"], "index.faiss")
+    if not os.path.exists(path):
+        return None
+    return faiss.read_index(path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="嵌入后端延迟/偏差基准")
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--queries", type=int, default=200, help="单条查询延迟的测试次数")
+    parser.add_argument("--documents", type=int, default=256, help="批量嵌入吞吐的文本数")
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = load_texts(max(args.queries, args.documents))
+    # 查询取每个片段的开头，模拟短问题
+    queries = [text[:64] for text in texts[:args.queries]]
+    documents = texts[:args.documents]
+    index = load_index()
+    print(f"模型: {CONFIG['MODEL_DIR']}, 查询数: {len(queries)}, 批量文本数: {len(documents)}, "
+          f"批大小: {CONFIG['EMBED_BATCH_SIZE']}")
+    print("=" * 100)
+
+    reference = None
+    for backend in args.backends:
+        start = time.perf_counter()
+        embeddings = create_embeddings(backend=backend)
+        load_time = time.perf_counter() - start
+
+        embeddings.embed_query(queries[0])  # 预热
+        vectors, latencies = measure_queries(embeddings, queries)
+
+        start = time.perf_counter()
+        for i in range(0, len(documents), CONFIG["EMBED_BATCH_SIZE"]):
+            embeddings.embed_documents(documents[i:i + CONFIG["EMBED_BATCH_SIZE"]])
+        throughput = len(documents) / (time.perf_counter() - start)
+
+        line = (f"{backend:<10} | 加载 {load_time:5.1f}s | p50 {np.percentile(latencies, 50):7.2f} ms | "
+                f"p99 {np.percentile(latencies, 99):7.2f} ms | 批量 {throughput:7.1f} 条/s")
+        if reference is None:
+            reference = vectors
+            if index is not None and index.d != vectors.shape[1]:
+                print(f"索引维度 {index.d} 与模型维度 {vectors.shape[1]} 不一致，跳过top-k一致率")
+                index = None
+            reference_ids = index.search(vectors, args.k)[1] if index is not None else None
+        else:
+            similarity = np.sum(vectors * reference, axis=1)
+            line += f" | 余弦相似度 平均 {similarity.mean():.4f} 最低 {similarity.min():.4f}"
+            if reference_ids is not None:
+                ids = index.search(vectors, args.k)[1]
+                overlap = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(ids, reference_ids)])
+                line += f" | top-{args.k}一致 {overlap:.3f}"
+        print(line)
+
+    print("=" * 100)
+    print(f"偏差以第一个后端（{args.backends[0]}）为基准")
+
+
+if __name__ == "__main__":
+    main()
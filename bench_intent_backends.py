@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+意图识别后端冷启动基准脚本
+每个后端在全新的子进程中测量导入模块+加载模型的耗时、第一次识别的延迟、
+之后单条识别的延迟（p50/p99）、进程峰值内存（RSS），以及进程是否导入了PyTorch
+
+用法:
+    python bench_intent_backends.py
+    python bench_intent_backends.py --backends torch numpy --rounds 20
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import resource
+import subprocess
+
+# 添加项目路径
+sys.path.append(os.path.dirname(__file__))
+
+
+def load_questions():
+    """训练数据中的问题作为测试输入"""
+    path = os.path.join(os.path.dirname(__file__), "intent_training_data.json")
+    with open(path, "r", encoding="utf-8") as f:
+        return [item["input"] for item in json.load(f)["training_data"]]
+
+
+def run_child(backend: str, rounds: int) -> None:
+    """在当前（全新的）进程中加载指定后端并测量，结果以JSON输出到最后一行"""
+    # 分词器词典加载与后端无关，先完成，不计入加载耗时
+    from lib.modules.tokenizer import tokenize
+    tokenize("预热")
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    from lib.modules.config import CONFIG
+    CONFIG["QUERY_CACHE_ENABLED"] = False
+    CONFIG["INTENT_MICRO_BATCH_ENABLED"] = False
+    CONFIG["INTENT_BACKGROUND_TRAINING"] = False
+    from lib.modules.intent_service import create_intent_recognizer
+    recognizer = create_intent_recognizer(backend)
+    loaded = time.perf_counter()
+    recognizer._predict(["博客里有没有MIT 6.S081的笔记？"])
+    first = time.perf_counter()
+
+    latencies = []
+    for _ in range(rounds):
+        for question in load_questions():
+            begin = time.perf_counter()
+            recognizer._predict([question])
+            latencies.append((time.perf_counter() - begin) * 1000)
+    latencies = sorted(latencies) or [0.0]
+
+    print(json.dumps({
+        "model": type(recognizer.model).__name__,
+        "load_ms": (loaded - start) * 1000,
+        "first_ms": (first - loaded) * 1000,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        # Linux上ru_maxrss的单位为KB
+        "baseline_rss_mb": baseline_rss / 1024,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "torch_imported": "torch" in sys.modules,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="意图识别后端冷启动基准")
+    parser.add_argument("--backends", nargs="+", default=["torch", "numpy"])
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.rounds)
+        return
+
+    # 先各运行一次，确保模型和导出文件已存在，之后的计时不包含训练和导出耗时
+    for backend in args.backends:
+        subprocess.run([sys.executable, __file__, "--child", backend, "--rounds", "0"],
+                       capture_output=True, check=True)
+
+    print(f"轮数: {args.rounds}, 每个后端一个全新的子进程")
+    print("=" * 110)
+    for backend in args.backends:
+        output = subprocess.run([sys.executable, __file__, "--child", backend, "--rounds", str(args.rounds)],
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{backend:<6} ({result['model']:<22}) | 加载 {result['load_ms']:7.1f} ms | "
+              f"首次识别 {result['first_ms']:6.2f} ms | p50 {result['p50_ms']:6.3f} ms | "
+              f"p99 {result['p99_ms']:6.3f} ms | 峰值RSS {result['rss_mb']:6.1f} MB "
+              f"(+{result['rss_mb'] - result['baseline_rss_mb']:.1f}) | "
+              f"导入torch: {'是' if result['torch_imported'] else '否'}")
+    print("=" * 110)
+    print("加载耗时包含导入意图识别模块；RSS括号内为相对于只加载分词器时的增量")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+意图识别批处理基准脚本
+对比逐条填充到max_length（原方式）与按批变长打包两种前向计算在不同批大小下的每条CPU时间，
+以及包含关键词增强和槽位提取的完整批量识别耗时
+
+用法:
+    python bench_intent_batch.py
+    python bench_intent_batch.py --batch-sizes 1 8 64 --rounds 50 --threads 1
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+
+import torch
+
+# 添加项目路径
+sys.path.append(os.path.dirname(__file__))
+
+from lib.modules.config import CONFIG
+
+
+def load_questions():
+    """训练数据中的问题作为测试输入"""
+    path = os.path.join(os.path.dirname(__file__), "intent_training_data.json")
+    with open(path, "r", encoding="utf-8") as f:
+        return [item["input"] for item in json.load(f)["training_data"]]
+
+
+def cpu_ms_per_query(run, batches, rounds: int) -> float:
+    """重复rounds轮处理全部批次，返回每条输入的平均CPU毫秒数"""
+    run(batches[0])  # 预热
+    start = time.process_time()
+    count = 0
+    for _ in range(rounds):
+        for batch in batches:
+            run(batch)
+            count += len(batch)
+    return (time.process_time() - start) * 1000 / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="意图识别批处理基准")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=1, help="torch线程数")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    # 关闭缓存和微批处理，直接测量前向计算
+    CONFIG["QUERY_CACHE_ENABLED"] = False
+    CONFIG["INTENT_MICRO_BATCH_ENABLED"] = False
+    from lib.modules.intent_recognition import SimpleIntentRecognizer
+
+    recognizer = SimpleIntentRecognizer(background_training=False)
+    if recognizer.model is None:
+        print("意图识别模型不可用")
+        return
+
+    questions = load_questions()
+    lengths = [len(recognizer.vocab.tokenize(question)) for question in questions]
+    print(f"问题数: {len(questions)}, 平均词数: {sum(lengths) / len(lengths):.1f}, "
+          f"max_length: {recognizer.max_length}, torch线程: {args.threads}")
+    print("=" * 80)
+    print(f"{'批大小':>6} | {'填充到max_length':>16} | {'变长打包':>10} | {'加速':>6} | {'完整识别':>10}")
+    print("-" * 80)
+
+    packed = recognizer.packed_sequences
+
+    def run_padded(batch):
+        recognizer.packed_sequences = False
+        recognizer._predict(batch)
+
+    def run_packed(batch):
+        recognizer.packed_sequences = True
+        recognizer._predict(batch)
+
+    def run_full(batch):
+        recognizer.packed_sequences = True
+        recognizer._recognize_batch(batch)
+
+    for batch_size in args.batch_sizes:
+        batches = [questions[i:i + batch_size] for i in range(0, len(questions), batch_size)]
+        padded_ms = cpu_ms_per_query(run_padded, batches, args.rounds)
+        packed_ms = cpu_ms_per_query(run_packed, batches, args.rounds)
+        full_ms = cpu_ms_per_query(run_full, batches, args.rounds)
+        print(f"{batch_size:>6} | {padded_ms:>13.3f} ms | {packed_ms:>7.3f} ms | "
+              f"x{padded_ms / packed_ms:>5.1f} | {full_ms:>7.3f} ms")
+
+    recognizer.packed_sequences = packed
+    print("=" * 80)
+    print("时间为每条输入的平均CPU时间")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+意图模型编译基准脚本
+对比PyTorch原模型与TorchScript + 动态int8量化模型的加载耗时（编译模型包含预热）、
+第一次识别的延迟、之后单条识别的延迟（p50/p99），
+以及两者在训练数据上的预测一致率
+
+用法:
+    python bench_intent_compiled.py
+    python bench_intent_compiled.py --rounds 20 --threads 1
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+
+import numpy as np
+import torch
+
+# 添加项目路径
+sys.path.append(os.path.dirname(__file__))
+
+from lib.modules.config import CONFIG
+
+
+def load_questions():
+    """训练数据中的问题作为测试输入"""
+    path = os.path.join(os.path.dirname(__file__), "intent_training_data.json")
+    with open(path, "r", encoding="utf-8") as f:
+        return [item["input"] for item in json.load(f)["training_data"]]
+
+
+def create_recognizer(compiled: bool):
+    """创建识别器，返回 (识别器, 加载毫秒数, 第一次识别毫秒数)"""
+    from lib.modules.intent_recognition import SimpleIntentRecognizer
+
+    CONFIG["INTENT_COMPILED_MODEL"] = compiled
+    start = time.perf_counter()
+    recognizer = SimpleIntentRecognizer(background_training=False)
+    loaded = time.perf_counter()
+    recognizer._predict(["博客里有没有MIT 6.S081的笔记？"])
+    return recognizer, (loaded - start) * 1000, (time.perf_counter() - loaded) * 1000
+
+
+def measure(recognizer, questions, rounds: int) -> np.ndarray:
+    """逐条识别，返回每次的延迟毫秒"""
+    latencies = []
+    for _ in range(rounds):
+        for question in questions:
+            start = time.perf_counter()
+            recognizer._predict([question])
+            latencies.append((time.perf_counter() - start) * 1000)
+    return np.asarray(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="意图模型编译基准")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=1, help="torch线程数")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    CONFIG["QUERY_CACHE_ENABLED"] = False
+    CONFIG["INTENT_MICRO_BATCH_ENABLED"] = False
+
+    # 确保编译模型已导出，之后的计时不包含导出耗时
+    recognizer, _, _ = create_recognizer(compiled=True)
+    if not isinstance(recognizer.model, torch.jit.ScriptModule):
+        print("编译模型不可用（导出失败或预测一致率不足），见上方日志")
+        return
+
+    questions = load_questions()
+    eager, eager_load, eager_first = create_recognizer(compiled=False)
+    compiled, compiled_load, compiled_first = create_recognizer(compiled=True)
+
+    print(f"问题数: {len(questions)}, 轮数: {args.rounds}, torch线程: {args.threads}")
+    print("=" * 80)
+    for name, target, load_ms, first_ms in (("PyTorch", eager, eager_load, eager_first),
+                                            ("TorchScript int8", compiled, compiled_load, compiled_first)):
+        latencies = measure(target, questions, args.rounds)
+        print(f"{name:<18} | 加载 {load_ms:7.1f} ms | 首次识别 {first_ms:6.2f} ms | "
+              f"p50 {np.percentile(latencies, 50):6.3f} ms | p99 {np.percentile(latencies, 99):6.3f} ms")
+
+    expected = [intent for intent, _ in eager._predict(questions)]
+    actual = [intent for intent, _ in compiled._predict(questions)]
+    agreement = sum(a == b for a, b in zip(expected, actual)) / len(questions)
+    print("=" * 80)
+    print(f"预测一致率: {agreement:.3f}")
+
+
+if __name__ == "__main__":
+    main()
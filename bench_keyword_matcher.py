@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+意图关键词匹配基准脚本
+对比逐个关键词 `keyword in text` 扫描与Aho-Corasick一次扫描在不同关键词数量下的单条耗时，
+以及使用内置关键词表时关键词回退识别的单条耗时
+
+用法:
+    python bench_keyword_matcher.py
+    python bench_keyword_matcher.py --sizes 100 1000 10000 --rounds 5
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+
+# 添加项目路径
+sys.path.append(os.path.dirname(__file__))
+
+from lib.modules.config import CONFIG
+from lib.modules.keyword_matcher import KeywordMatcher
+
+
+def load_questions():
+    """训练数据中的问题作为测试输入"""
+    path = os.path.join(os.path.dirname(__file__), "intent_training_data.json")
+    with open(path, "r", encoding="utf-8") as f:
+        return [item["input"] for item in json.load(f)["training_data"]]
+
+
+def synthetic_tables(size: int, rng: random.Random):
+    """在内置关键词表上补充随机的汉字词，凑够size个，平均分到10个类别"""
+    with open(CONFIG["INTENT_KEYWORDS_PATH"], "r", encoding="utf-8") as f:
+        data = json.load(f)
+    keywords = {keyword for table in data["slots"].values() for words in table.values() for keyword in words}
+    while len(keywords) < size:
+        keywords.add("".join(chr(rng.randint(0x4e00, 0x9fa5)) for _ in range(rng.randint(2, 4))))
+    keywords = sorted(keywords)[:size]
+    return {"bench": {f"类别{i}": keywords[i::10] for i in range(10)}}
+
+
+def per_keyword_scan(tables, text: str):
+    """原方式：逐个关键词判断是否出现在小写文本中"""
+    text_lower = text.lower()
+    return [(table, category, keyword)
+            for table, categories in tables.items()
+            for category, keywords in categories.items()
+            for keyword in keywords if keyword in text_lower]
+
+
+def us_per_query(run, questions, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for question in questions:
+            run(question)
+    return (time.perf_counter() - start) * 1e6 / (rounds * len(questions))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="意图关键词匹配基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 20000])
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    questions = load_questions()
+    rng = random.Random(0)
+    print(f"问题数: {len(questions)}, 轮数: {args.rounds}")
+    print("=" * 80)
+    print(f"{'关键词数':>8} | {'编译耗时':>10} | {'逐个关键词':>12} | {'一次扫描':>10} | {'加速':>6}")
+    print("-" * 80)
+    for size in args.sizes:
+        tables = synthetic_tables(size, rng)
+        start = time.perf_counter()
+        matcher = KeywordMatcher(tables)
+        build_ms = (time.perf_counter() - start) * 1000
+        linear_us = us_per_query(lambda q: per_keyword_scan(tables, q), questions, args.rounds)
+        scan_us = us_per_query(matcher.scan, questions, args.rounds)
+        print(f"{len(matcher):>8} | {build_ms:>7.1f} ms | {linear_us:>9.1f} us | {scan_us:>7.1f} us | "
+              f"x{linear_us / scan_us:>5.1f}")
+
+    CONFIG["QUERY_CACHE_ENABLED"] = False
+    CONFIG["INTENT_MICRO_BATCH_ENABLED"] = False
+    from lib.modules.intent_base import BaseIntentRecognizer
+
+    class KeywordOnlyRecognizer(BaseIntentRecognizer):
+        """不加载模型，只用于测关键词回退"""
+
+        def _predict(self, user_inputs, model=None):
+            raise RuntimeError("没有模型")
+
+    recognizer = KeywordOnlyRecognizer()
+    fallback_us = us_per_query(recognizer._fallback_intent_recognition, questions, args.rounds)
+    print("=" * 80)
+    print(f"内置关键词表（{len(recognizer.keyword_matcher)} 个关键词）关键词回退识别: {fallback_us:.1f} us/条")
+
+
+if __name__ == "__main__":
+    main()
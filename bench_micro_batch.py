@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+查询嵌入微批处理基准脚本
+以不同并发数同时嵌入问题，对比关闭/开启微批处理时单条请求的延迟（p50/p99）和吞吐
+
+用法:
+    python bench_micro_batch.py
+    python bench_micro_batch.py --concurrency 1 8 32 --max-wait 5 --max-batch 32
+"""
+
+import sys
+import os
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# 添加项目路径
+sys.path.append(os.path.dirname(__file__))
+
+from lib.modules.config import CONFIG
+from lib.modules.embeddings import create_embeddings, BatchedEmbeddings
+
+QUESTIONS = [
+    "什么是xv6",
+    "OpenHarmony烧录失败怎么办",
+    "博客里有没有MIT 6.S081的笔记",
+    "怎么使用git",
+    "C++中虚函数表的内存布局",
+    "计算机网络中TCP三次握手的过程",
+    "Linux内核中的页表是如何组织的",
+    "如何联系博主",
+]
+
+
+def run_level(embeddings, concurrency: int, requests_per_client: int):
+    """以指定并发数嵌入问题，返回 (每条延迟毫秒, 吞吐QPS)"""
+    total = concurrency * requests_per_client
+    # 每条问题加上序号，避免任何层面的重复计算
+    questions = [f"{QUESTIONS[i % len(QUESTIONS)]} {i}" for i in range(total)]
+
+    def embed(question):
+        start = time.perf_counter()
+        embeddings.embed_query(question)
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = np.asarray(list(pool.map(embed, questions)))
+    return latencies, total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查询嵌入微批处理基准")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--requests", type=int, default=8, help="每个并发客户端的请求数")
+    parser.add_argument("--max-batch", type=int, default=CONFIG["EMBED_MICRO_BATCH_MAX_SIZE"])
+    parser.add_argument("--max-wait", type=float, default=CONFIG["EMBED_MICRO_BATCH_MAX_WAIT_MS"], help="毫秒")
+    args = parser.parse_args()
+
+    embeddings = create_embeddings()
+    batched = BatchedEmbeddings(embeddings, max_batch_size=args.max_batch, max_wait_ms=args.max_wait)
+    embeddings.embed_query("预热")
+    print(f"模型: {CONFIG['MODEL_DIR']} ({CONFIG['EMBEDDING_BACKEND']}), "
+          f"微批处理: 每批最多 {args.max_batch} 条, 最长等待 {args.max_wait}ms")
+    print("=" * 92)
+
+    for concurrency in args.concurrency:
+        for name, target in (("关闭", embeddings), ("开启", batched)):
+            batches, items = batched.batcher.batches, batched.batcher.items
+            latencies, qps = run_level(target, concurrency, args.requests)
+            line = (f"并发 {concurrency:>3} | 微批处理{name} | p50 {np.percentile(latencies, 50):8.2f} ms | "
+                    f"p99 {np.percentile(latencies, 99):8.2f} ms | {qps:8.1f} QPS")
+            if target is batched:
+                batch_count = batched.batcher.batches - batches
+                line += f" | 平均批大小 {(batched.batcher.items - items) / max(batch_count, 1):.1f}"
+            print(line)
+        print("-" * 92)
+
+    batched.batcher.close()
+
+
+if __name__ == "__main__":
+    main()
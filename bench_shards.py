@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+索引分片基准脚本
+对比单进程检索与1/2/4/8个分片进程分发-合并检索的单次查询延迟（p50/p99）、吞吐和多线程并发查询的吞吐，
+并检查合并后的top-k与单进程结果一致（扁平索引时应完全相同）
+
+用法:
+    python bench_shards.py                                # 使用 lib/faiss_index 中的真实向量
+    python bench_shards.py --synthetic 200000 --dim 768   # 使用随机向量模拟大语料
+    python bench_shards.py --index-type ivf_flat --shard-by category
+"""
+
+import sys
+import os
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import faiss
+import numpy as np
+
+# 添加项目路径
+sys.path.append(os.path.dirname(__file__))
+
+from lib.modules.config import CONFIG
+from lib.modules.ann_index import create_index, apply_search_params
+from lib.modules.sharding import assign_shards, write_shards, load_shard_info, ShardedSearcher
+from bench_ann import load_vectors, make_queries, recall_at_k
+
+# 模拟博客：每篇文章的片段数和分类数
+CHUNKS_PER_FILE = 8
+CATEGORIES = 12
+
+
+def make_metadatas(count: int):
+    """按向量位置生成元数据，相邻片段属于同一文件"""
+    return [{"source": f"blog/post_{i // CHUNKS_PER_FILE}.md",
+             "file_categories": f"category_{(i // CHUNKS_PER_FILE) % CATEGORIES}"}
+            for i in range(count)]
+
+
+def measure(search, queries: np.ndarray, k: int):
+    """逐条查询，返回 (结果id矩阵, 每次查询的延迟毫秒)"""
+    results = np.empty((len(queries), k), dtype=np.int64)
+    latencies = np.empty(len(queries))
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        _, ids = search(queries[i:i + 1], k)
+        latencies[i] = (time.perf_counter() - start) * 1000
+        results[i] = ids[0]
+    return results, latencies
+
+
+def measure_concurrent(search, queries: np.ndarray, k: int, concurrency: int) -> float:
+    """多个线程同时逐条查询，返回吞吐（QPS）"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda i: search(queries[i:i + 1], k), range(len(queries))))
+    return len(queries) / (time.perf_counter() - start)
+
+
+def report(name: str, results: np.ndarray, latencies: np.ndarray, truth: np.ndarray, k: int,
+           concurrent_qps: float) -> None:
+    print(f"{name:<12} | p50 {np.percentile(latencies, 50):7.3f} ms | p99 {np.percentile(latencies, 99):7.3f} ms | "
+          f"{1000 / latencies.mean():8.1f} QPS | 并发 {concurrent_qps:8.1f} QPS | "
+          f"与单进程一致 {recall_at_k(results, truth):.3f}@{k}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="索引分片延迟基准")
+    parser.add_argument("--synthetic", type=int, default=0, help="使用N条随机向量代替现有索引")
+    parser.add_argument("--dim", type=int, default=768, help="随机向量维度")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--shard-by", default="file", choices=["file", "category"])
+    parser.add_argument("--index-type", default="flat", help="flat / ivf_flat / ivf_pq / hnsw")
+    parser.add_argument("--threads", type=int, default=1, help="每个分片进程的faiss线程数")
+    parser.add_argument("--concurrency", type=int, default=8, help="并发查询的线程数")
+    args = parser.parse_args()
+
+    # 基线与分片进程使用相同的线程数
+    faiss.omp_set_num_threads(args.threads)
+
+    vectors = load_vectors(args.synthetic, args.dim)
+    queries = make_queries(vectors, min(args.queries, len(vectors)))
+    print(f"向量数: {len(vectors)}, 维度: {vectors.shape[1]}, 查询数: {len(queries)}, k={args.k}, "
+          f"索引: {args.index_type}, 分片方式: {args.shard_by}")
+    print("=" * 90)
+
+    rng = np.random.default_rng(2)
+    sample_size = min(CONFIG["FAISS_TRAIN_SAMPLE"], len(vectors))
+    training = vectors[rng.choice(len(vectors), size=sample_size, replace=False)]
+    index = create_index(vectors.shape[1], training, index_type=args.index_type)
+    index.add(vectors)
+    apply_search_params(index)
+
+    truth, latencies = measure(index.search, queries, args.k)
+    report("单进程", truth, latencies, truth, args.k, measure_concurrent(index.search, queries, args.k, args.concurrency))
+
+    metadatas = make_metadatas(len(vectors))
+    for count in args.shards:
+        with tempfile.TemporaryDirectory() as directory:
+            assignment = assign_shards(metadatas, count, args.shard_by)
+            write_shards(directory, index, assignment, count, args.shard_by)
+            searcher = ShardedSearcher(directory, load_shard_info(directory), threads=args.threads)
+            try:
+                # 构造时已等待分片进程加载完成，第一次查询用于预热
+                searcher.search(queries[:1], args.k)
+                results, latencies = measure(searcher.search, queries, args.k)
+                concurrent_qps = measure_concurrent(searcher.search, queries, args.k, args.concurrency)
+            finally:
+                searcher.close()
+        report(f"{count} 分片", results, latencies, truth, args.k, concurrent_qps)
+
+    print("=" * 90)
+    print("注: 分片进程属于创建它的进程，多worker部署时每个worker各自启动一组（worker数 × 分片数 个进程），")
+    print("    协调进程仍内存映射完整索引用于出错时回退。分片降低的是单次查询延迟，不会减少多worker部署的总内存。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""近似最近邻索引模块 - 根据配置创建扁平、IVF或HNSW类型的FAISS索引"""
+
+import math
+from typing import Optional
+
+import faiss
+import numpy as np
+
+from .config import CONFIG
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+VECTOR_CODECS = ("float32", "fp16", "int8", "pq")
+
+_SQ_TYPES = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+# IVF每个聚类中心至少需要的训练样本数（低于此值faiss会给出警告且聚类质量较差）
+_MIN_POINTS_PER_CENTROID = 39
+# PQ码本（8 bit，256个中心）至少需要的训练样本数
+_MIN_PQ_TRAINING_POINTS = 256 * _MIN_POINTS_PER_CENTROID
+
+
+def get_index_type() -> str:
+    """获取配置的索引类型"""
+    index_type = CONFIG["FAISS_INDEX_TYPE"]
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"不支持的索引类型: {index_type}，可选: {', '.join(INDEX_TYPES)}")
+    return index_type
+
+
+def get_vector_codec() -> str:
+    """获取配置的向量存储编码"""
+    codec = CONFIG["FAISS_VECTOR_CODEC"]
+    if codec not in VECTOR_CODECS:
+        raise ValueError(f"不支持的向量编码: {codec}，可选: {', '.join(VECTOR_CODECS)}")
+    return codec
+
+
+def needs_training(index_type: Optional[str] = None, codec: Optional[str] = None) -> bool:
+    """该索引类型/编码是否需要先用样本训练"""
+    return _min_training_points(index_type or get_index_type(), codec or get_vector_codec()) > 0
+
+
+def _min_training_points(index_type: str, codec: str) -> int:
+    """训练所需的最少样本数，0表示无需训练"""
+    points = 0
+    if index_type in ("ivf_flat", "ivf_pq"):
+        points = _MIN_POINTS_PER_CENTROID * 2
+    if index_type == "ivf_pq" or codec == "pq":
+        points = max(points, _MIN_PQ_TRAINING_POINTS)
+    if codec == "int8":
+        # 标量量化只需统计每一维的取值范围
+        points = max(points, 1)
+    return points
+
+
+def _choose_nlist(sample_count: int) -> int:
+    """确定IVF聚类数：配置为0时按 4*sqrt(n) 自动选择，并保证每个中心有足够的训练样本"""
+    nlist = CONFIG["FAISS_IVF_NLIST"] or int(4 * math.sqrt(sample_count))
+    return max(1, min(nlist, sample_count // _MIN_POINTS_PER_CENTROID))
+
+
+def _choose_pq_m(dimension: int) -> int:
+    """PQ子空间数必须整除向量维度，取不超过配置值的最大因子"""
+    m = min(CONFIG["FAISS_PQ_M"], dimension)
+    while dimension % m:
+        m -= 1
+    return m
+
+
+def create_index(dimension: int, training_vectors: Optional[np.ndarray] = None,
+                 index_type: Optional[str] = None, codec: Optional[str] = None) -> faiss.Index:
+    """
+    创建（并训练）FAISS索引
+
+    Args:
+        dimension: 向量维度
+        training_vectors: 训练样本，IVF类索引和int8/PQ编码需要
+        index_type: 索引类型，为None时使用配置
+        codec: 向量存储编码，为None时使用配置
+
+    Returns:
+        faiss.Index: 可直接添加向量的索引（使用L2距离，与FAISS.from_documents一致）
+    """
+    index_type = index_type or get_index_type()
+    codec = codec or get_vector_codec()
+
+    sample_count = 0 if training_vectors is None else len(training_vectors)
+    min_points = _min_training_points(index_type, codec)
+    if sample_count < min_points:
+        print(f"训练样本不足（{sample_count} < {min_points}），改用float32扁平索引")
+        return faiss.IndexFlatL2(dimension)
+
+    use_pq = index_type == "ivf_pq" or codec == "pq"
+    sq_type = _SQ_TYPES.get(codec)
+
+    if index_type == "hnsw":
+        m = CONFIG["FAISS_HNSW_M"]
+        if use_pq:
+            index = faiss.IndexHNSWPQ(dimension, _choose_pq_m(dimension), m)
+        elif sq_type is not None:
+            index = faiss.IndexHNSWSQ(dimension, sq_type, m)
+        else:
+            index = faiss.IndexHNSWFlat(dimension, m)
+        index.hnsw.efConstruction = CONFIG["FAISS_HNSW_EF_CONSTRUCTION"]
+    elif index_type in ("ivf_flat", "ivf_pq"):
+        nlist = _choose_nlist(sample_count)
+        quantizer = faiss.IndexFlatL2(dimension)
+        if use_pq:
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, _choose_pq_m(dimension), 8)
+        elif sq_type is not None:
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dimension, nlist, sq_type, faiss.METRIC_L2)
+        else:
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+    else:
+        if use_pq:
+            index = faiss.IndexPQ(dimension, _choose_pq_m(dimension), 8)
+        elif sq_type is not None:
+            index = faiss.IndexScalarQuantizer(dimension, sq_type, faiss.METRIC_L2)
+        else:
+            index = faiss.IndexFlatL2(dimension)
+
+    if not index.is_trained:
+        print(f"训练索引: {index_type}/{codec}, 样本数={sample_count}")
+        index.train(np.ascontiguousarray(training_vectors, dtype=np.float32))
+
+    apply_search_params(index)
+    return index
+
+
+def apply_search_params(index: faiss.Index) -> faiss.Index:
+    """设置查询时参数：IVF的nprobe、HNSW的efSearch"""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(CONFIG["FAISS_NPROBE"], ivf.nlist)
+    hnsw = _get_hnsw(index)
+    if hnsw is not None:
+        hnsw.efSearch = CONFIG["FAISS_EF_SEARCH"]
+    return index
+
+
+def filtered_search(index: faiss.Index, queries: np.ndarray, k: int, positions: np.ndarray):
+    """
+    只在指定向量位置中检索top-k
+    
+    过滤在索引内部进行（不是对top-k结果事后过滤），IVF和HNSW的nprobe/efSearch沿用当前设置。
+    分区较小（不超过FILTER_BRUTE_FORCE_MAX）或为IndexPQ（不支持查询参数）时，
+    直接解码这些位置的向量精确检索：HNSW图在过滤比例很高时难以走到被选中的节点。
+    
+    Args:
+        index: 目标索引
+        queries: 查询向量矩阵
+        k: 返回数量
+        positions: 允许返回的向量位置（升序）
+    
+    Returns:
+        (距离矩阵, 位置矩阵)，与index.search相同，不足k个时位置为-1
+    """
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    is_ivf = faiss.try_extract_index_ivf(index) is not None
+    brute_force = isinstance(faiss.downcast_index(index), faiss.IndexPQ) or (
+        not is_ivf and len(positions) <= CONFIG["FILTER_BRUTE_FORCE_MAX"])
+    if not brute_force:
+        return index.search(queries, k, params=_filtered_search_params(index, positions))
+    
+    distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+    labels = np.full((len(queries), k), -1, dtype=np.int64)
+    if len(positions):
+        found = min(k, len(positions))
+        vectors = index.reconstruct_batch(np.asarray(positions, dtype=np.int64))
+        subset_distances, local = faiss.knn(queries, vectors, found)
+        distances[:, :found] = subset_distances
+        labels[:, :found] = np.asarray(positions)[local]
+    return distances, labels
+
+
+def _filtered_search_params(index: faiss.Index, positions: np.ndarray) -> faiss.SearchParameters:
+    """构造带IDSelector的查询参数"""
+    selector = faiss.IDSelectorBatch(np.ascontiguousarray(positions, dtype=np.int64))
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+    else:
+        hnsw = _get_hnsw(index)
+        if hnsw is not None:
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=hnsw.efSearch)
+        else:
+            params = faiss.SearchParameters(sel=selector)
+    # 参数对象只保存selector的指针，需要保持引用
+    params.selector_ref = selector
+    return params
+
+
+def _get_hnsw(index: faiss.Index):
+    """返回HNSW图结构（非HNSW索引返回None）"""
+    index = faiss.downcast_index(index)
+    return getattr(index, "hnsw", None)
+
+
+def supports_removal(index: faiss.Index) -> bool:
+    """索引删除向量后剩余向量的编号是否保持连续
+    
+    FAISS向量库用连续编号映射docstore id。扁平类索引删除后会压缩编号；
+    IVF删除后保留原编号，HNSW则完全不支持删除，这两类需要重建。
+    """
+    return isinstance(faiss.downcast_index(index), faiss.IndexFlatCodes)
+
+
+def rebuild_without_positions(index: faiss.Index, positions) -> faiss.Index:
+    """
+    重建一个不包含指定位置向量的同类型索引（用于IVF和HNSW）
+
+    向量直接从原索引中取回，无需重新计算嵌入；IVF索引沿用已训练的聚类中心。
+
+    Args:
+        index: 原索引
+        positions: 要删除的向量位置
+
+    Returns:
+        faiss.Index: 新索引，剩余向量保持原有的相对顺序并连续编号
+    """
+    keep = np.ones(index.ntotal, dtype=bool)
+    keep[np.asarray(list(positions), dtype=np.int64)] = False
+    vectors = reconstruct_all(index)[keep]
+
+    new_index = empty_like(index)
+    if len(vectors):
+        new_index.add(vectors)
+    return new_index
+
+
+def reconstruct_all(index: faiss.Index) -> np.ndarray:
+    """取回索引中的全部向量（有损编码时为解码后的近似值）"""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def empty_like(index: faiss.Index) -> faiss.Index:
+    """创建与原索引类型、参数相同的空索引（IVF沿用已训练的聚类中心和量化器）"""
+    new_index = faiss.clone_index(index)
+    new_index.reset()
+    new_ivf = faiss.try_extract_index_ivf(new_index)
+    if new_ivf is not None:
+        new_ivf.set_direct_map_type(faiss.DirectMap.NoMap)
+    apply_search_params(new_index)
+    return new_index
+
+
+def detect_codec(index: faiss.Index) -> str:
+    """从索引结构识别向量存储编码（加载时自动识别，无需额外配置）"""
+    index = faiss.downcast_index(index)
+    if _get_hnsw(index) is not None:
+        index = faiss.downcast_index(index.storage)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        index = faiss.downcast_index(ivf)
+
+    if isinstance(index, (faiss.IndexPQ, faiss.IndexIVFPQ)):
+        return "pq"
+    if isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        return {qtype: codec for codec, qtype in _SQ_TYPES.items()}.get(index.sq.qtype, "sq")
+    return "float32"
+
+
+def index_memory_bytes(index: faiss.Index) -> int:
+    """索引序列化后的大小，近似等于加载后占用的内存"""
+    return faiss.serialize_index(index).nbytes
+
+
+def describe_index(index: faiss.Index) -> str:
+    """描述索引类型、向量编码和主要参数"""
+    codec = detect_codec(index)
+    index = faiss.downcast_index(index)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return f"{type(faiss.downcast_index(ivf)).__name__}(codec={codec}, nlist={ivf.nlist}, nprobe={ivf.nprobe}, ntotal={index.ntotal})"
+    hnsw = _get_hnsw(index)
+    if hnsw is not None:
+        return f"{type(index).__name__}(codec={codec}, efSearch={hnsw.efSearch}, ntotal={index.ntotal})"
+    return f"{type(index).__name__}(codec={codec}, ntotal={index.ntotal})"
@@ -0,0 +1,159 @@
+"""回答缓存模块 - 基于Redis的精确匹配问答缓存"""
+
+import json
+import time
+import hashlib
+import logging
+import re
+import unicodedata
+from typing import Any, Dict, Optional
+
+from .config import CONFIG
+from .redis_manager import RedisManager, get_redis_manager
+from .vectorstore_manager import get_index_generation
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 归一化时去掉的首尾标点
+_TRAILING_PUNCTUATION = "？?！!。.，,；;：:~～…"
+
+
+def normalize_question(question: str) -> str:
+    """
+    归一化问题文本：全角转半角、小写、去掉空白和首尾标点
+
+    Args:
+        question: 原始问题
+
+    Returns:
+        str: 归一化后的问题
+    """
+    text = unicodedata.normalize("NFKC", question).lower()
+    text = re.sub(r"\s+", "", text)
+    return text.strip(_TRAILING_PUNCTUATION)
+
+
+class AnswerCache:
+    """问答结果缓存（键 = 索引代号 + 意图 + 归一化问题）"""
+
+    def __init__(self, manager: Optional[RedisManager] = None):
+        """
+        初始化回答缓存
+
+        Args:
+            manager: Redis管理器，如果为None则使用全局实例
+        """
+        self.manager = manager or get_redis_manager()
+        self.enabled = CONFIG["ANSWER_CACHE_ENABLED"]
+        self.ttl = CONFIG["ANSWER_CACHE_TTL"]
+        self.prefix = CONFIG["ANSWER_CACHE_PREFIX"]
+        self.retry_interval = CONFIG["ANSWER_CACHE_RETRY_INTERVAL"]
+        self.hits = 0
+        self.misses = 0
+        self._unavailable_until = 0.0
+
+    def _available(self) -> bool:
+        """Redis不可用时在重试间隔内直接跳过缓存，避免每个请求都等待连接超时"""
+        if not self.enabled:
+            return False
+        if time.monotonic() < self._unavailable_until:
+            return False
+        if self.manager.is_connected() or self.manager.connect():
+            return True
+
+        logger.warning(f"Redis不可用，{self.retry_interval}秒内跳过回答缓存")
+        self._unavailable_until = time.monotonic() + self.retry_interval
+        return False
+
+    def _make_key(self, question: str, intent: str, generation: Optional[str]) -> str:
+        """生成缓存键"""
+        digest = hashlib.sha1(normalize_question(question).encode("utf-8")).hexdigest()
+        return f"{self.prefix}:answer:{generation or get_index_generation()}:{intent}:{digest}"
+
+    def get(self, question: str, intent: str, generation: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        查询缓存的回答
+
+        Args:
+            question: 用户问题
+            intent: 识别出的意图
+            generation: 回答所用向量库的索引代号，为None时使用当前索引代号
+
+        Returns:
+            Optional[Dict[str, Any]]: {"answer": str, "sources": list}，未命中时返回None
+        """
+        if not self._available():
+            return None
+
+        value = self.manager.get_value(self._make_key(question, intent, generation))
+        if value is None:
+            self.misses += 1
+            self.manager.increment(f"{self.prefix}:answer_stats:misses")
+            return None
+
+        try:
+            cached = json.loads(value)
+        except (TypeError, ValueError):
+            self.misses += 1
+            self.manager.increment(f"{self.prefix}:answer_stats:misses")
+            return None
+
+        self.hits += 1
+        self.manager.increment(f"{self.prefix}:answer_stats:hits")
+        return cached
+
+    def set(self, question: str, intent: str, answer: Dict[str, Any], generation: Optional[str] = None) -> bool:
+        """
+        写入回答缓存
+
+        Args:
+            question: 用户问题
+            intent: 识别出的意图
+            answer: {"answer": str, "sources": list}
+            generation: 生成回答的向量库的索引代号，为None时使用当前索引代号
+
+        Returns:
+            bool: 操作是否成功
+        """
+        if not self._available():
+            return False
+
+        value = json.dumps(answer, ensure_ascii=False)
+        return self.manager.set_value(self._make_key(question, intent, generation), value, expire=self.ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取命中统计（本进程计数和Redis中的全局计数）
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        total = self.hits + self.misses
+        stats = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "generation": get_index_generation(),
+        }
+        if self._available():
+            stats["global_hits"] = int(self.manager.get_value(f"{self.prefix}:answer_stats:hits") or 0)
+            stats["global_misses"] = int(self.manager.get_value(f"{self.prefix}:answer_stats:misses") or 0)
+        return stats
+
+
+# 创建全局回答缓存实例
+_answer_cache: Optional[AnswerCache] = None
+
+
+def get_answer_cache() -> AnswerCache:
+    """
+    获取回答缓存实例（单例模式）
+
+    Returns:
+        AnswerCache: 回答缓存实例
+    """
+    global _answer_cache
+    if _answer_cache is None:
+        _answer_cache = AnswerCache()
+    return _answer_cache
@@ -0,0 +1,157 @@
+"""分块模块 - 把Markdown元素合并为按标题划分、有token上限和重叠的片段"""
+
+import re
+from itertools import groupby
+from typing import Iterable, List, Optional, Tuple
+
+from langchain.schema import Document
+
+from .config import CONFIG
+
+# 近似的token切分：汉字逐字、英文单词、数字串、其余符号各算一个token
+_TOKEN = re.compile(r"[\u3400-\u9fff\uf900-\ufaff]|[A-Za-z]+|\d+|[^\sA-Za-z\d\u3400-\u9fff\uf900-\ufaff]")
+
+# 元素级元数据，合并后不再有意义
+_ELEMENT_KEYS = ("category", "category_depth", "element_id", "parent_id", "languages",
+                 "emphasized_text_contents", "emphasized_text_tags", "link_texts", "link_urls")
+
+
+def count_tokens(text: str) -> int:
+    """估算文本的token数（嵌入模型的wordpiece数会略多，预算需留余量）"""
+    return len(_TOKEN.findall(text))
+
+
+def _split_long_text(text: str, max_tokens: int, overlap_tokens: int) -> List[str]:
+    """把超过预算的单个元素（如长代码块）按token窗口切开"""
+    spans = [match.span() for match in _TOKEN.finditer(text)]
+    if len(spans) <= max_tokens:
+        return [text]
+    step = max(1, max_tokens - overlap_tokens)
+    pieces = []
+    for start in range(0, len(spans), step):
+        end = min(start + max_tokens, len(spans))
+        pieces.append(text[spans[start][0]:spans[end - 1][1]])
+        if end == len(spans):
+            break
+    return pieces
+
+
+class _ChunkBuilder:
+    """累积一个文件的元素，产出片段"""
+
+    def __init__(self, first: Document, max_tokens: int, overlap_tokens: int):
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.min_tokens = max_tokens // 4
+        self.metadata = {key: value for key, value in first.metadata.items() if key not in _ELEMENT_KEYS}
+        self.headings: List[str] = []
+        self.chunk_headings: List[str] = []
+        self.pieces: List[Tuple[str, int]] = []
+        self.tokens = 0
+        self.chunks: List[Document] = []
+
+    def add_heading(self, text: str, depth: int) -> None:
+        """遇到标题：当前片段足够长时在此处切分，否则标题并入当前片段"""
+        if self.tokens >= self.min_tokens:
+            self.flush(keep_overlap=False)
+        self.headings = self.headings[:depth] + [text]
+        if not self.pieces:
+            self.chunk_headings = list(self.headings)
+        else:
+            self.add_text(text)
+
+    def add_text(self, text: str) -> None:
+        # 按当前片段与新片段两种标题路径中较小的预算切分，片段换用新的标题路径后仍不超出上限
+        split_budget = min(self._budget(), self._budget(self.headings))
+        for piece in _split_long_text(text, split_budget, self.overlap_tokens):
+            tokens = count_tokens(piece)
+            if self.pieces and self.tokens + tokens > self._budget():
+                self.flush(keep_overlap=True)
+                # 重叠部分加上新元素仍超出预算时，从前面丢弃重叠；
+                # 全部丢弃后片段改用当前标题路径，预算每次重新计算
+                while self.pieces and self.tokens + tokens > self._budget():
+                    _, dropped = self.pieces.pop(0)
+                    self.tokens -= dropped
+            self._append(piece, tokens)
+
+    def _budget(self, headings: Optional[List[str]] = None) -> int:
+        """正文可用的token数：上限减去标题路径（默认为当前片段的标题路径）"""
+        return self.max_tokens - count_tokens(self._heading_line(headings))
+
+    def _append(self, text: str, tokens: int) -> None:
+        if not self.pieces:
+            self.chunk_headings = list(self.headings)
+        self.pieces.append((text, tokens))
+        self.tokens += tokens
+
+    def _heading_line(self, headings: Optional[List[str]] = None) -> str:
+        """片段开头的标题路径，过长时从最外层开始省略，最多占一半预算"""
+        if headings is None:
+            headings = self.chunk_headings if self.pieces else self.headings
+        limit = self.max_tokens // 2
+        for start in range(len(headings)):
+            line = " > ".join(headings[start:])
+            if count_tokens(line) <= limit:
+                return line
+        return _split_long_text(headings[-1], limit, 0)[0] if headings else ""
+
+    def flush(self, keep_overlap: bool) -> None:
+        """输出当前片段；keep_overlap为True时把末尾不超过重叠预算的元素带入下一片段"""
+        if not self.pieces:
+            return
+        heading_line = self._heading_line()
+        body = "\n".join(text for text, _ in self.pieces)
+        metadata = dict(self.metadata)
+        metadata["headings"] = heading_line
+        metadata["chunk_index"] = len(self.chunks)
+        self.chunks.append(Document(
+            page_content=f"{heading_line}\n{body}" if heading_line else body,
+            metadata=metadata,
+        ))
+
+        carried, carried_tokens = [], 0
+        if keep_overlap:
+            for text, tokens in reversed(self.pieces):
+                if carried_tokens + tokens > self.overlap_tokens:
+                    break
+                carried.insert(0, (text, tokens))
+                carried_tokens += tokens
+        self.pieces, self.tokens = carried, carried_tokens
+
+
+def chunk_documents(elements: Iterable[Document], max_tokens: Optional[int] = None,
+                    overlap_tokens: Optional[int] = None) -> List[Document]:
+    """
+    把elements模式加载的元素合并成片段
+
+    同一文件的元素按原顺序合并；标题处优先切分，片段开头带上标题路径；
+    片段超过token预算时切分，并把末尾元素作为重叠带入下一片段。
+    source、file_categories、last_modified等文件级元数据保留。
+
+    Args:
+        elements: UnstructuredMarkdownLoader(mode='elements')的输出
+        max_tokens: 每个片段的token上限，为None时使用CHUNK_MAX_TOKENS
+        overlap_tokens: 相邻片段的重叠token数，为None时使用CHUNK_OVERLAP_TOKENS
+
+    Returns:
+        List[Document]: 片段列表
+    """
+    max_tokens = max_tokens or CONFIG["CHUNK_MAX_TOKENS"]
+    overlap_tokens = CONFIG["CHUNK_OVERLAP_TOKENS"] if overlap_tokens is None else overlap_tokens
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+
+    chunks = []
+    for _, file_elements in groupby(elements, key=lambda doc: doc.metadata.get("source")):
+        file_elements = list(file_elements)
+        builder = _ChunkBuilder(file_elements[0], max_tokens, overlap_tokens)
+        for element in file_elements:
+            text = element.page_content.strip()
+            if not text:
+                continue
+            if element.metadata.get("category") == "Title":
+                builder.add_heading(text, int(element.metadata.get("category_depth") or 0))
+            else:
+                builder.add_text(text)
+        builder.flush(keep_overlap=False)
+        chunks.extend(builder.chunks)
+    return chunks
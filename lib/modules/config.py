@@ -1,69 +1,163 @@
-"""配置文件模块 - 处理应用配置和常量设置"""
-
-import os
-import sys
-
-# 基础路径设置
-parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-lib_dir = os.path.join(parent_dir, 'lib')
-model_dir = os.path.join(parent_dir, 'model')
-blog_files_path = os.path.join(parent_dir, 'blog_files')
-vectorstore_path = os.path.join(lib_dir, 'faiss_index')
-
-# 添加lib目录到Python路径
-sys.path.append(lib_dir)
-
-# Redis配置
-REDIS_CONFIG = {
-    "HOST": os.getenv("REDIS_HOST", "localhost"),
-    "PORT": int(os.getenv("REDIS_PORT", 6380)),
-    "DB": int(os.getenv("REDIS_DB", 0)),
-    "PASSWORD": os.getenv("REDIS_PASSWORD", "123456"),
-    "DECODE_RESPONSES": True
-}
-
-# 邮件配置
-EMAIL_CONFIG = {
-    "SMTP_SERVER": os.getenv("SMTP_SERVER", "smtp.qq.com"),
-    "SMTP_PORT": int(os.getenv("SMTP_PORT", 587)),
-    "SENDER_EMAIL": os.getenv("SENDER_EMAIL","2983105040@qq.com"),
-    "SENDER_PASSWORD": os.getenv("SENDER_PASSWORD","hjbqijsuqgpzdeie"),
-    "RECIPIENT_EMAIL": os.getenv("RECIPIENT_EMAIL", "2983105040@qq.com")
-}
-
-# 应用配置
-CONFIG = {
-    "API_KEY": os.getenv("DEEPSEEK_API_KEY"),
-    "BASE_URL": "https://api.deepseek.com",
-    "HISTORY_DIR": os.path.expanduser("~/deepseek_chat_history"),
-    "MODEL_MAPPING": {
-        "V3": "deepseek-chat",
-        "R1": "deepseek-reasoner"
-    },
-    "VECTORSTORE_PATH": vectorstore_path,
-    "BLOG_FILES_PATH": blog_files_path,
-    "MODEL_DIR": model_dir,
-    "REDIS_CONFIG": REDIS_CONFIG,
-    "EMAIL_CONFIG": EMAIL_CONFIG
-}
-
-# 模板配置
-DELIMITER = "####"
-
-# 提示词模板
-QA_TEMPLATE = """基于以下文档内容，生成一个问题及其答案：\
-{doc}\
-\
-请严格使用以下格式：\
-QUESTION: [你的问题]\
-ANSWER: [对应的答案]"""
-
-RETRIEVAL_TEMPLATE = """\
-使用以下上下文回答问题。如果你不知道答案，就说不知道。如果对方说的话让你感到疑惑\
-\
-上下文:\
-{context}\
-\
-问题: {question}\
-答案:\
-"""
+"""配置文件模块 - 处理应用配置和常量设置"""
+
+import os
+import sys
+
+# 基础路径设置
+parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+lib_dir = os.path.join(parent_dir, 'lib')
+model_dir = os.path.join(parent_dir, 'model')
+blog_files_path = os.path.join(parent_dir, 'blog_files')
+vectorstore_path = os.path.join(lib_dir, 'faiss_index')
+semantic_cache_path = os.path.join(lib_dir, 'semantic_cache')
+
+# 添加lib目录到Python路径
+sys.path.append(lib_dir)
+
+# Redis配置
+REDIS_CONFIG = {
+    "HOST": os.getenv("REDIS_HOST", "localhost"),
+    "PORT": int(os.getenv("REDIS_PORT", 6380)),
+    "DB": int(os.getenv("REDIS_DB", 0)),
+    "PASSWORD": os.getenv("REDIS_PASSWORD", "123456"),
+    "DECODE_RESPONSES": True
+}
+
+# 邮件配置
+EMAIL_CONFIG = {
+    "SMTP_SERVER": os.getenv("SMTP_SERVER", "smtp.qq.com"),
+    "SMTP_PORT": int(os.getenv("SMTP_PORT", 587)),
+    "SENDER_EMAIL": os.getenv("SENDER_EMAIL","2983105040@qq.com"),
+    "SENDER_PASSWORD": os.getenv("SENDER_PASSWORD","hjbqijsuqgpzdeie"),
+    "RECIPIENT_EMAIL": os.getenv("RECIPIENT_EMAIL", "2983105040@qq.com")
+}
+
+# 应用配置
+CONFIG = {
+    "API_KEY": os.getenv("DEEPSEEK_API_KEY"),
+    "BASE_URL": "https://api.deepseek.com",
+    "HISTORY_DIR": os.path.expanduser("~/deepseek_chat_history"),
+    "MODEL_MAPPING": {
+        "V3": "deepseek-chat",
+        "R1": "deepseek-reasoner"
+    },
+    "VECTORSTORE_PATH": vectorstore_path,
+    "BLOG_FILES_PATH": blog_files_path,
+    "MODEL_DIR": model_dir,
+    "REDIS_CONFIG": REDIS_CONFIG,
+    "EMAIL_CONFIG": EMAIL_CONFIG,
+    # 异步问答配置：CPU密集步骤（意图识别、初始化）使用的线程池大小，以及同时进行的LLM调用上限
+    "ASK_MAX_WORKERS": int(os.getenv("ASK_MAX_WORKERS", 8)),
+    "ASK_MAX_CONCURRENCY": int(os.getenv("ASK_MAX_CONCURRENCY", 64)),
+    # 回答缓存（Redis精确匹配）
+    "ANSWER_CACHE_ENABLED": os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true",
+    "ANSWER_CACHE_TTL": int(os.getenv("ANSWER_CACHE_TTL", 24 * 3600)),
+    "ANSWER_CACHE_PREFIX": os.getenv("ANSWER_CACHE_PREFIX", "blogger_assistant"),
+    "ANSWER_CACHE_RETRY_INTERVAL": int(os.getenv("ANSWER_CACHE_RETRY_INTERVAL", 60)),
+    # 语义回答缓存（相似问题复用回答）
+    "SEMANTIC_CACHE_ENABLED": os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true",
+    "SEMANTIC_CACHE_PATH": semantic_cache_path,
+    "SEMANTIC_CACHE_THRESHOLD": float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.92)),
+    "SEMANTIC_CACHE_MAX_SIZE": int(os.getenv("SEMANTIC_CACHE_MAX_SIZE", 2000)),
+    "SEMANTIC_CACHE_SAVE_EVERY": int(os.getenv("SEMANTIC_CACHE_SAVE_EVERY", 20)),
+    # 索引构建：嵌入批大小、嵌入进程数（1表示在当前进程内计算）、每个进程的torch线程数
+    "EMBED_BATCH_SIZE": int(os.getenv("EMBED_BATCH_SIZE", 64)),
+    "EMBED_WORKERS": int(os.getenv("EMBED_WORKERS", 1)),
+    "EMBED_THREADS_PER_WORKER": int(os.getenv("EMBED_THREADS_PER_WORKER", 2)),
+    # 嵌入推理后端：torch / onnx / onnx_int8（首次使用时导出到MODEL_DIR/onnx），以及int8量化的目标指令集
+    "EMBEDDING_BACKEND": os.getenv("EMBEDDING_BACKEND", "torch"),
+    "EMBEDDING_ONNX_QUANTIZATION": os.getenv("EMBEDDING_ONNX_QUANTIZATION", "avx2"),  # avx2 / avx512 / avx512_vnni / arm64
+    # 查询嵌入微批处理：并发问题在等待时间内凑成一批计算（等待时间为0时只合并上一批计算期间到达的问题）
+    "EMBED_MICRO_BATCH_ENABLED": os.getenv("EMBED_MICRO_BATCH_ENABLED", "true").lower() == "true",
+    "EMBED_MICRO_BATCH_MAX_SIZE": int(os.getenv("EMBED_MICRO_BATCH_MAX_SIZE", 32)),
+    "EMBED_MICRO_BATCH_MAX_WAIT_MS": float(os.getenv("EMBED_MICRO_BATCH_MAX_WAIT_MS", 3)),
+    # 查询缓存：问题向量、稠密检索结果和意图识别结果的进程内LRU（检索结果按索引代号失效），可选Redis共享
+    "QUERY_CACHE_ENABLED": os.getenv("QUERY_CACHE_ENABLED", "true").lower() == "true",
+    "QUERY_EMBEDDING_CACHE_SIZE": int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", 10000)),
+    "RETRIEVAL_CACHE_SIZE": int(os.getenv("RETRIEVAL_CACHE_SIZE", 10000)),
+    "INTENT_CACHE_SIZE": int(os.getenv("INTENT_CACHE_SIZE", 10000)),
+    "QUERY_CACHE_REDIS": os.getenv("QUERY_CACHE_REDIS", "false").lower() == "true",
+    "QUERY_CACHE_TTL": int(os.getenv("QUERY_CACHE_TTL", 24 * 3600)),
+    # 意图识别微批处理：并发请求的意图识别合并成一次变长序列前向计算
+    "INTENT_MICRO_BATCH_ENABLED": os.getenv("INTENT_MICRO_BATCH_ENABLED", "true").lower() == "true",
+    "INTENT_MICRO_BATCH_MAX_SIZE": int(os.getenv("INTENT_MICRO_BATCH_MAX_SIZE", 64)),
+    "INTENT_MICRO_BATCH_MAX_WAIT_MS": float(os.getenv("INTENT_MICRO_BATCH_MAX_WAIT_MS", 2)),
+    # 意图模型编译：TorchScript + 动态int8量化，保存在.pth旁边，加载时优先使用（与原模型预测一致率达标才导出）
+    "INTENT_COMPILED_MODEL": os.getenv("INTENT_COMPILED_MODEL", "true").lower() == "true",
+    "INTENT_COMPILED_MIN_AGREEMENT": float(os.getenv("INTENT_COMPILED_MIN_AGREEMENT", 0.98)),
+    # 意图识别推理后端：torch / numpy（用从.pth导出的权重在NumPy中计算，服务进程不导入PyTorch；
+    # 导出文件缺失或过期时自动在子进程中用PyTorch导出）
+    "INTENT_BACKEND": os.getenv("INTENT_BACKEND", "torch"),
+    "INTENT_NUMPY_AUTO_EXPORT": os.getenv("INTENT_NUMPY_AUTO_EXPORT", "true").lower() == "true",
+    # 没有意图模型时在后台训练（NumPy后端为导出），完成前使用关键词回退；也可以用lib/train_intent_model.py提前训练
+    "INTENT_BACKGROUND_TRAINING": os.getenv("INTENT_BACKGROUND_TRAINING", "true").lower() == "true",
+    # 意图关键词表（打分和槽位提取），启动时编译成一个Aho-Corasick自动机
+    "INTENT_KEYWORDS_PATH": os.getenv("INTENT_KEYWORDS_PATH", os.path.join(parent_dir, 'intent_keywords.json')),
+    # 向量索引类型：flat（精确检索）/ ivf_flat / ivf_pq / hnsw
+    "FAISS_INDEX_TYPE": os.getenv("FAISS_INDEX_TYPE", "flat"),
+    # 向量存储编码：float32（原始）/ fp16 / int8（标量量化）/ pq（乘积量化），加载时自动识别
+    "FAISS_VECTOR_CODEC": os.getenv("FAISS_VECTOR_CODEC", "float32"),
+    "FAISS_TRAIN_SAMPLE": int(os.getenv("FAISS_TRAIN_SAMPLE", 50000)),  # IVF训练样本数上限
+    "FAISS_IVF_NLIST": int(os.getenv("FAISS_IVF_NLIST", 0)),  # 0表示按语料规模自动选择
+    "FAISS_PQ_M": int(os.getenv("FAISS_PQ_M", 16)),
+    "FAISS_HNSW_M": int(os.getenv("FAISS_HNSW_M", 32)),
+    "FAISS_HNSW_EF_CONSTRUCTION": int(os.getenv("FAISS_HNSW_EF_CONSTRUCTION", 80)),
+    "FAISS_NPROBE": int(os.getenv("FAISS_NPROBE", 16)),  # 查询时访问的IVF聚类数
+    "FAISS_EF_SEARCH": int(os.getenv("FAISS_EF_SEARCH", 64)),  # 查询时HNSW候选列表大小
+    # 向量库加载方式：mmap（索引只读映射、文档按需从SQLite读取，多worker共享页缓存）或 memory（全部读入内存）
+    "VECTORSTORE_LOAD_MODE": os.getenv("VECTORSTORE_LOAD_MODE", "mmap"),
+    # 检索：hybrid（向量+BM25倒数排名融合）、dense（纯向量）、sparse（纯BM25）
+    "RETRIEVAL_MODE": os.getenv("RETRIEVAL_MODE", "hybrid"),
+    "RETRIEVAL_K": int(os.getenv("RETRIEVAL_K", 5)),
+    "RETRIEVAL_FETCH_K": int(os.getenv("RETRIEVAL_FETCH_K", 20)),  # 融合前每路取的候选数
+    "RRF_K": int(os.getenv("RRF_K", 60)),
+    "SPARSE_FAST_PATH_MAX_TERMS": int(os.getenv("SPARSE_FAST_PATH_MAX_TERMS", 3)),  # 关键词查询走纯BM25的最大词项数，0表示关闭
+    # 分块：把Markdown元素合并成按标题划分的片段，0表示保留逐元素的片段
+    "CHUNK_MAX_TOKENS": int(os.getenv("CHUNK_MAX_TOKENS", 384)),
+    "CHUNK_OVERLAP_TOKENS": int(os.getenv("CHUNK_OVERLAP_TOKENS", 48)),
+    # 文档解析进程数（1表示在当前进程中解析）
+    "INGEST_WORKERS": int(os.getenv("INGEST_WORKERS", max(1, (os.cpu_count() or 2) // 2))),
+    # 解析缓存：按文件内容哈希缓存解析结果，保存在向量库目录下
+    "PARSE_CACHE_ENABLED": os.getenv("PARSE_CACHE_ENABLED", "true").lower() == "true",
+    # 索引热更新：监听博客目录，变化后去抖再增量重建并原子替换
+    "INDEX_WATCH_ENABLED": os.getenv("INDEX_WATCH_ENABLED", "true").lower() == "true",
+    "INDEX_WATCH_DEBOUNCE": float(os.getenv("INDEX_WATCH_DEBOUNCE", 5)),  # 秒
+    "INDEX_WATCH_POLL_INTERVAL": float(os.getenv("INDEX_WATCH_POLL_INTERVAL", 10)),  # 无inotify时的扫描间隔（秒）
+    # 分类分区检索：按technology_type槽位把查询限定在对应分类的文章中
+    "CATEGORY_ROUTING_ENABLED": os.getenv("CATEGORY_ROUTING_ENABLED", "true").lower() == "true",
+    "FILTER_BRUTE_FORCE_MAX": int(os.getenv("FILTER_BRUTE_FORCE_MAX", 10000)),  # 分区不超过此大小时直接精确检索
+    # technology_type槽位 -> 博客分类（小写），未列出的槽位值直接作为分类名
+    "CATEGORY_ROUTES": {
+        "操作系统": ["操作系统", "linux", "openharmony"],
+        "编程语言": ["编程语言", "python", "java", "c++"],
+        "开发工具": ["开发工具", "git", "docker"],
+        "硬件": ["硬件", "嵌入式"],
+        "网络": ["网络", "计算机网络"]
+    },
+    # 索引分片配置：分片数大于1时每个分片在独立进程中检索
+    "INDEX_SHARDS": int(os.getenv("INDEX_SHARDS", 1)),  # 1表示不分片
+    "INDEX_SHARD_BY": os.getenv("INDEX_SHARD_BY", "file"),  # file: 按文件哈希, category: 按分类
+    "SHARD_WORKER_THREADS": int(os.getenv("SHARD_WORKER_THREADS", 1)),  # 每个分片进程的faiss线程数
+    "SHARD_WORKER_CONCURRENCY": int(os.getenv("SHARD_WORKER_CONCURRENCY", 4))  # 每个分片进程同时处理的检索数
+}
+
+# 模板配置
+DELIMITER = "####"
+
+# 提示词模板
+QA_TEMPLATE = """基于以下文档内容，生成一个问题及其答案：\
+{doc}\
+\
+请严格使用以下格式：\
+QUESTION: [你的问题]\
+ANSWER: [对应的答案]"""
+
+RETRIEVAL_TEMPLATE = """\
+使用以下上下文回答问题。如果你不知道答案，就说不知道。如果对方说的话让你感到疑惑\
+\
+上下文:\
+{context}\
+\
+问题: {question}\
+答案:\
+"""
@@ -0,0 +1,142 @@
+"""磁盘文档库模块 - 用SQLite存储文档片段，按需读取命中的top-k结果"""
+
+import os
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple, Union
+
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain.schema import Document
+
+DOCSTORE_FILE = "docstore.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_id TEXT PRIMARY KEY,
+    page_content TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ids (
+    position INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL
+);
+"""
+
+
+class _ReadOnlyConnection:
+    """打开时即建立的只读连接，所有线程共用（加锁串行访问）
+
+    连接在构造时打开并一直持有文件，之后文件被原子替换时，
+    已加载的向量库仍读取旧文件，与其内存映射的旧索引保持一致。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def fetchone(self, sql: str, params: Tuple = ()):
+        with self._lock:
+            return self._connection.execute(sql, params).fetchone()
+
+    def fetchall(self, sql: str, params: Tuple = ()):
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+
+class ReadOnlyDocstoreError(RuntimeError):
+    """修改只读文档库时抛出（mmap模式加载的向量库需以memory模式重新加载后再修改）"""
+
+
+class SqliteDocstore(Docstore, AddableMixin):
+    """只读的SQLite文档库
+
+    与InMemoryDocstore不同，加载时不会反序列化全部文档，
+    只有检索命中的文档才会从磁盘读取。
+    """
+
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, DOCSTORE_FILE)
+        self._connection = _ReadOnlyConnection(self.path)
+
+    def search(self, search: str) -> Union[str, Document]:
+        """按docstore id读取文档"""
+        row = self._connection.fetchone(
+            "SELECT page_content, metadata FROM docs WHERE doc_id = ?", (search,)
+        )
+        if row is None:
+            return f"ID {search} not found."
+        return Document(page_content=row[0], metadata=json.loads(row[1]))
+
+    def iter_documents(self) -> Iterator[Tuple[str, Document]]:
+        """遍历全部文档（用于重建清单或转换为内存文档库）"""
+        for doc_id, page_content, metadata in self._connection.fetchall(
+                "SELECT doc_id, page_content, metadata FROM docs"):
+            yield doc_id, Document(page_content=page_content, metadata=json.loads(metadata))
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        raise ReadOnlyDocstoreError("SqliteDocstore是只读的，请以memory模式加载后再修改")
+
+    def delete(self, ids: List) -> None:
+        raise ReadOnlyDocstoreError("SqliteDocstore是只读的，请以memory模式加载后再修改")
+
+
+class SqliteIdMap(Mapping):
+    """向量位置 -> docstore id 的只读映射，按需从SQLite查询"""
+
+    def __init__(self, directory: str):
+        self._connection = _ReadOnlyConnection(os.path.join(directory, DOCSTORE_FILE))
+        self._length = self._connection.fetchone("SELECT COUNT(*) FROM ids")[0]
+
+    def __getitem__(self, position: int) -> str:
+        row = self._connection.fetchone(
+            "SELECT doc_id FROM ids WHERE position = ?", (int(position),)
+        )
+        if row is None:
+            raise KeyError(position)
+        return row[0]
+
+    def __iter__(self) -> Iterator[int]:
+        return (row[0] for row in self._connection.fetchall("SELECT position FROM ids ORDER BY position"))
+
+    def __len__(self) -> int:
+        return self._length
+
+
+def save_docstore(directory: str, documents: Iterable[Tuple[str, Document]],
+                  index_to_docstore_id: Mapping[int, str]) -> None:
+    """
+    将文档和向量位置映射写入SQLite文件（先写临时文件再原子替换，已打开的读者不受影响）
+
+    Args:
+        directory: 向量库的版本目录
+        documents: (docstore id, 文档) 序列
+        index_to_docstore_id: 向量位置 -> docstore id
+    """
+    path = os.path.join(directory, DOCSTORE_FILE)
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    connection = sqlite3.connect(tmp_path)
+    try:
+        connection.executescript(_SCHEMA)
+        connection.executemany(
+            "INSERT INTO docs (doc_id, page_content, metadata) VALUES (?, ?, ?)",
+            ((doc_id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False, default=str))
+             for doc_id, doc in documents)
+        )
+        connection.executemany(
+            "INSERT INTO ids (position, doc_id) VALUES (?, ?)",
+            ((int(position), doc_id) for position, doc_id in index_to_docstore_id.items())
+        )
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(tmp_path, path)
+
+
+def docstore_exists(directory: str) -> bool:
+    """目录中是否已有SQLite文档库"""
+    return os.path.exists(os.path.join(directory, DOCSTORE_FILE))
@@ -1,65 +1,192 @@
-"""文档加载模块 - 处理Markdown文档的加载和预处理"""
-
-import os
-from typing import List, Dict
-import frontmatter
-from langchain_community.document_loaders import UnstructuredMarkdownLoader, DirectoryLoader
-from langchain.schema import Document
-
-from .config import CONFIG
-
-def load_documents() -> List[Document]:
-    """加载所有Markdown文档并处理元数据"""
-    try:
-        loader = DirectoryLoader(
-            path=CONFIG["BLOG_FILES_PATH"],
-            glob='**/*.md',
-            loader_cls=UnstructuredMarkdownLoader,
-            loader_kwargs={'encoding': 'utf-8', 'mode': 'elements'},
-            show_progress=True,
-            silent_errors=True,
-            use_multithreading=True
-        )
-        data = loader.load()
-        
-        # 获取文件分类信息
-        file_categories = _extract_categories(data)
-        
-        # 为每个文档片段添加元数据
-        for doc in data:
-            source_path = doc.metadata['source']
-            doc.metadata['last_modified'] = os.path.getmtime(source_path)
-            doc.metadata['file_categories'] = file_categories.get(source_path, '未分类')
-        
-        print(f"成功加载 {len(data)} 个文档片段")
-        print(f"解析了 {len(file_categories)} 个文件的categories信息")
-        return data
-        
-    except Exception as e:
-        print(f"文档加载失败: {str(e)}")
-        return []
-
-def _extract_categories(documents: List[Document]) -> Dict[str, str]:
-    """从文档中提取分类信息"""
-    file_categories = {}
-    
-    # 获取所有唯一的md文件路径
-    md_files = set()
-    for doc in documents:
-        source_path = doc.metadata['source']
-        if source_path.endswith('.md'):
-            md_files.add(source_path)
-    
-    # 解析每个md文件的前言部分获取categories
-    for md_file in md_files:
-        try:
-            with open(md_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            post = frontmatter.loads(content)
-            categories = post.metadata.get('categories', '未分类')
-            file_categories[md_file] = categories
-        except Exception as e:
-            print(f"解析文件 {md_file} 的前言失败: {str(e)}")
-            file_categories[md_file] = '未分类'
-    
-    return file_categories
+"""文档加载模块 - 处理Markdown文档的加载和预处理"""
+
+import os
+import hashlib
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+import frontmatter
+from langchain.schema import Document
+
+from .config import CONFIG
+from .chunker import chunk_documents
+from .parse_cache import ParseCache, Elements
+
+def list_markdown_files() -> List[str]:
+    """列出博客目录下的所有Markdown文件（路径格式与DirectoryLoader的source一致）"""
+    root = Path(CONFIG["BLOG_FILES_PATH"])
+    if not root.is_dir():
+        return []
+    return [str(path) for path in root.glob('**/*.md') if path.is_file()]
+
+# 随文件路径变化的元数据，不写入解析缓存
+_PATH_KEYS = ('source', 'filename', 'file_directory')
+
+def _parse_content(path: str, content: str) -> Tuple[Any, Elements]:
+    """解析单个Markdown文件的内容（前言和正文一起处理）
+
+    输出与UnstructuredMarkdownLoader(mode='elements')相同的元素，
+    元数据中不含路径相关字段，便于按内容哈希缓存。
+    """
+    from unstructured.partition.md import partition_md
+
+    try:
+        categories = frontmatter.loads(content).metadata.get('categories', '未分类')
+    except Exception as e:
+        print(f"解析文件 {path} 的前言失败: {str(e)}")
+        categories = '未分类'
+
+    elements = []
+    for element in partition_md(text=content, metadata_filename=path):
+        metadata = element.metadata.to_dict()
+        metadata['category'] = element.category
+        if element.id:
+            metadata['element_id'] = element.id
+        for key in _PATH_KEYS:
+            metadata.pop(key, None)
+        elements.append((str(element), metadata))
+    return categories, elements
+
+def _to_documents(path: str, categories: Any, elements: Elements, last_modified: float) -> List[Document]:
+    """补上路径、修改时间和分类元数据，并按CHUNK_MAX_TOKENS合并成片段"""
+    path_metadata = {
+        'source': path,
+        'filename': os.path.basename(path),
+        'file_directory': os.path.dirname(path),
+    }
+    documents = [
+        Document(page_content=text, metadata={
+            **path_metadata,
+            **metadata,
+            'last_modified': last_modified,
+            'file_categories': categories,
+        })
+        for text, metadata in elements
+    ]
+    if CONFIG["CHUNK_MAX_TOKENS"] > 0:
+        documents = chunk_documents(documents)
+    return documents
+
+def _read_file(path: str) -> Optional[Tuple[str, str, float]]:
+    """读取文件，返回 (内容, SHA-256, 修改时间)，失败返回None"""
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        return raw.decode('utf-8'), hashlib.sha256(raw).hexdigest(), os.path.getmtime(path)
+    except Exception as e:
+        print(f"加载文件 {path} 失败: {str(e)}")
+        return None
+
+def _parse_or_none(path: str, content: str) -> Optional[Tuple[Any, Elements]]:
+    """在工作进程中解析，失败时返回None"""
+    try:
+        return _parse_content(path, content)
+    except Exception as e:
+        print(f"解析文件 {path} 失败: {str(e)}")
+        return None
+
+def _parsed_files(paths: List[str], cache: Optional[ParseCache]) -> Iterator[Tuple[str, Optional[str], List[Document]]]:
+    """按输入顺序产出 (路径, 内容哈希, 片段)
+
+    每个文件只读取一次：先算哈希查解析缓存，命中则直接使用；
+    未命中的文件把已读出的内容交给解析进程（INGEST_WORKERS > 1 时为进程池，
+    unstructured是纯Python解析，线程受GIL限制）。同时在途的文件数有上限，内存占用与博客总量无关。
+    """
+    workers = CONFIG["INGEST_WORKERS"]
+    pool = None
+    if workers > 1 and len(paths) > 1:
+        # 与嵌入进程池一致，使用spawn避免继承父进程中的torch线程状态
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    max_in_flight = max(1, workers * 4)
+
+    def finish(item):
+        path, sha256, last_modified, parsed = item
+        if isinstance(parsed, Future):
+            parsed = parsed.result()
+            if parsed is not None and cache is not None:
+                cache.put(sha256, *parsed)
+        if parsed is None:
+            return path, None, []
+        return path, sha256, _to_documents(path, *parsed, last_modified)
+
+    try:
+        pending = deque()
+        for path in paths:
+            read = _read_file(path)
+            if read is None:
+                pending.append((path, None, 0, None))
+            else:
+                content, sha256, last_modified = read
+                parsed = cache.get(sha256) if cache is not None else None
+                if parsed is None:
+                    parsed = (pool.submit(_parse_or_none, path, content) if pool is not None
+                              else _parse_or_none(path, content))
+                    if pool is None and parsed is not None and cache is not None:
+                        cache.put(sha256, *parsed)
+                pending.append((path, sha256, last_modified, parsed))
+            while len(pending) >= max_in_flight or (pending and not isinstance(pending[0][3], Future)):
+                yield finish(pending.popleft())
+        while pending:
+            yield finish(pending.popleft())
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+def iter_documents(paths: Optional[List[str]] = None) -> Iterator[Document]:
+    """流式加载Markdown文档，逐个产出片段（可直接交给嵌入流程）
+
+    Args:
+        paths: 只加载指定的文件，为None时加载整个博客目录（并清理已删除文件的解析缓存）
+    """
+    full_scan = paths is None
+    if full_scan:
+        paths = sorted(list_markdown_files())
+    cache = ParseCache(CONFIG["VECTORSTORE_PATH"]) if CONFIG["PARSE_CACHE_ENABLED"] else None
+
+    file_count = 0
+    chunk_count = 0
+    live_hashes = set()
+    try:
+        for _, sha256, documents in _parsed_files(paths, cache):
+            if documents:
+                file_count += 1
+                live_hashes.add(sha256)
+            chunk_count += len(documents)
+            yield from documents
+        print(f"成功加载 {file_count}/{len(paths)} 个文件, 共 {chunk_count} 个片段")
+        if cache is not None:
+            print(f"解析缓存: 命中 {cache.hits}, 重新解析 {cache.misses}")
+            if full_scan:
+                removed = cache.collect_garbage(live_hashes)
+                if removed:
+                    print(f"清理 {removed} 条过期解析缓存")
+    finally:
+        if cache is not None:
+            cache.close()
+
+def evict_parsed(hashes: Iterable[str]) -> None:
+    """增量更新后删除已修改和已删除文件旧内容的解析缓存（全量扫描时由collect_garbage清理）"""
+    hashes = set(hashes)
+    if not hashes or not CONFIG["PARSE_CACHE_ENABLED"]:
+        return
+    cache = ParseCache(CONFIG["VECTORSTORE_PATH"])
+    try:
+        removed = cache.evict(hashes)
+    finally:
+        cache.close()
+    if removed:
+        print(f"清理 {removed} 条过期解析缓存")
+
+def load_documents(paths: Optional[List[str]] = None) -> List[Document]:
+    """加载Markdown文档并处理元数据
+
+    Args:
+        paths: 只加载指定的文件，为None时加载整个博客目录
+    """
+    try:
+        return list(iter_documents(paths))
+    except Exception as e:
+        print(f"文档加载失败: {str(e)}")
+        return []
@@ -0,0 +1,159 @@
+"""嵌入模型模块 - 创建文本嵌入模型实例"""
+
+import os
+import tempfile
+from typing import List
+
+import numpy as np
+
+from langchain_core.embeddings import Embeddings
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from .config import CONFIG
+from .micro_batcher import MicroBatcher
+from .query_cache import QueryCache, cache_key
+
+# torch: 原始PyTorch模型; onnx: 导出的ONNX模型(float32); onnx_int8: 动态int8量化的ONNX模型
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx_int8")
+
+# sentence-transformers查找ONNX模型的子目录
+_ONNX_DIR = "onnx"
+
+
+def onnx_file_name(backend: str, quantization: str = None) -> str:
+    """ONNX模型相对于模型目录的路径（与sentence-transformers的命名一致）"""
+    if backend == "onnx_int8":
+        return f"{_ONNX_DIR}/model_{_int8_suffix(quantization)}.onnx"
+    return f"{_ONNX_DIR}/model.onnx"
+
+
+def _int8_suffix(quantization: str = None) -> str:
+    return f"int8_{quantization or CONFIG['EMBEDDING_ONNX_QUANTIZATION']}"
+
+
+def export_onnx_model(model_dir: str = None, backend: str = None) -> str:
+    """
+    把模型目录中的模型导出为ONNX（已存在时直接返回）
+
+    导出的文件保存在模型目录的onnx/子目录中，与原模型使用同一分词器和池化配置，
+    生成的向量与现有索引兼容（int8量化有少量偏差，可用bench_embeddings.py评估）。
+
+    Args:
+        model_dir: 模型目录，默认为MODEL_DIR
+        backend: onnx 或 onnx_int8，默认为EMBEDDING_BACKEND
+
+    Returns:
+        str: ONNX模型相对于模型目录的路径
+    """
+    model_dir = model_dir or CONFIG["MODEL_DIR"]
+    backend = backend or CONFIG["EMBEDDING_BACKEND"]
+    file_name = onnx_file_name(backend)
+    if os.path.exists(os.path.join(model_dir, file_name)):
+        return file_name
+
+    float_file = onnx_file_name("onnx")
+    float_path = os.path.join(model_dir, float_file)
+    os.makedirs(os.path.dirname(float_path), exist_ok=True)
+    if not os.path.exists(float_path):
+        from optimum.exporters.onnx import main_export
+
+        print(f"正在导出ONNX嵌入模型: {model_dir}")
+        # 先导出到模型目录下的临时目录，再原子替换到目标路径：
+        # 导出中断不会留下不完整的模型文件，并发导出的进程各自写自己的临时目录
+        with tempfile.TemporaryDirectory(dir=model_dir) as export_dir:
+            main_export(model_dir, output=export_dir, task="feature-extraction",
+                        library_name="transformers", device="cpu")
+            os.replace(os.path.join(export_dir, "model.onnx"), float_path)
+
+    if backend == "onnx_int8":
+        from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+        quantization = CONFIG["EMBEDDING_ONNX_QUANTIZATION"]
+        print(f"正在量化ONNX嵌入模型(int8, {quantization})")
+        model = SentenceTransformer(model_dir, device="cpu", backend="onnx", model_kwargs={"file_name": float_file})
+        with tempfile.TemporaryDirectory(dir=model_dir) as export_dir:
+            export_dynamic_quantized_onnx_model(model, quantization, export_dir, file_suffix=_int8_suffix(quantization))
+            os.replace(os.path.join(export_dir, file_name), os.path.join(model_dir, file_name))
+    print(f"ONNX嵌入模型已保存: {os.path.join(model_dir, file_name)}")
+    return file_name
+
+
+def create_embeddings(model_dir: str = None, backend: str = None, threads: int = None) -> HuggingFaceEmbeddings:
+    """
+    创建嵌入模型（向量已归一化）
+
+    Args:
+        model_dir: 模型目录，默认为MODEL_DIR
+        backend: 推理后端，默认为EMBEDDING_BACKEND；ONNX后端首次使用时自动导出模型
+        threads: ONNX后端的计算线程数（torch后端由调用方设置torch.set_num_threads），None表示使用全部核心
+    """
+    model_dir = model_dir or CONFIG["MODEL_DIR"]
+    backend = backend or CONFIG["EMBEDDING_BACKEND"]
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"不支持的嵌入后端: {backend}，可选: {', '.join(EMBEDDING_BACKENDS)}")
+
+    model_kwargs = {"device": "cpu"}
+    if backend != "torch":
+        model_kwargs["backend"] = "onnx"
+        model_kwargs["model_kwargs"] = {"file_name": export_onnx_model(model_dir, backend)}
+        if threads:
+            import onnxruntime
+            session_options = onnxruntime.SessionOptions()
+            session_options.intra_op_num_threads = threads
+            model_kwargs["model_kwargs"]["session_options"] = session_options
+
+    return HuggingFaceEmbeddings(
+        model_name=model_dir,
+        model_kwargs=model_kwargs,
+        encode_kwargs={"normalize_embeddings": True}
+    )
+
+
+class BatchedEmbeddings(Embeddings):
+    """查询嵌入微批处理
+
+    并发请求各自的embed_query先进入微批处理器，凑成一批后用一次embed_documents计算
+    （create_embeddings没有为查询单独设置编码参数，两者结果相同）。
+    embed_documents（建索引）不经过微批处理，直接交给底层模型。
+    """
+
+    def __init__(self, embeddings: Embeddings, max_batch_size: int = None, max_wait_ms: float = None):
+        self.embeddings = embeddings
+        self.batcher = MicroBatcher(
+            embeddings.embed_documents,
+            max_batch_size or CONFIG["EMBED_MICRO_BATCH_MAX_SIZE"],
+            CONFIG["EMBED_MICRO_BATCH_MAX_WAIT_MS"] if max_wait_ms is None else max_wait_ms,
+            name="embed-micro-batcher",
+        )
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.batcher.submit(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+
+class CachedEmbeddings(Embeddings):
+    """问题向量缓存
+
+    同一个问题在一次请求中会被语义缓存和检索器多次嵌入，重复提问也很常见。
+    向量以float32字节串保存在QueryCache中（只取决于模型，不随索引更新失效），
+    键包含模型目录和推理后端，Redis中不同模型的向量不会混用。
+    """
+
+    def __init__(self, embeddings: Embeddings, model_tag: str, max_size: int = None):
+        self.embeddings = embeddings
+        self.model_tag = model_tag
+        self.cache = QueryCache("embedding", CONFIG["QUERY_EMBEDDING_CACHE_SIZE"] if max_size is None else max_size)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = cache_key(self.model_tag, text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return np.frombuffer(cached, dtype=np.float32).tolist()
+        vector = self.embeddings.embed_query(text)
+        self.cache.set(key, np.asarray(vector, dtype=np.float32).tobytes())
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
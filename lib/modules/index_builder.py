@@ -0,0 +1,210 @@
+"""索引构建模块 - 分批、多进程计算嵌入并批量写入FAISS"""
+
+import os
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+from langchain.schema import Document
+
+from .config import CONFIG
+from .ann_index import create_index, needs_training, describe_index
+
+# 子进程内的嵌入模型
+_worker_embeddings = None
+
+
+def _init_worker(model_dir: str, threads: int) -> None:
+    """子进程初始化：限制torch/onnxruntime线程数并加载嵌入模型"""
+    global _worker_embeddings
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+
+    from .embeddings import create_embeddings
+    _worker_embeddings = create_embeddings(model_dir, threads=threads)
+
+
+def _embed_in_worker(texts: List[str]) -> np.ndarray:
+    """在子进程中计算一批文本的嵌入"""
+    return np.asarray(_worker_embeddings.embed_documents(texts), dtype=np.float32)
+
+
+def _iter_batches(documents: Iterable[Document], ids: Optional[Iterable[str]],
+                  batch_size: int) -> Iterator[Tuple[List[Document], Optional[List[str]]]]:
+    """按批次切分文档（和对应的id），不会一次性展开整个迭代器"""
+    documents = iter(documents)
+    ids = iter(ids) if ids is not None else None
+    while True:
+        batch = list(islice(documents, batch_size))
+        if not batch:
+            return
+        batch_ids = list(islice(ids, len(batch))) if ids is not None else None
+        yield batch, batch_ids
+
+
+class _Progress:
+    """打印嵌入进度和吞吐量"""
+
+    def __init__(self, report_every: int):
+        self.report_every = report_every
+        self.start = time.perf_counter()
+        self.done = 0
+        self._last_report = 0
+
+    def update(self, count: int) -> None:
+        self.done += count
+        if self.done - self._last_report >= self.report_every:
+            self._last_report = self.done
+            print(f"已嵌入 {self.done} 个片段, {self.rate():.1f} chunks/s")
+
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self.start
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def finish(self) -> None:
+        elapsed = time.perf_counter() - self.start
+        print(f"嵌入完成: {self.done} 个片段, 耗时 {elapsed:.1f}s, {self.rate():.1f} chunks/s")
+
+
+def _embedded_batches(documents: Iterable[Document], ids: Optional[Iterable[str]],
+                      embeddings: Embeddings) -> Iterator[Tuple[List[Document], Optional[List[str]], np.ndarray]]:
+    """按输入顺序产出 (文档批, id批, 向量矩阵)
+
+    EMBED_WORKERS > 1 时分发到进程池，同时在途的批次数有上限，
+    因此内存占用只与批大小相关，与语料总量无关。
+    """
+    batch_size = CONFIG["EMBED_BATCH_SIZE"]
+    workers = CONFIG["EMBED_WORKERS"]
+    batches = _iter_batches(documents, ids, batch_size)
+
+    if workers <= 1:
+        for batch, batch_ids in batches:
+            vectors = np.asarray(embeddings.embed_documents([doc.page_content for doc in batch]),
+                                 dtype=np.float32)
+            yield batch, batch_ids, vectors
+        return
+
+    if CONFIG["EMBEDDING_BACKEND"] != "torch":
+        # ONNX模型在父进程中导出一次，工作进程直接加载，不会各自并发导出
+        from .embeddings import export_onnx_model
+        export_onnx_model(CONFIG["MODEL_DIR"])
+
+    # torch在fork后的子进程中可能死锁，使用spawn启动工作进程
+    context = multiprocessing.get_context("spawn")
+    max_in_flight = workers * 2
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(CONFIG["MODEL_DIR"], CONFIG["EMBED_THREADS_PER_WORKER"])
+    ) as pool:
+        pending = deque()
+        for batch, batch_ids in batches:
+            pending.append((batch, batch_ids,
+                            pool.submit(_embed_in_worker, [doc.page_content for doc in batch])))
+            if len(pending) >= max_in_flight:
+                done_batch, done_ids, future = pending.popleft()
+                yield done_batch, done_ids, future.result()
+        while pending:
+            done_batch, done_ids, future = pending.popleft()
+            yield done_batch, done_ids, future.result()
+
+
+def _create_empty_vectorstore(embeddings: Embeddings, dimension: int,
+                              training_vectors: Optional[np.ndarray] = None) -> FAISS:
+    """创建空的FAISS向量库，索引类型由FAISS_INDEX_TYPE决定（默认与FAISS.from_documents一致的L2扁平索引）"""
+    return FAISS(
+        embedding_function=embeddings,
+        index=create_index(dimension, training_vectors),
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+    )
+
+
+def _with_trained_index(batches, embeddings: Embeddings):
+    """需要训练的索引类型：先缓存前FAISS_TRAIN_SAMPLE个向量用于训练，再照常产出批次
+
+    Returns:
+        (向量库或None, 批次迭代器)
+    """
+    buffered = []
+    sample_count = 0
+    for item in batches:
+        buffered.append(item)
+        sample_count += len(item[0])
+        if sample_count >= CONFIG["FAISS_TRAIN_SAMPLE"]:
+            break
+    if not buffered:
+        return None, iter(())
+
+    training_vectors = np.vstack([vectors for _, _, vectors in buffered])[:CONFIG["FAISS_TRAIN_SAMPLE"]]
+    vectorstore = _create_empty_vectorstore(embeddings, training_vectors.shape[1], training_vectors)
+    del training_vectors
+
+    def replay():
+        yield from buffered
+        yield from batches
+    return vectorstore, replay()
+
+
+def add_documents_batched(vectorstore: Optional[FAISS], documents: Iterable[Document],
+                          embeddings: Embeddings, ids: Optional[Iterable[str]] = None) -> Optional[FAISS]:
+    """
+    分批计算嵌入并批量写入向量库
+
+    Args:
+        vectorstore: 目标向量库，为None时用第一批向量的维度新建
+        documents: 文档（可以是生成器）
+        embeddings: 嵌入模型（单进程模式下使用）
+        ids: 与文档一一对应的docstore id，为None时自动生成
+
+    Returns:
+        Optional[FAISS]: 写入后的向量库；没有任何文档且vectorstore为None时返回None
+    """
+    progress = _Progress(report_every=CONFIG["EMBED_BATCH_SIZE"] * 10)
+    batches = _embedded_batches(documents, ids, embeddings)
+    if vectorstore is None and needs_training():
+        vectorstore, batches = _with_trained_index(batches, embeddings)
+
+    for batch, batch_ids, vectors in batches:
+        if vectorstore is None:
+            vectorstore = _create_empty_vectorstore(embeddings, vectors.shape[1])
+        vectorstore.add_embeddings(
+            text_embeddings=list(zip((doc.page_content for doc in batch), vectors)),
+            metadatas=[doc.metadata for doc in batch],
+            ids=batch_ids,
+        )
+        progress.update(len(batch))
+
+    if progress.done:
+        progress.finish()
+        print(f"索引: {describe_index(vectorstore.index)}")
+    return vectorstore
+
+
+def build_vectorstore(documents: Iterable[Document], embeddings: Embeddings) -> FAISS:
+    """
+    从文档构建新的向量库
+
+    Args:
+        documents: 文档（可以是生成器）
+        embeddings: 嵌入模型
+
+    Returns:
+        FAISS: 新建的向量库
+    """
+    vectorstore = add_documents_batched(None, documents, embeddings)
+    if vectorstore is None:
+        # 没有文档时也返回一个可用的空索引
+        dimension = len(embeddings.embed_query("维度"))
+        vectorstore = _create_empty_vectorstore(embeddings, dimension)
+    return vectorstore
@@ -0,0 +1,135 @@
+"""索引监听模块 - 监听博客目录变化，去抖后触发增量重建"""
+
+import os
+import time
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from .config import CONFIG
+from .document_loader import list_markdown_files
+
+
+class IndexWatcher:
+    """监听博客目录中Markdown文件的变化
+
+    优先使用watchdog（Linux上为inotify），未安装时退化为定时扫描文件的大小和修改时间。
+    事件先去抖：最后一次变化后安静INDEX_WATCH_DEBOUNCE秒才调用回调，
+    批量保存多篇文章时只重建一次。回调在单独的线程中串行执行。
+    给出outdated时还每INDEX_WATCH_POLL_INTERVAL秒检查一次索引是否已被其他进程更新，
+    是则同样触发回调（多worker部署时只有一个worker重建，其余的靠它加载新版本）。
+    """
+
+    def __init__(self, on_change: Callable[[], None], path: Optional[str] = None,
+                 outdated: Optional[Callable[[], bool]] = None):
+        self.on_change = on_change
+        self.path = path or CONFIG["BLOG_FILES_PATH"]
+        self.outdated = outdated
+        self.debounce = CONFIG["INDEX_WATCH_DEBOUNCE"]
+        self.poll_interval = CONFIG["INDEX_WATCH_POLL_INTERVAL"]
+        self._changed = threading.Event()
+        self._stopped = threading.Event()
+        self._last_event = 0.0
+        self._observer = None
+        self._threads = []
+
+    def start(self) -> None:
+        """启动监听（目录不存在时只检查索引版本，没有outdated时不启动）"""
+        if os.path.isdir(self.path):
+            if not self._start_watchdog():
+                self._spawn(self._poll_loop, "index-watch-poll")
+                print(f"索引监听已启动（轮询，每 {self.poll_interval}s）: {self.path}")
+        else:
+            print(f"博客目录不存在，不监听文件变化: {self.path}")
+            if self.outdated is None:
+                return
+        if self.outdated is not None:
+            self._spawn(self._outdated_loop, "index-watch-generation")
+        self._spawn(self._debounce_loop, "index-watch-rebuild")
+
+    def stop(self) -> None:
+        """停止监听"""
+        self._stopped.set()
+        self._changed.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        for thread in self._threads:
+            thread.join()
+
+    def notify(self) -> None:
+        """记录一次文件变化"""
+        self._last_event = time.monotonic()
+        self._changed.set()
+
+    def _spawn(self, target, name: str) -> None:
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _start_watchdog(self) -> bool:
+        """使用watchdog监听，未安装时返回False"""
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return False
+
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                paths = [event.src_path, getattr(event, "dest_path", "")]
+                if not event.is_directory and any(str(path).endswith(".md") for path in paths):
+                    watcher.notify()
+
+        self._observer = Observer()
+        self._observer.schedule(_Handler(), self.path, recursive=True)
+        self._observer.daemon = True
+        self._observer.start()
+        print(f"索引监听已启动（{type(self._observer).__name__}）: {self.path}")
+        return True
+
+    def _snapshot(self) -> Dict[str, Tuple[int, float]]:
+        snapshot = {}
+        for path in list_markdown_files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_size, stat.st_mtime)
+        return snapshot
+
+    def _poll_loop(self) -> None:
+        previous = self._snapshot()
+        while not self._stopped.wait(self.poll_interval):
+            current = self._snapshot()
+            if current != previous:
+                previous = current
+                self.notify()
+
+    def _outdated_loop(self) -> None:
+        while not self._stopped.wait(self.poll_interval):
+            try:
+                if self.outdated():
+                    self.notify()
+            except Exception as e:
+                print(f"检查索引版本失败: {e}")
+
+    def _debounce_loop(self) -> None:
+        while not self._stopped.is_set():
+            self._changed.wait()
+            if self._stopped.is_set():
+                return
+            # 先清除标记：重建期间的新变化会再次触发，不会丢失
+            self._changed.clear()
+            # 等到最后一次变化后安静debounce秒
+            while True:
+                remaining = self._last_event + self.debounce - time.monotonic()
+                if remaining <= 0 or self._stopped.wait(remaining):
+                    break
+            if self._stopped.is_set():
+                return
+            try:
+                self.on_change()
+            except Exception as e:
+                print(f"索引热更新失败: {e}")
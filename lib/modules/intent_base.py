@@ -0,0 +1,376 @@
+"""意图识别基础模块 - 不依赖PyTorch的词汇表、关键词增强、槽位提取和关键词回退，各推理后端共用"""
+
+import os
+import json
+import uuid
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+from .config import CONFIG
+from .tokenizer import tokenize
+from .query_cache import QueryCache
+from .micro_batcher import MicroBatcher
+from .keyword_matcher import KeywordHits, KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+# 意图打分关键词在匹配器中的表名，其余的表名即槽位名
+INTENT_TABLE = "intent"
+
+_keyword_tables: Dict[str, Tuple[KeywordMatcher, Dict[str, List[str]]]] = {}
+_keyword_tables_lock = threading.Lock()
+
+
+def load_keyword_tables(path: str) -> Tuple[KeywordMatcher, Dict[str, List[str]]]:
+    """
+    加载关键词数据文件并编译匹配器（按路径缓存）
+    
+    Returns:
+        (匹配器, 意图 -> 槽位名列表)
+    """
+    with _keyword_tables_lock:
+        if path not in _keyword_tables:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            tables = {INTENT_TABLE: data["intent_keywords"], **data["slots"]}
+            matcher = KeywordMatcher(tables)
+            _keyword_tables[path] = (matcher, data["intent_slots"])
+            logger.info(f"关键词表加载完成: {len(matcher)} 个关键词, {len(tables)} 个表")
+        return _keyword_tables[path]
+
+
+def unique_tmp_path(path: Path) -> Path:
+    """path旁边的临时文件名，每次调用都不同（并发的进程和线程不会写同一个临时文件）"""
+    return path.with_name(f'{path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp')
+
+
+class SimpleVocabulary:
+    """简化词汇表处理"""
+    
+    def __init__(self):
+        self.word2idx = {}
+        self.idx2word = {}
+        self.word_counts = Counter()
+        self.pad_token = '<PAD>'
+        self.unk_token = '<UNK>'
+        self._build_basic_vocab()
+    
+    def _build_basic_vocab(self):
+        """构建基础词汇表"""
+        basic_tokens = [self.pad_token, self.unk_token]
+        for idx, token in enumerate(basic_tokens):
+            self.word2idx[token] = idx
+            self.idx2word[idx] = token
+    
+    def build_vocab(self, texts: List[str], min_freq: int = 1):  # 降低最小词频
+        """从文本构建词汇表"""
+        # 重置词汇表
+        self.word2idx = {self.pad_token: 0, self.unk_token: 1}
+        self.idx2word = {0: self.pad_token, 1: self.unk_token}
+        self.word_counts = Counter()
+        
+        # 统计词频
+        for text in texts:
+            tokens = self.tokenize(text)
+            self.word_counts.update(tokens)
+        
+        # 添加满足最小词频的词
+        idx = 2
+        for word, count in self.word_counts.items():
+            if count >= min_freq:
+                self.word2idx[word] = idx
+                self.idx2word[idx] = word
+                idx += 1
+        
+        logger.info(f"词汇表构建完成，词汇量: {len(self.word2idx)}")
+    
+    def tokenize(self, text: str) -> List[str]:
+        """中文分词（与稀疏检索共用同一分词器）"""
+        return tokenize(text)
+    
+    def encode(self, text: str, max_length: int = 50) -> List[int]:
+        """将文本转换为不填充的数字序列（超长截断，空文本为一个填充符）"""
+        unk = self.word2idx[self.unk_token]
+        numericalized = [self.word2idx.get(token, unk) for token in self.tokenize(text)[:max_length]]
+        return numericalized or [self.word2idx[self.pad_token]]
+    
+    def numericalize(self, text: str, max_length: int = 50) -> List[int]:
+        """将文本转换为数字序列"""
+        tokens = self.tokenize(text)
+        numericalized = []
+        
+        for token in tokens:
+            if token in self.word2idx:
+                numericalized.append(self.word2idx[token])
+            else:
+                numericalized.append(self.word2idx[self.unk_token])
+        
+        # 填充或截断
+        if len(numericalized) < max_length:
+            numericalized.extend([self.word2idx[self.pad_token]] * (max_length - len(numericalized)))
+        else:
+            numericalized = numericalized[:max_length]
+        
+        return numericalized
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """推理所需的词汇表数据（只含基本类型，可写入JSON或checkpoint）"""
+        return {'pad_token': self.pad_token, 'unk_token': self.unk_token, 'word2idx': self.word2idx}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SimpleVocabulary":
+        """从to_dict的结果恢复词汇表"""
+        vocab = cls()
+        vocab.pad_token = data['pad_token']
+        vocab.unk_token = data['unk_token']
+        vocab.word2idx = dict(data['word2idx'])
+        vocab.idx2word = {idx: word for word, idx in vocab.word2idx.items()}
+        return vocab
+    
+    def __len__(self):
+        return len(self.word2idx)
+
+
+
+class BaseIntentRecognizer(ABC):
+    """意图识别器基类
+    
+    子类负责加载模型并实现 _predict（一次前向计算整批输入）；
+    缓存、微批处理、关键词增强、槽位提取和关键词回退在这里实现。
+    """
+    
+    def __init__(self):
+        self.model = None
+        self.vocab: Optional[SimpleVocabulary] = None
+        self.intent_labels: Optional[List[str]] = None
+        self.idx2label: Dict[int, str] = {}
+        
+        self.model_dir = Path(CONFIG["MODEL_DIR"])
+        self.model_path = self.model_dir / "simple_intent_classifier.pth"
+        
+        self.max_length = 30      # 减小序列长度
+        # 新训练的模型使用变长序列；旧模型按训练时的方式填充到max_length
+        self.packed_sequences = True
+        
+        # 识别结果缓存：同一请求中is_contact_intent、get_contact_response等会重复识别同一问题
+        self._cache = QueryCache("intent", CONFIG["INTENT_CACHE_SIZE"] if CONFIG["QUERY_CACHE_ENABLED"] else 0,
+                                 use_redis=False)
+        # 每次换模型加一，换模型前开始的识别结果不写入缓存
+        self._model_version = 0
+        # 后台训练或导出模型的线程
+        self._training: Optional[threading.Thread] = None
+        
+        # 并发请求的单条识别合并成一批前向计算
+        self._batcher: Optional[MicroBatcher] = None
+        if CONFIG["INTENT_MICRO_BATCH_ENABLED"]:
+            self._batcher = MicroBatcher(self._recognize_batch, CONFIG["INTENT_MICRO_BATCH_MAX_SIZE"],
+                                         CONFIG["INTENT_MICRO_BATCH_MAX_WAIT_MS"], name="intent-micro-batcher")
+        
+        # 意图关键词映射
+        self._setup_intent_keywords()
+    
+    def _setup_intent_keywords(self):
+        """加载关键词表（INTENT_KEYWORDS_PATH），编译成一个匹配器，所有识别器共用"""
+        self.keyword_matcher, self.intent_slots = load_keyword_tables(CONFIG["INTENT_KEYWORDS_PATH"])
+        
+        # 意图优先级映射
+        self.intent_priority = {
+            "联系博主": 3,  # 最高优先级
+            "博客内容查询": 2,
+            "技术问答": 1   # 默认优先级
+        }
+    
+    def _model_digest(self) -> str:
+        """.pth文件的SHA-256，用于判断编译模型是否由当前模型导出"""
+        with open(self.model_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    
+    def recognize_intent(self, user_input: str) -> Dict[str, Any]:
+        """识别用户输入的意图（结果按输入文本缓存，每次返回新的字典）
+        
+        启用微批处理时，并发请求的识别合并成一次前向计算。
+        """
+        version = self._model_version
+        cached = self._cache.get(user_input)
+        if cached is not None:
+            return json.loads(cached)
+        if self._batcher is not None:
+            result = self._batcher.submit(user_input)
+        else:
+            result = self._recognize_batch([user_input])[0]
+        self._cache_result(user_input, result, version)
+        return result
+    
+    def recognize_intents(self, user_inputs: List[str]) -> List[Dict[str, Any]]:
+        """批量识别意图，未缓存的输入一起做一次前向计算，结果与输入顺序一致"""
+        version = self._model_version
+        results: List[Optional[Dict[str, Any]]] = [None] * len(user_inputs)
+        pending = []
+        for i, user_input in enumerate(user_inputs):
+            cached = self._cache.get(user_input)
+            if cached is not None:
+                results[i] = json.loads(cached)
+            else:
+                pending.append(i)
+        
+        if pending:
+            recognized = self._recognize_batch([user_inputs[i] for i in pending])
+            for i, result in zip(pending, recognized):
+                self._cache_result(user_inputs[i], result, version)
+                results[i] = result
+        return results
+    
+    def _cache_result(self, user_input: str, result: Dict[str, Any], version: int) -> None:
+        if version != self._model_version:
+            # 识别期间换了模型，结果可能来自旧模型或关键词回退
+            return
+        self._cache.set(user_input, json.dumps(result, ensure_ascii=False, default=float).encode("utf-8"))
+    
+    def _publish_model(self, model) -> None:
+        """换上新模型（词汇表和标签须已就绪），并清空按之前的模型或关键词回退缓存的结果"""
+        self.model = model
+        self._model_version += 1
+        self._cache.clear()
+    
+    def _run_in_background(self, target) -> None:
+        """在后台线程中训练或导出模型，完成前的请求由关键词回退识别"""
+        self._training = threading.Thread(target=target, name="intent-model-trainer", daemon=True)
+        self._training.start()
+    
+    def wait_for_model(self, timeout: Optional[float] = None) -> bool:
+        """等待后台训练结束，返回模型是否可用"""
+        if self._training is not None:
+            self._training.join(timeout)
+        return self.model is not None
+    
+    def _recognize_batch(self, user_inputs: List[str]) -> List[Dict[str, Any]]:
+        """识别一批输入（不经过缓存）"""
+        # 如果模型不可用，直接使用回退方法
+        if self.model is None or self.vocab is None:
+            return [self._fallback_intent_recognition(user_input) for user_input in user_inputs]
+        
+        try:
+            predictions = self._predict(user_inputs)
+        except Exception as e:
+            logger.error(f"意图识别失败: {e}")
+            return [self._fallback_intent_recognition(user_input) for user_input in user_inputs]
+        
+        # 使用关键词增强置信度
+        return [self._enhance_with_keywords(user_input, intent, confidence)
+                for user_input, (intent, confidence) in zip(user_inputs, predictions)]
+    
+    @abstractmethod
+    def _predict(self, user_inputs: List[str], model=None) -> List[Tuple[str, float]]:
+        """一次前向计算整批输入，返回每条输入的 (意图, 置信度)，由各推理后端实现"""
+        raise NotImplementedError
+    
+    def _enhance_with_keywords(self, user_input: str, intent: str, confidence: float) -> Dict[str, Any]:
+        """使用关键词增强识别结果（打分、槽位提取和回退共用一次扫描的结果）"""
+        hits = self.keyword_matcher.scan(user_input)
+        keyword_boost = self._calculate_keyword_boost(hits, intent)
+        enhanced_confidence = min(confidence + keyword_boost, 0.95)
+        
+        # 提取槽位信息
+        slots = self._extract_slots(hits, intent)
+        
+        # 如果关键词匹配很强，可以覆盖模型结果
+        if keyword_boost > 0.3 and enhanced_confidence > 0.7:
+            model_used = "enhanced_neural_network"
+        elif confidence < 0.6:
+            # 置信度太低，使用回退
+            return self._fallback_intent_recognition(user_input, hits)
+        else:
+            model_used = "neural_network"
+        
+        return {
+            "intent": intent,
+            "slots": slots,
+            "confidence": enhanced_confidence,
+            "model_used": model_used
+        }
+    
+    def _calculate_keyword_boost(self, hits: KeywordHits, intent: str) -> float:
+        """计算关键词增强分数"""
+        boost = 0.0
+        
+        if intent == "联系博主":
+            boost = len(hits.keywords(INTENT_TABLE, "联系博主")) * 0.1
+        
+        elif intent == "技术问答":
+            # 技术关键词、问题类型关键词各有命中时分别增强
+            for table in self.intent_slots.get("技术问答", []):
+                if hits.categories(table):
+                    boost += 0.1
+        
+        return min(boost, 0.3)  # 最大增强0.3
+    
+    def _extract_slots(self, hits: KeywordHits, intent: str) -> Dict[str, str]:
+        """提取槽位信息：意图对应的每个槽位取关键词表中第一个命中的类别"""
+        slots = {}
+        for slot in self.intent_slots.get(intent, []):
+            category = hits.first_category(slot)
+            if category is not None:
+                slots[slot] = category
+        return slots
+    
+    def _fallback_intent_recognition(self, user_input: str, hits: Optional[KeywordHits] = None) -> Dict[str, Any]:
+        """回退的意图识别方法（基于关键词）"""
+        if hits is None:
+            hits = self.keyword_matcher.scan(user_input)
+        
+        # 计算各意图的匹配分数：命中的不同关键词数
+        intent_scores = {intent: len(hits.keywords(INTENT_TABLE, intent))
+                         for intent in self.keyword_matcher.categories(INTENT_TABLE)}
+        
+        # 技术问答（关键词表中为空，保留打分顺序）：技术类型和问题类型中命中的类别数
+        intent_scores["技术问答"] = sum(len(hits.categories(table)) for table in self.intent_slots.get("技术问答", []))
+        
+        # 选择得分最高的意图
+        best_intent = max(intent_scores, key=intent_scores.get)
+        best_score = intent_scores[best_intent]
+        
+        # 计算置信度
+        if best_score == 0:
+            confidence = 0.7  # 默认置信度
+            best_intent = "技术问答"
+        else:
+            confidence = min(0.7 + best_score * 0.1, 0.9)
+        
+        # 提取槽位
+        slots = self._extract_slots(hits, best_intent)
+        
+        return {
+            "intent": best_intent,
+            "slots": slots,
+            "confidence": confidence,
+            "model_used": "keyword_fallback"
+        }
+    
+    def is_contact_intent(self, user_input: str) -> bool:
+        """判断是否为联系博主意图"""
+        intent_result = self.recognize_intent(user_input)
+        return intent_result.get("intent") == "联系博主"
+    
+    def get_contact_response(self, user_input: str) -> str:
+        """生成联系博主的响应"""
+        intent_result = self.recognize_intent(user_input)
+        
+        if intent_result.get("intent") == "联系博主":
+            slots = intent_result.get("slots", {})
+            contact_method = slots.get("contact_method", "一般联系")
+            
+            response = f"""我识别到您想要{contact_method}。以下是联系博主的方式：
+
+📧 邮箱：jasonh0401@163.com
+📱 QQ：2983105040
+
+请选择适合您的方式联系，博主会尽快回复您！"""
+            
+            return response
+        else:
+            return "当前未识别到联系博主的意图。"
+
@@ -0,0 +1,237 @@
+"""NumPy意图识别后端 - 用导出的权重在NumPy中计算BiLSTM分类器，服务进程无需导入PyTorch"""
+
+import os
+import json
+import logging
+import multiprocessing
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .config import CONFIG
+from .intent_base import BaseIntentRecognizer, SimpleVocabulary, unique_tmp_path
+
+logger = logging.getLogger(__name__)
+
+# 与.pth放在同一目录；JSON最后写入，其中的model_sha256对应导出时的.pth
+WEIGHTS_FILE = "simple_intent_classifier.npz"
+METADATA_FILE = "simple_intent_classifier.json"
+
+
+def save_numpy_model(model_dir: Path, weights: Dict[str, np.ndarray], metadata: Dict[str, Any]) -> None:
+    """
+    保存NumPy后端的模型文件（先写各自的临时文件再替换）
+
+    Args:
+        model_dir: 模型目录
+        weights: 参数名（与PyTorch的state_dict一致）到数组的映射
+        metadata: 模型结构、词汇表和标签
+    """
+    model_dir = Path(model_dir)
+    tmp_path = unique_tmp_path(model_dir / WEIGHTS_FILE)
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **{name: value.astype(np.float32) for name, value in weights.items()})
+    os.replace(tmp_path, model_dir / WEIGHTS_FILE)
+
+    tmp_path = unique_tmp_path(model_dir / METADATA_FILE)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False)
+    os.replace(tmp_path, model_dir / METADATA_FILE)
+
+
+def numpy_model_current(model_dir: Path, model_sha256: Optional[str]) -> bool:
+    """NumPy模型文件是否存在且由指定的.pth导出（model_sha256为None时只检查是否存在）"""
+    model_dir = Path(model_dir)
+    metadata_path = model_dir / METADATA_FILE
+    if not metadata_path.exists() or not (model_dir / WEIGHTS_FILE).exists():
+        return False
+    if model_sha256 is None:
+        return True
+    try:
+        with open(metadata_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("model_sha256") == model_sha256
+    except (OSError, ValueError):
+        return False
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    # 用tanh计算，避免exp溢出
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+class NumpyIntentClassifier:
+    """SimpleIntentClassifier 的NumPy实现（推理）
+
+    各条序列只计算真实长度内的词，与PyTorch打包变长序列的结果一致：
+    正向的最终状态取自最后一个真实词，反向从最后一个真实词开始。
+    """
+
+    def __init__(self, weights: Dict[str, np.ndarray], n_layers: int):
+        self.embedding = weights["embedding.weight"]
+        self.n_layers = n_layers
+        # 每层每个方向：(输入权重转置, 隐状态权重转置, 合并后的偏置)，门的顺序与PyTorch一致为 i, f, g, o
+        self.layers = []
+        for layer in range(n_layers):
+            directions = []
+            for suffix in ("", "_reverse"):
+                name = f"l{layer}{suffix}"
+                directions.append((
+                    np.ascontiguousarray(weights[f"lstm.weight_ih_{name}"].T),
+                    np.ascontiguousarray(weights[f"lstm.weight_hh_{name}"].T),
+                    weights[f"lstm.bias_ih_{name}"] + weights[f"lstm.bias_hh_{name}"]
+                ))
+            self.layers.append(directions)
+        self.fc_weight = np.ascontiguousarray(weights["fc.weight"].T)
+        self.fc_bias = weights["fc.bias"]
+
+    @staticmethod
+    def _run_direction(inputs: np.ndarray, mask: np.ndarray, w_ih: np.ndarray, w_hh: np.ndarray,
+                       bias: np.ndarray, reverse: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        计算一层LSTM的一个方向
+
+        Returns:
+            (每个位置的输出 [batch, seq_len, hidden]（填充位为0）, 最终隐状态 [batch, hidden])
+        """
+        batch_size, seq_len, _ = inputs.shape
+        hidden_dim = w_hh.shape[0]
+        # 输入部分对所有位置一次矩阵乘法算完
+        input_gates = inputs @ w_ih + bias
+        h = np.zeros((batch_size, hidden_dim), dtype=np.float32)
+        c = np.zeros((batch_size, hidden_dim), dtype=np.float32)
+        outputs = np.zeros((batch_size, seq_len, hidden_dim), dtype=np.float32)
+
+        steps = range(seq_len - 1, -1, -1) if reverse else range(seq_len)
+        for t in steps:
+            gates = input_gates[:, t] + h @ w_hh
+            i, f, g, o = np.split(gates, 4, axis=1)
+            c_next = _sigmoid(f) * c + _sigmoid(i) * np.tanh(g)
+            h_next = _sigmoid(o) * np.tanh(c_next)
+            # 超出真实长度的位置不更新状态
+            valid = mask[:, t:t + 1]
+            c = np.where(valid, c_next, c)
+            h = np.where(valid, h_next, h)
+            outputs[:, t] = h_next * valid
+        return outputs, h
+
+    def forward(self, sequences: List[List[int]], pad_idx: int = 0) -> np.ndarray:
+        """
+        Args:
+            sequences: 每条输入的词序号（不填充）
+            pad_idx: 填充符序号
+
+        Returns:
+            np.ndarray: [batch, 意图数] 的logits
+        """
+        lengths = np.array([len(sequence) for sequence in sequences])
+        tokens = np.full((len(sequences), int(lengths.max())), pad_idx, dtype=np.int64)
+        for row, sequence in enumerate(sequences):
+            tokens[row, :len(sequence)] = sequence
+        mask = np.arange(tokens.shape[1])[None, :] < lengths[:, None]
+
+        layer_input = self.embedding[tokens]
+        for directions in self.layers:
+            forward_out, forward_h = self._run_direction(layer_input, mask, *directions[0], reverse=False)
+            backward_out, backward_h = self._run_direction(layer_input, mask, *directions[1], reverse=True)
+            layer_input = np.concatenate((forward_out, backward_out), axis=2)
+
+        hidden = np.concatenate((forward_h, backward_h), axis=1)
+        return hidden @ self.fc_weight + self.fc_bias
+
+
+def _export_worker(model_dir: str) -> None:
+    """在子进程中加载（没有.pth时训练）PyTorch模型，加载过程中会导出NumPy模型文件"""
+    CONFIG["MODEL_DIR"] = model_dir
+    CONFIG["INTENT_MICRO_BATCH_ENABLED"] = False
+    from .intent_recognition import SimpleIntentRecognizer
+    SimpleIntentRecognizer(background_training=False)
+
+
+def export_in_subprocess(model_dir: Path) -> bool:
+    """用spawn子进程导出NumPy模型文件，PyTorch只在子进程中导入，返回子进程是否正常退出"""
+    process = multiprocessing.get_context("spawn").Process(target=_export_worker, args=(str(model_dir),),
+                                                           name="intent-numpy-export")
+    process.start()
+    process.join()
+    return process.exitcode == 0
+
+
+class NumpyIntentRecognizer(BaseIntentRecognizer):
+    """不依赖PyTorch的意图识别器：加载从.pth导出的权重，用NumPy做前向计算"""
+
+    def __init__(self, background_training: Optional[bool] = None):
+        """
+        Args:
+            background_training: 需要导出（或训练）模型时是否在后台进行，为None时使用INTENT_BACKGROUND_TRAINING
+        """
+        super().__init__()
+        self.background_training = (CONFIG["INTENT_BACKGROUND_TRAINING"] if background_training is None
+                                     else background_training)
+        self.weights_path = self.model_dir / WEIGHTS_FILE
+        self.metadata_path = self.model_dir / METADATA_FILE
+        self._load_or_export_model()
+
+    def _load_or_export_model(self):
+        """加载NumPy模型文件，缺失或与.pth不一致时先在子进程中导出"""
+        try:
+            self.model_dir.mkdir(parents=True, exist_ok=True)
+            # 只部署了NumPy模型文件（没有.pth）时直接使用
+            model_sha256 = self._model_digest() if self.model_path.exists() else None
+            if numpy_model_current(self.model_dir, model_sha256):
+                self._load_model()
+            elif not CONFIG["INTENT_NUMPY_AUTO_EXPORT"]:
+                logger.warning("NumPy意图模型不存在或已过期，将使用关键词回退模式")
+            elif self.background_training:
+                logger.info("NumPy意图模型不存在或已过期，在后台子进程中导出，完成前使用关键词回退")
+                self._run_in_background(self._export_model)
+            else:
+                self._export_model()
+        except Exception as e:
+            logger.error(f"加载NumPy意图模型失败: {e}")
+
+    def _export_model(self):
+        """在子进程中导出（没有.pth时先训练）后加载"""
+        logger.info("在子进程中导出NumPy意图模型...")
+        if not export_in_subprocess(self.model_dir) or not numpy_model_current(self.model_dir, None):
+            logger.error("导出NumPy意图模型失败，将使用关键词回退模式")
+            return
+        self._load_model()
+
+    def _load_model(self):
+        """加载NumPy模型文件，词汇表和标签就绪后再换上模型"""
+        try:
+            with open(self.metadata_path, "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+            with np.load(self.weights_path) as data:
+                weights = {name: data[name] for name in data.files}
+            model = NumpyIntentClassifier(weights, metadata["n_layers"])
+
+            self.vocab = SimpleVocabulary.from_dict(metadata)
+            self.intent_labels = metadata["intent_labels"]
+            self.idx2label = dict(enumerate(self.intent_labels))
+            self.max_length = metadata["max_length"]
+            self.packed_sequences = metadata["packed_sequences"]
+            self._publish_model(model)
+            logger.info("NumPy意图识别模型加载成功")
+
+        except Exception as e:
+            logger.error(f"加载NumPy意图模型失败: {e}")
+
+    def _predict(self, user_inputs: List[str], model=None) -> List[Tuple[str, float]]:
+        """一次前向计算整批输入，返回每条输入的 (意图, 置信度)"""
+        model = model if model is not None else self.model
+        vocab = self.vocab
+        if self.packed_sequences:
+            sequences = [vocab.encode(user_input, self.max_length) for user_input in user_inputs]
+        else:
+            # 旧模型训练时填充到max_length，填充位也参与计算
+            sequences = [vocab.numericalize(user_input, self.max_length) for user_input in user_inputs]
+
+        logits = model.forward(sequences, vocab.word2idx[vocab.pad_token])
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+
+        predicted = probabilities.argmax(axis=1)
+        return [(self.idx2label[int(idx)], float(probabilities[row, idx])) for row, idx in enumerate(predicted)]
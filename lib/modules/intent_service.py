@@ -0,0 +1,75 @@
+"""意图识别服务模块 - 按INTENT_BACKEND选择推理后端，只在使用torch后端时导入PyTorch"""
+
+import threading
+from typing import Dict, Any, List, Optional
+from .config import CONFIG
+from .intent_base import BaseIntentRecognizer
+
+INTENT_BACKENDS = ("torch", "numpy")
+
+# 创建全局实例
+_intent_recognizer: Optional[BaseIntentRecognizer] = None
+_intent_recognizer_lock = threading.Lock()
+
+
+def create_intent_recognizer(backend: Optional[str] = None) -> BaseIntentRecognizer:
+    """
+    创建意图识别器
+
+    Args:
+        backend: torch / numpy，为None时使用INTENT_BACKEND
+    """
+    backend = backend or CONFIG["INTENT_BACKEND"]
+    if backend not in INTENT_BACKENDS:
+        raise ValueError(f"不支持的意图识别后端: {backend}，可选: {', '.join(INTENT_BACKENDS)}")
+
+    if backend == "numpy":
+        from .intent_numpy import NumpyIntentRecognizer
+        return NumpyIntentRecognizer()
+    from .intent_recognition import SimpleIntentRecognizer
+    return SimpleIntentRecognizer()
+
+
+def get_intent_recognizer() -> BaseIntentRecognizer:
+    """获取意图识别器实例（单例模式）"""
+    global _intent_recognizer
+    if _intent_recognizer is None:
+        # 双重检查：并发的首批请求只创建一个实例（避免重复加载或训练模型）
+        with _intent_recognizer_lock:
+            if _intent_recognizer is None:
+                _intent_recognizer = create_intent_recognizer()
+    return _intent_recognizer
+
+
+def recognize_intent(user_input: str) -> Dict[str, Any]:
+    """识别用户意图的便捷函数"""
+    recognizer = get_intent_recognizer()
+    return recognizer.recognize_intent(user_input)
+
+
+def recognize_intents(user_inputs: List[str]) -> List[Dict[str, Any]]:
+    """批量识别用户意图的便捷函数"""
+    recognizer = get_intent_recognizer()
+    return recognizer.recognize_intents(user_inputs)
+
+
+def is_contact_intent(user_input: str) -> bool:
+    """判断是否为联系博主意图的便捷函数"""
+    recognizer = get_intent_recognizer()
+    return recognizer.is_contact_intent(user_input)
+
+
+def get_contact_response(user_input: str) -> str:
+    """获取联系博主响应的便捷函数"""
+    recognizer = get_intent_recognizer()
+    return recognizer.get_contact_response(user_input)
+
+
+__all__ = [
+    'create_intent_recognizer',
+    'get_intent_recognizer',
+    'recognize_intent',
+    'recognize_intents',
+    'is_contact_intent',
+    'get_contact_response'
+]
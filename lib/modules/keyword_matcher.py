@@ -0,0 +1,129 @@
+"""关键词匹配模块 - 把多组关键词表编译成一个Aho-Corasick自动机，一次扫描找出全部命中"""
+
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+
+class KeywordHit(NamedTuple):
+    """一次关键词命中"""
+    table: str
+    category: str
+    keyword: str
+    position: int  # 关键词在小写文本中的起始位置
+
+
+class KeywordHits:
+    """一段文本的全部命中，供打分和各类槽位提取共用"""
+
+    def __init__(self, matcher: "KeywordMatcher", hits: List[KeywordHit]):
+        self.matcher = matcher
+        self.hits = hits
+        # (表, 类别) -> 命中的不同关键词
+        self._matched: Dict[Tuple[str, str], Set[str]] = {}
+        for hit in hits:
+            self._matched.setdefault((hit.table, hit.category), set()).add(hit.keyword)
+
+    def keywords(self, table: str, category: str) -> Set[str]:
+        """某个类别命中的不同关键词"""
+        return self._matched.get((table, category), set())
+
+    def categories(self, table: str) -> List[str]:
+        """表中有命中的类别，按表中定义的顺序"""
+        return [category for category in self.matcher.categories(table) if (table, category) in self._matched]
+
+    def first_category(self, table: str) -> Optional[str]:
+        """表中第一个有命中的类别"""
+        categories = self.categories(table)
+        return categories[0] if categories else None
+
+
+class KeywordMatcher:
+    """多关键词表的Aho-Corasick匹配器
+
+    关键词按小写匹配，与逐个 `keyword in text.lower()` 的判断结果一致（包括重叠的命中），
+    但扫描耗时只与文本长度和命中数有关，不随关键词数量线性增长。
+    同一个关键词可以属于多个表和类别，重复的关键词只保留一次。
+    """
+
+    def __init__(self, tables: Dict[str, Dict[str, Iterable[str]]]):
+        """
+        Args:
+            tables: 表名 -> {类别 -> 关键词列表}，类别顺序即匹配优先级
+        """
+        self._categories: Dict[str, List[str]] = {}
+        # 每个不同的关键词 -> 它所属的 (表, 类别)
+        self._keywords: List[str] = []
+        self._owners: List[List[Tuple[str, str]]] = []
+        keyword_ids: Dict[str, int] = {}
+
+        for table, categories in tables.items():
+            self._categories[table] = list(categories)
+            for category, keywords in categories.items():
+                for keyword in keywords:
+                    keyword = keyword.lower()
+                    if not keyword:
+                        continue
+                    if keyword not in keyword_ids:
+                        keyword_ids[keyword] = len(self._keywords)
+                        self._keywords.append(keyword)
+                        self._owners.append([])
+                    owners = self._owners[keyword_ids[keyword]]
+                    if (table, category) not in owners:
+                        owners.append((table, category))
+
+        self._build()
+
+    def _build(self) -> None:
+        """构建字典树、失败指针和输出表"""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        for keyword_id, keyword in enumerate(self._keywords):
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(keyword_id)
+
+        # 按层次遍历设置失败指针，并把失败状态的输出合并进来
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    def categories(self, table: str) -> List[str]:
+        """表中定义的类别"""
+        return self._categories.get(table, [])
+
+    def scan(self, text: str) -> KeywordHits:
+        """扫描一遍文本，返回全部命中（同一关键词出现多次时每次都记录）"""
+        goto, fail, output = self._goto, self._fail, self._output
+        keywords, owners = self._keywords, self._owners
+        hits = []
+        state = 0
+        for end, char in enumerate(text.lower()):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword_id in output[state]:
+                keyword = keywords[keyword_id]
+                position = end - len(keyword) + 1
+                for table, category in owners[keyword_id]:
+                    hits.append(KeywordHit(table, category, keyword, position))
+        return KeywordHits(self, hits)
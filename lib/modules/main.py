@@ -1,93 +1,363 @@
-"""主业务逻辑模块 - 整合所有功能并提供简洁的API"""
-
-from typing import Optional
-from langchain_community.vectorstores import FAISS
-import os
-import datetime
-from .config import CONFIG
-from .vectorstore_manager import initialize_vectorstore
-from .qa_chain import create_llm, create_qa_chain
-from .check_instruction import check
-from .intent_recognition import recognize_intent, is_contact_intent, get_contact_response
-from langchain.prompts import PromptTemplate
-from .notice_service import call_blogger
-import socketserver
-
-class ContactBloggerTCPHandler(socketserver.BaseRequestHandler):
-    def handle(self):
-        # 获取客户端数据
-        data = self.request.recv(1024).strip()
-        print(f"来自 {self.client_address[0]} 的数据: {data.decode('utf-8')}")
-        
-        # 发送响应
-        self.request.sendall(b"Message received")
-
-# 全局变量用于缓存
-_vectorstore: Optional[FAISS] = None
-_qa_chain = None
-
-def initialize_system():
-    """初始化整个系统"""
-    global _vectorstore, _qa_chain
-    
-    print("正在初始化系统...")
-    
-    # 初始化向量数据库
-    _vectorstore = initialize_vectorstore()
-    
-    # 创建语言模型
-    llm = create_llm()
-    
-    # 创建问答链
-    _qa_chain = create_qa_chain(llm, _vectorstore)
-    
-    print("系统初始化完成")
-
-def ask_question(question: str) -> str:
-    """向文档提问并获取回答（集成意图识别）"""
-    global _qa_chain
-    
-    # 首先进行意图识别
-    try:
-        intent_result = recognize_intent(question)
-        intent = intent_result.get("intent", "技术问答")
-        confidence = intent_result.get("confidence", 0.5)
-        
-        print(f"意图识别结果: {intent}, 置信度: {confidence}")
-        
-        # 根据意图类型处理
-        if intent == "联系博主":
-            # 联系博主意图，返回特殊标识
-            return "blogger_online"
-        elif intent == "一般聊天":
-            # 一般聊天意图，返回友好响应
-            return "你好！我是博客助手，很高兴和你聊天。有什么我可以帮助你的吗？"
-        elif intent == "个人咨询":
-            # 个人咨询意图，返回标准响应
-            return "关于博主个人的问题，建议直接通过联系方式与博主交流。"
-        else:
-            # 技术问答、博客内容查询等意图，使用向量数据库
-            if _qa_chain is None:
-                initialize_system()
-            
-            result = _qa_chain.invoke({"query": question})
-            answer = result["result"]
-            
-            # 处理来源文档信息 - 去重
-            sources_list = []
-            for doc in result["source_documents"]:
-                filename = doc.metadata.get('filename', 
-                                         os.path.basename(doc.metadata.get('source', '未知文件')))
-                category = doc.metadata.get('file_categories', '未分类')
-                sources_list.append(f"- {filename} ({category})")
-            
-            sources = "\n\n来源文档:\n" + "\n".join(sources_list)
-            
-            return answer + sources
-        
-    except Exception as e:
-        return f"查询失败: {str(e)}"
-
-
-# 导出主要功能
-__all__ = ['ask_question', 'initialize_system']
+"""主业务逻辑模块 - 整合所有功能并提供简洁的API"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, AsyncIterator, Dict, Any, List
+from langchain_community.vectorstores import FAISS
+import os
+import datetime
+from .config import CONFIG
+from .vectorstore_manager import (initialize_vectorstore, refresh_vectorstore, index_outdated,
+                                  get_vectorstore_generation)
+from .qa_chain import create_llm, create_qa_chain, format_retrieval_prompt
+from .check_instruction import check
+from .intent_service import recognize_intent, is_contact_intent, get_contact_response
+from langchain.prompts import PromptTemplate
+from .notice_service import call_blogger
+from .answer_cache import get_answer_cache
+from .semantic_cache import get_semantic_cache
+from .index_watcher import IndexWatcher
+from .partitions import route_categories
+import socketserver
+
+class ContactBloggerTCPHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # 获取客户端数据
+        data = self.request.recv(1024).strip()
+        print(f"来自 {self.client_address[0]} 的数据: {data.decode('utf-8')}")
+        
+        # 发送响应
+        self.request.sendall(b"Message received")
+
+# 全局变量用于缓存
+_vectorstore: Optional[FAISS] = None
+_llm = None
+_qa_chain = None
+_init_lock = threading.Lock()
+# 热更新：同一时间只有一次重建，重建完成后在_init_lock下替换全局变量
+_reindex_lock = threading.Lock()
+_index_watcher: Optional[IndexWatcher] = None
+
+# 异步执行资源（按需创建）
+_executor: Optional[ThreadPoolExecutor] = None
+_llm_semaphore: Optional[asyncio.Semaphore] = None
+
+# 非检索类意图的固定回复
+_INTENT_REPLIES = {
+    "联系博主": "blogger_online",
+    "一般聊天": "你好！我是博客助手，很高兴和你聊天。有什么我可以帮助你的吗？",
+    "个人咨询": "关于博主个人的问题，建议直接通过联系方式与博主交流。"
+}
+
+def initialize_system():
+    """初始化整个系统"""
+    global _vectorstore, _llm, _qa_chain
+    
+    print("正在初始化系统...")
+    
+    # 初始化向量数据库
+    _vectorstore = initialize_vectorstore()
+    
+    # 创建语言模型
+    _llm = create_llm()
+    
+    # 创建问答链
+    _qa_chain = create_qa_chain(_llm, _vectorstore)
+    
+    if CONFIG["INDEX_WATCH_ENABLED"]:
+        start_index_watcher()
+    
+    print("系统初始化完成")
+
+def reload_index() -> bool:
+    """增量更新索引并原子替换向量库和问答链
+    
+    新索引在影子副本上构建，构建期间查询继续使用旧的问答链；
+    替换只是两个全局变量的赋值，已开始的查询持有旧对象的引用，不会看到半成品。
+    多worker部署时由索引写锁保证只有一个worker重建，其余worker在这里加载它写好的新版本。
+    
+    Returns:
+        bool: 是否有更新
+    """
+    global _vectorstore, _qa_chain
+    if _qa_chain is None:
+        return False
+    
+    with _reindex_lock:
+        new_vectorstore = refresh_vectorstore(_vectorstore)
+        if new_vectorstore is None:
+            return False
+        new_qa_chain = create_qa_chain(_llm, new_vectorstore)
+        with _init_lock:
+            old_qa_chain = _qa_chain
+            _vectorstore, _qa_chain = new_vectorstore, new_qa_chain
+        # 旧问答链的分片进程不再等垃圾回收，立即停止：
+        # 在途的分片检索会先完成，之后仍持有旧问答链的请求改用进程内索引
+        old_qa_chain.retriever.close()
+    print("索引已热更新")
+    return True
+
+def _index_outdated() -> bool:
+    """其他worker是否已切换到新的索引版本"""
+    vectorstore = _vectorstore
+    return vectorstore is not None and index_outdated(vectorstore)
+
+def start_index_watcher() -> None:
+    """启动博客目录监听，文件变化或其他worker更新索引后自动调用reload_index"""
+    global _index_watcher
+    if _index_watcher is None:
+        _index_watcher = IndexWatcher(reload_index, outdated=_index_outdated)
+        _index_watcher.start()
+
+def stop_index_watcher() -> None:
+    """停止博客目录监听"""
+    global _index_watcher
+    if _index_watcher is not None:
+        _index_watcher.stop()
+        _index_watcher = None
+
+def _ensure_initialized():
+    """确保系统只被初始化一次（并发请求下加锁）"""
+    if _qa_chain is None:
+        with _init_lock:
+            if _qa_chain is None:
+                initialize_system()
+
+def _get_executor() -> ThreadPoolExecutor:
+    """获取用于阻塞步骤的有界线程池"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=CONFIG["ASK_MAX_WORKERS"],
+            thread_name_prefix="ask-worker"
+        )
+    return _executor
+
+def _get_llm_semaphore() -> asyncio.Semaphore:
+    """获取限制并发LLM调用数量的信号量"""
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(CONFIG["ASK_MAX_CONCURRENCY"])
+    return _llm_semaphore
+
+def _serving_chain():
+    """取当前的问答链和它所用向量库的索引代号
+    
+    同一个请求的缓存查询、问答和缓存写入都用这一对：其他worker已发布新索引而本worker
+    还在用旧索引回答时，回答写在旧代号下，不会混入新代号的缓存。
+    """
+    qa_chain = _qa_chain
+    return qa_chain, get_vectorstore_generation(qa_chain.retriever.vectorstore)
+
+def _qa_chain_for(qa_chain, intent_result: Dict[str, Any]):
+    """按意图槽位（technology_type）限定检索分类，返回对应的问答链"""
+    if not CONFIG["CATEGORY_ROUTING_ENABLED"]:
+        return qa_chain
+    categories = route_categories(intent_result.get("slots", {}))
+    retriever = qa_chain.retriever.with_categories(categories)
+    if retriever is qa_chain.retriever:
+        return qa_chain
+    print(f"检索限定分类: {', '.join(categories)}")
+    return qa_chain.model_copy(update={"retriever": retriever})
+
+def _collect_sources(documents) -> List[Dict[str, str]]:
+    """提取来源文档的文件名和分类"""
+    sources = []
+    for doc in documents:
+        filename = doc.metadata.get('filename', 
+                                 os.path.basename(doc.metadata.get('source', '未知文件')))
+        category = doc.metadata.get('file_categories', '未分类')
+        sources.append({"filename": filename, "category": category})
+    return sources
+
+def _format_sources(sources: List[Dict[str, str]]) -> str:
+    """将来源列表格式化为回答后缀"""
+    sources_list = [f"- {source['filename']} ({source['category']})" for source in sources]
+    return "\n\n来源文档:\n" + "\n".join(sources_list)
+
+def _result_to_answer(result: dict) -> Dict[str, Any]:
+    """将问答链结果转换为可缓存的回答"""
+    return {"answer": result["result"], "sources": _collect_sources(result["source_documents"])}
+
+def _render_answer(answer: Dict[str, Any]) -> str:
+    """拼接回答和来源文档信息"""
+    return answer["answer"] + _format_sources(answer["sources"])
+
+def _lookup_cached_answer(question: str, intent: str, generation: str) -> Optional[Dict[str, Any]]:
+    """依次查询精确匹配缓存和语义缓存（generation为回答所用向量库的索引代号），命中时附带缓存元数据"""
+    cache = get_answer_cache()
+    cached = cache.get(question, intent, generation)
+    if cached is not None:
+        print("命中回答缓存")
+        cached["cache"] = {"level": "exact"}
+        return cached
+    
+    similar = get_semantic_cache().lookup(question, intent, generation)
+    if similar is not None:
+        print(f"命中语义缓存，相似度: {similar['similarity']:.3f}")
+        answer = {"answer": similar["answer"], "sources": similar["sources"]}
+        # 提升到精确匹配缓存，下次同样的问题无需再计算向量
+        cache.set(question, intent, answer, generation)
+        answer["cache"] = {
+            "level": "semantic",
+            "similarity": similar["similarity"],
+            "matched_question": similar["question"]
+        }
+        return answer
+    
+    return None
+
+def _store_answer(question: str, intent: str, answer: Dict[str, Any], generation: str) -> None:
+    """将新生成的回答写入两级缓存"""
+    get_answer_cache().set(question, intent, answer, generation)
+    get_semantic_cache().add(question, intent, answer, generation)
+
+def _build_response(answer: str, intent_result: Dict[str, Any], cache: Optional[Dict[str, Any]],
+                    with_metadata: bool):
+    """按需附带响应元数据"""
+    if not with_metadata:
+        return answer
+    return {
+        "answer": answer,
+        "metadata": {
+            "intent": intent_result.get("intent"),
+            "confidence": intent_result.get("confidence"),
+            "cache": cache
+        }
+    }
+
+def ask_question(question: str, with_metadata: bool = False):
+    """向文档提问并获取回答（集成意图识别）
+    
+    with_metadata为True时返回 {"answer": str, "metadata": dict}，
+    元数据包含意图和缓存命中信息（语义缓存命中时包括相似度）。
+    """
+    intent_result: Dict[str, Any] = {}
+    # 首先进行意图识别
+    try:
+        intent_result = recognize_intent(question)
+        intent = intent_result.get("intent", "技术问答")
+        confidence = intent_result.get("confidence", 0.5)
+        
+        print(f"意图识别结果: {intent}, 置信度: {confidence}")
+        
+        # 根据意图类型处理
+        if intent in _INTENT_REPLIES:
+            # 联系博主、一般聊天、个人咨询意图，返回固定响应
+            return _build_response(_INTENT_REPLIES[intent], intent_result, None, with_metadata)
+        
+        # 先完成初始化（可能重建索引），再按回答所用向量库的代号查回答缓存
+        _ensure_initialized()
+        qa_chain, generation = _serving_chain()
+        
+        # 技术问答、博客内容查询等意图，先查回答缓存
+        cached = _lookup_cached_answer(question, intent, generation)
+        if cached is not None:
+            return _build_response(_render_answer(cached), intent_result, cached["cache"], with_metadata)
+        
+        # 未命中时使用向量数据库
+        result = _qa_chain_for(qa_chain, intent_result).invoke({"query": question})
+        answer = _result_to_answer(result)
+        _store_answer(question, intent, answer, generation)
+        return _build_response(_render_answer(answer), intent_result, None, with_metadata)
+        
+    except Exception as e:
+        return _build_response(f"查询失败: {str(e)}", intent_result, None, with_metadata)
+
+async def ask_question_async(question: str, with_metadata: bool = False):
+    """ask_question的异步版本，不阻塞事件循环
+    
+    意图识别、系统初始化和缓存查询在有界线程池中执行，问答链通过ainvoke原生异步调用，
+    因此单个worker可以同时保持多个LLM请求。
+    """
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    intent_result: Dict[str, Any] = {}
+    
+    try:
+        intent_result = await loop.run_in_executor(executor, recognize_intent, question)
+        intent = intent_result.get("intent", "技术问答")
+        confidence = intent_result.get("confidence", 0.5)
+        
+        print(f"意图识别结果: {intent}, 置信度: {confidence}")
+        
+        if intent in _INTENT_REPLIES:
+            return _build_response(_INTENT_REPLIES[intent], intent_result, None, with_metadata)
+        
+        # 先完成初始化（可能重建索引），再按回答所用向量库的代号查回答缓存
+        if _qa_chain is None:
+            await loop.run_in_executor(executor, _ensure_initialized)
+        qa_chain, generation = _serving_chain()
+        
+        cached = await loop.run_in_executor(executor, _lookup_cached_answer, question, intent, generation)
+        if cached is not None:
+            return _build_response(_render_answer(cached), intent_result, cached["cache"], with_metadata)
+        
+        async with _get_llm_semaphore():
+            result = await _qa_chain_for(qa_chain, intent_result).ainvoke({"query": question})
+        answer = _result_to_answer(result)
+        await loop.run_in_executor(executor, _store_answer, question, intent, answer, generation)
+        return _build_response(_render_answer(answer), intent_result, None, with_metadata)
+        
+    except Exception as e:
+        return _build_response(f"查询失败: {str(e)}", intent_result, None, with_metadata)
+
+async def ask_question_stream(question: str) -> AsyncIterator[Dict[str, Any]]:
+    """流式问答：边生成边返回回答片段，最后一帧返回来源文档
+    
+    产生的事件:
+        {"type": "token", "content": str}     回答片段
+        {"type": "sources", "sources": list, "content": str, "cache": dict}  来源文档（最后一帧）
+        {"type": "error", "content": str}     出错信息
+    """
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    
+    try:
+        intent_result = await loop.run_in_executor(executor, recognize_intent, question)
+        intent = intent_result.get("intent", "技术问答")
+        
+        print(f"意图识别结果: {intent}, 置信度: {intent_result.get('confidence', 0.5)}")
+        
+        if intent in _INTENT_REPLIES:
+            yield {"type": "token", "content": _INTENT_REPLIES[intent]}
+            yield {"type": "sources", "sources": [], "content": "", "cache": None}
+            return
+        
+        if _qa_chain is None:
+            await loop.run_in_executor(executor, _ensure_initialized)
+        qa_chain, generation = _serving_chain()
+        
+        # 命中缓存时一次性返回完整回答
+        cached = await loop.run_in_executor(executor, _lookup_cached_answer, question, intent, generation)
+        if cached is not None:
+            yield {"type": "token", "content": cached["answer"]}
+            yield {"type": "sources", "sources": cached["sources"],
+                   "content": _format_sources(cached["sources"]), "cache": cached["cache"]}
+            return
+        
+        # 与RetrievalQA相同的检索和提示词，但直接流式调用语言模型
+        documents = await _qa_chain_for(qa_chain, intent_result).retriever.ainvoke(question)
+        prompt = format_retrieval_prompt(documents, question)
+        
+        tokens = []
+        async with _get_llm_semaphore():
+            async for chunk in _llm.astream(prompt):
+                if chunk.content:
+                    tokens.append(chunk.content)
+                    yield {"type": "token", "content": chunk.content}
+        
+        sources = _collect_sources(documents)
+        yield {"type": "sources", "sources": sources, "content": _format_sources(sources), "cache": None}
+        
+        answer = {"answer": "".join(tokens), "sources": sources}
+        await loop.run_in_executor(executor, _store_answer, question, intent, answer, generation)
+        
+    except Exception as e:
+        yield {"type": "error", "content": f"查询失败: {str(e)}"}
+
+
+# 导出主要功能
+__all__ = ['ask_question', 'ask_question_async', 'ask_question_stream', 'initialize_system',
+           'reload_index', 'start_index_watcher', 'stop_index_watcher']
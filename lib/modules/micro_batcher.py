@@ -0,0 +1,92 @@
+"""微批处理模块 - 把并发到达的单条请求合并成一批，一次计算后把结果分发给各个调用方"""
+
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, Generic, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """动态微批处理器
+
+    调用方线程通过submit提交单条输入并阻塞等待结果；后台线程取出第一条输入后，
+    最多再等待max_wait_ms收集后续输入（达到max_batch_size立即开始），
+    用process_batch一次算完整批，再按顺序把结果交还给各个调用方。
+    上一批计算期间到达的输入会直接进入下一批，因此max_wait_ms为0时仍能在负载下成批。
+    """
+
+    def __init__(self, process_batch: Callable[[List[T]], Sequence[R]],
+                 max_batch_size: int, max_wait_ms: float, name: str = "micro-batcher"):
+        """
+        Args:
+            process_batch: 批量计算函数，返回与输入等长、顺序一致的结果
+            max_batch_size: 每批最多的输入数
+            max_wait_ms: 收到第一条输入后等待更多输入的最长时间（毫秒）
+            name: 后台线程名
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.batches = 0
+        self.items = 0
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: T) -> R:
+        """提交一条输入并等待结果（计算出错时在调用方线程中抛出同一异常）"""
+        if not self._thread.is_alive():
+            raise RuntimeError(f"微批处理线程 {self._thread.name} 已停止")
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future.result()
+
+    def close(self) -> None:
+        """停止后台线程（已提交的输入会先处理完）"""
+        self._queue.put(None)
+        self._thread.join()
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+
+    def _collect(self, first: tuple) -> tuple:
+        """从第一条输入开始收集一批，返回 (批次, 是否收到停止信号)"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                remaining = deadline - time.monotonic()
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def _run(self) -> None:
+        stopped = False
+        while not stopped:
+            request = self._queue.get()
+            if request is None:
+                return
+            batch, stopped = self._collect(request)
+            futures = [future for _, future in batch]
+            try:
+                results = self.process_batch([item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"批量计算返回了 {len(results)} 条结果，输入有 {len(batch)} 条")
+            except BaseException as e:
+                # 包括KeyboardInterrupt等，全部交给调用方，后台线程继续运行，避免submit永远等待
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for future, result in zip(futures, results):
+                future.set_result(result)
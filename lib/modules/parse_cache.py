@@ -0,0 +1,85 @@
+"""解析缓存模块 - 按文件内容哈希缓存Markdown解析结果，未修改的文件无需重新解析"""
+
+import os
+import json
+import zlib
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+PARSE_CACHE_FILE = "parse_cache.sqlite"
+
+# 缓存格式版本：解析输出的结构变化时递增，旧条目自动失效
+_FORMAT_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS parsed (
+    sha256 TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+"""
+
+# (正文, 元数据) 列表
+Elements = List[Tuple[str, Dict[str, Any]]]
+
+
+class ParseCache:
+    """以内容SHA-256为键的解析缓存
+
+    每个条目是zlib压缩的JSON：{"categories": 前言分类, "elements": [[正文, 元数据], ...]}。
+    元素中不含source、last_modified等随文件路径和时间变化的字段，读取时由调用方补上。
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, PARSE_CACHE_FILE)
+        self._connection = sqlite3.connect(self.path)
+        self._connection.executescript(_SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, sha256: str) -> Optional[Tuple[Any, Elements]]:
+        """读取解析结果，未命中返回None"""
+        row = self._connection.execute(
+            "SELECT data FROM parsed WHERE sha256 = ? AND version = ?", (sha256, _FORMAT_VERSION)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        try:
+            entry = json.loads(zlib.decompress(row[0]).decode("utf-8"))
+        except (zlib.error, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["categories"], [(text, metadata) for text, metadata in entry["elements"]]
+
+    def put(self, sha256: str, categories: Any, elements: Elements) -> None:
+        """写入解析结果"""
+        data = json.dumps({"categories": categories, "elements": elements},
+                          ensure_ascii=False, separators=(",", ":"), default=str)
+        self._connection.execute(
+            "INSERT OR REPLACE INTO parsed (sha256, version, data) VALUES (?, ?, ?)",
+            (sha256, _FORMAT_VERSION, zlib.compress(data.encode("utf-8"), 6))
+        )
+        self._connection.commit()
+
+    def evict(self, hashes: Iterable[str]) -> int:
+        """删除指定内容哈希的条目（文件修改或删除后的旧内容），返回删除数量"""
+        cursor = self._connection.executemany("DELETE FROM parsed WHERE sha256 = ?", ((sha256,) for sha256 in hashes))
+        self._connection.commit()
+        return cursor.rowcount
+
+    def collect_garbage(self, live_hashes: Iterable[str]) -> int:
+        """删除不再对应任何现存文件内容的条目，返回删除数量"""
+        live = set(live_hashes)
+        stale = [sha256 for (sha256,) in self._connection.execute("SELECT sha256 FROM parsed")
+                 if sha256 not in live]
+        if stale:
+            self._connection.executemany("DELETE FROM parsed WHERE sha256 = ?", ((sha256,) for sha256 in stale))
+            self._connection.commit()
+            self._connection.execute("VACUUM")
+        return len(stale)
+
+    def close(self) -> None:
+        self._connection.close()
@@ -0,0 +1,91 @@
+"""分类分区模块 - 记录每个分类包含的向量位置，用于限定检索范围"""
+
+import os
+import json
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from langchain.schema import Document
+
+from .config import CONFIG
+
+PARTITIONS_FILE = "partitions.json"
+
+
+def normalize_category(category: Any) -> str:
+    """分类名统一为去空白的小写形式"""
+    return str(category).strip().lower()
+
+
+def document_categories(metadata: Dict[str, Any]) -> List[str]:
+    """文档的分类列表（前言中的categories可以是字符串或列表）"""
+    value = metadata.get("file_categories") or "未分类"
+    values = value if isinstance(value, (list, tuple)) else [value]
+    return [normalize_category(item) for item in values if str(item).strip()]
+
+
+def route_categories(slots: Dict[str, Any]) -> List[str]:
+    """根据意图识别的technology_type槽位确定要检索的分类
+
+    先查CATEGORY_ROUTES中的映射，没有映射时把槽位值本身当作分类名。
+    """
+    technology_type = slots.get("technology_type") if slots else None
+    if not technology_type:
+        return []
+    routes = CONFIG["CATEGORY_ROUTES"].get(technology_type, [technology_type])
+    return [normalize_category(category) for category in routes]
+
+
+class CategoryPartitions:
+    """分类 -> 向量位置（升序数组）
+
+    稀疏倒排索引的文档序号与向量位置一致，同一组位置同时用于两路检索。
+    """
+
+    def __init__(self, positions: Dict[str, np.ndarray]):
+        self.positions = positions
+
+    @classmethod
+    def build(cls, documents: Iterable[Document]) -> "CategoryPartitions":
+        """从按向量位置排列的文档构建"""
+        positions = defaultdict(list)
+        for position, doc in enumerate(documents):
+            for category in document_categories(doc.metadata):
+                positions[category].append(position)
+        return cls({category: np.asarray(items, dtype=np.int64) for category, items in positions.items()})
+
+    def save(self, directory: str) -> None:
+        """写入分区文件（先写临时文件再原子替换）"""
+        path = os.path.join(directory, PARTITIONS_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({category: items.tolist() for category, items in self.positions.items()},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["CategoryPartitions"]:
+        """读取分区文件，不存在或损坏时返回None"""
+        path = os.path.join(directory, PARTITIONS_FILE)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return cls({category: np.asarray(items, dtype=np.int64) for category, items in data.items()})
+
+    def categories(self) -> List[str]:
+        return sorted(self.positions)
+
+    def select(self, categories: Iterable[str]) -> Optional[np.ndarray]:
+        """
+        合并多个分类的向量位置
+
+        Returns:
+            Optional[np.ndarray]: 升序去重的位置；没有任何已知分类时返回None（表示不限定范围）
+        """
+        selected = [self.positions[category] for category in map(normalize_category, categories)
+                    if category in self.positions]
+        if not selected:
+            return None
+        return np.unique(np.concatenate(selected))
@@ -1,57 +1,63 @@
-"""问答链模块 - 处理问答链的创建和管理"""
-
-from typing import Any
-from langchain_openai import ChatOpenAI
-from langchain.chains.retrieval_qa.base import RetrievalQA
-from langchain.base_language import BaseLanguageModel
-from langchain.output_parsers.regex import RegexParser
-from langchain.prompts import PromptTemplate
-from langchain.evaluation.qa import QAGenerateChain
-
-from .config import CONFIG, QA_TEMPLATE, RETRIEVAL_TEMPLATE
-
-def create_llm() -> ChatOpenAI:
-    """创建语言模型实例"""
-    return ChatOpenAI(
-        temperature=0,
-        model="deepseek-chat",
-        openai_api_key=CONFIG["API_KEY"],
-        openai_api_base=CONFIG["BASE_URL"]
-    )
-
-def create_qa_chain(llm: ChatOpenAI, vectorstore) -> RetrievalQA:
-    """创建问答链"""
-    return RetrievalQA.from_chain_type(
-        llm=llm, 
-        chain_type="stuff", 
-        retriever=vectorstore.as_retriever(search_kwargs={"k":5}),
-        verbose=True,
-        return_source_documents=True,
-        chain_type_kwargs={
-            "prompt": PromptTemplate(
-                input_variables=["context", "question"],
-                template=RETRIEVAL_TEMPLATE
-            )
-        }
-    )
-
-def create_qa_generate_chain(llm: BaseLanguageModel) -> QAGenerateChain:
-    """创建QA生成链"""
-    output_parser = RegexParser(
-        regex=r"QUESTION:\s*(.*?)\s*ANSWER:\s*(.*)",
-        output_keys=["query", "answer"]
-    )
-
-    prompt = PromptTemplate(
-        input_variables=["doc"], 
-        template=QA_TEMPLATE, 
-        output_parser=output_parser
-    )
-
-    class MyQAGenerateChain(QAGenerateChain):
-        """自定义QA生成链"""
-        @classmethod
-        def from_llm(cls, llm: BaseLanguageModel, **kwargs: Any) -> QAGenerateChain:
-            return cls(llm=llm, prompt=prompt, **kwargs)
-
-    return MyQAGenerateChain.from_llm(llm)
+"""问答链模块 - 处理问答链的创建和管理"""
+
+from typing import Any
+from langchain_openai import ChatOpenAI
+from langchain.chains.retrieval_qa.base import RetrievalQA
+from langchain.base_language import BaseLanguageModel
+from langchain.output_parsers.regex import RegexParser
+from langchain.prompts import PromptTemplate
+from langchain.evaluation.qa import QAGenerateChain
+
+from .config import CONFIG, QA_TEMPLATE, RETRIEVAL_TEMPLATE
+from .retriever import create_retriever
+
+def create_llm() -> ChatOpenAI:
+    """创建语言模型实例"""
+    return ChatOpenAI(
+        temperature=0,
+        model="deepseek-chat",
+        openai_api_key=CONFIG["API_KEY"],
+        openai_api_base=CONFIG["BASE_URL"]
+    )
+
+def create_qa_chain(llm: ChatOpenAI, vectorstore) -> RetrievalQA:
+    """创建问答链"""
+    return RetrievalQA.from_chain_type(
+        llm=llm, 
+        chain_type="stuff", 
+        retriever=create_retriever(vectorstore),
+        verbose=True,
+        return_source_documents=True,
+        chain_type_kwargs={
+            "prompt": PromptTemplate(
+                input_variables=["context", "question"],
+                template=RETRIEVAL_TEMPLATE
+            )
+        }
+    )
+
+def format_retrieval_prompt(documents, question: str) -> str:
+    """按stuff链的方式拼接上下文，生成问答提示词（用于流式输出）"""
+    context = "\n\n".join(doc.page_content for doc in documents)
+    return RETRIEVAL_TEMPLATE.format(context=context, question=question)
+
+def create_qa_generate_chain(llm: BaseLanguageModel) -> QAGenerateChain:
+    """创建QA生成链"""
+    output_parser = RegexParser(
+        regex=r"QUESTION:\s*(.*?)\s*ANSWER:\s*(.*)",
+        output_keys=["query", "answer"]
+    )
+
+    prompt = PromptTemplate(
+        input_variables=["doc"], 
+        template=QA_TEMPLATE, 
+        output_parser=output_parser
+    )
+
+    class MyQAGenerateChain(QAGenerateChain):
+        """自定义QA生成链"""
+        @classmethod
+        def from_llm(cls, llm: BaseLanguageModel, **kwargs: Any) -> QAGenerateChain:
+            return cls(llm=llm, prompt=prompt, **kwargs)
+
+    return MyQAGenerateChain.from_llm(llm)
@@ -0,0 +1,138 @@
+"""查询缓存模块 - 问题向量、向量检索结果等按键缓存的进程内LRU，可选Redis共享"""
+
+import time
+import base64
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .config import CONFIG
+from .redis_manager import RedisManager, get_redis_manager
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+
+def cache_key(*parts: Any) -> str:
+    """把多个部分拼成定长的缓存键（字节串直接参与哈希）"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class QueryCache:
+    """有界LRU缓存（值为字节串）
+
+    进程内用OrderedDict按最近使用顺序淘汰；启用Redis时作为第二级，
+    进程内未命中再查Redis，多个worker共享计算结果。Redis中的值经base64编码
+    （RedisManager默认decode_responses），不可用时在重试间隔内只使用进程内缓存。
+    """
+
+    def __init__(self, name: str, max_size: int, use_redis: Optional[bool] = None,
+                 manager: Optional[RedisManager] = None):
+        """
+        Args:
+            name: 缓存名称，用于Redis键前缀和统计
+            max_size: 进程内最多保存的条目数，0表示不缓存
+            use_redis: 是否使用Redis作为第二级，为None时使用QUERY_CACHE_REDIS
+            manager: Redis管理器，如果为None则使用全局实例
+        """
+        self.name = name
+        self.max_size = max_size
+        self.use_redis = CONFIG["QUERY_CACHE_REDIS"] if use_redis is None else use_redis
+        self.manager = manager
+        self.ttl = CONFIG["QUERY_CACHE_TTL"]
+        self.prefix = f"{CONFIG['ANSWER_CACHE_PREFIX']}:{name}"
+        self.retry_interval = CONFIG["ANSWER_CACHE_RETRY_INTERVAL"]
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._unavailable_until = 0.0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """读取缓存，未命中返回None"""
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        value = self._redis_get(key)
+        if value is not None:
+            self._put(key, value)
+            with self._lock:
+                self.redis_hits += 1
+            return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: bytes) -> None:
+        """写入缓存"""
+        if self.max_size <= 0:
+            return
+        self._put(key, value)
+        self._redis_set(key, value)
+
+    def clear(self) -> None:
+        """清空进程内缓存（Redis中的条目由键中的索引代号和TTL淘汰）"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取命中统计"""
+        total = self.hits + self.redis_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.redis_hits) / total if total else 0.0,
+        }
+
+    def _put(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _available(self) -> bool:
+        """Redis不可用时在重试间隔内直接跳过，避免每次查询都等待连接超时"""
+        if not self.use_redis or time.monotonic() < self._unavailable_until:
+            return False
+        if self.manager is None:
+            self.manager = get_redis_manager()
+        if self.manager.is_connected() or self.manager.connect():
+            return True
+
+        logger.warning(f"Redis不可用，{self.retry_interval}秒内跳过{self.name}缓存的Redis层")
+        self._unavailable_until = time.monotonic() + self.retry_interval
+        return False
+
+    def _redis_get(self, key: str) -> Optional[bytes]:
+        if not self._available():
+            return None
+        value = self.manager.get_value(f"{self.prefix}:{key}")
+        if value is None:
+            return None
+        try:
+            return base64.b64decode(value)
+        except (TypeError, ValueError):
+            return None
+
+    def _redis_set(self, key: str, value: bytes) -> None:
+        if self._available():
+            self.manager.set_value(f"{self.prefix}:{key}", base64.b64encode(value).decode("ascii"),
+                                   expire=self.ttl)
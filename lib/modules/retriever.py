@@ -0,0 +1,193 @@
+"""检索模块 - 稠密向量检索与BM25稀疏检索的混合检索器"""
+
+import re
+import json
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+from langchain.schema import Document
+
+from .config import CONFIG
+from .ann_index import filtered_search
+from .partitions import CategoryPartitions
+from .query_cache import QueryCache, cache_key
+from .vectorstore_manager import get_index_directory, get_vectorstore_generation, add_index_listener
+from .sharding import ShardError, ShardedSearcher, open_sharded_searcher
+from .sparse_index import SparseIndex
+from .tokenizer import search_terms
+
+RETRIEVAL_MODES = ("hybrid", "dense", "sparse")
+
+# 英文/数字标识符（如 xv6、openharmony、c++），稠密向量对这类词不敏感
+_IDENTIFIER = re.compile(r"^[a-z0-9][a-z0-9._+#-]*$")
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[str]], k: int) -> List[str]:
+    """
+    倒数排名融合：每个结果在各列表中得分 1/(k + 名次)，按总分排序
+
+    Args:
+        rankings: 多个按相关度排好序的docstore id列表
+        k: 平滑常数，越大名次差异的影响越小
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class BlogRetriever(BaseRetriever):
+    """博客检索器
+
+    hybrid 模式下分别取稠密和稀疏检索的候选，用倒数排名融合；
+    关键词型的短查询（全部词项都在倒排索引中且含英文标识符）直接走稀疏检索，不计算查询向量。
+    通过with_categories限定分类后，两路检索都只在该分类的向量位置中进行。
+    启用索引分片时，稠密检索由分片进程完成，结果同样是全局向量位置。
+    稠密检索结果按 (查询向量, k, 分类, 索引代号) 缓存。
+    """
+
+    vectorstore: FAISS
+    sparse_index: Optional[SparseIndex] = None
+    partitions: Optional[CategoryPartitions] = None
+    mode: str = "hybrid"
+    k: int = 5
+    fetch_k: int = 20
+    rrf_k: int = 60
+    categories: List[str] = []
+    positions: Optional[np.ndarray] = None
+    shards: Optional[ShardedSearcher] = None
+    generation: Optional[str] = None
+
+    def close(self) -> None:
+        """停止分片进程（向量库被替换后调用，按分类复制出的检索器共用同一组分片进程）"""
+        if self.shards is not None:
+            self.shards.close()
+
+    def with_categories(self, categories: List[str]) -> "BlogRetriever":
+        """返回只检索指定分类的检索器（没有匹配的分类时返回自身）"""
+        if not categories or self.partitions is None:
+            return self
+        positions = self.partitions.select(categories)
+        if positions is None:
+            return self
+        return self.model_copy(update={"categories": list(categories), "positions": positions})
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        documents = self._search(query)
+        if not documents and self.positions is not None:
+            # 分类内没有结果时退回全库检索
+            return self.model_copy(update={"categories": [], "positions": None})._search(query)
+        return documents
+
+    def _search(self, query: str) -> List[Document]:
+        if self.sparse_index is None or self.mode == "dense":
+            return self._load_documents(self._dense_search(query, self.k))
+
+        terms = search_terms(query)
+        if self.mode == "sparse" or self._is_keyword_query(terms):
+            doc_ids = [doc_id for doc_id, _ in self.sparse_index.search_terms(terms, self.k, self.positions)]
+            if doc_ids:
+                return self._load_documents(doc_ids)
+
+        sparse_ids = [doc_id for doc_id, _ in self.sparse_index.search_terms(terms, self.fetch_k, self.positions)]
+        dense_ids = self._dense_search(query, self.fetch_k)
+        fused = reciprocal_rank_fusion([dense_ids, sparse_ids], self.rrf_k)
+        return self._load_documents(fused[:self.k])
+
+    def _is_keyword_query(self, terms: List[str]) -> bool:
+        """是否适合只用稀疏检索"""
+        max_terms = CONFIG["SPARSE_FAST_PATH_MAX_TERMS"]
+        if not terms or len(terms) > max_terms:
+            return False
+        if len(self.sparse_index.known_terms(terms)) != len(terms):
+            return False
+        return any(_IDENTIFIER.match(term) for term in terms)
+
+    def _dense_search(self, query: str, k: int) -> List[str]:
+        """向量检索，返回docstore id列表"""
+        vector = self.vectorstore.embedding_function.embed_query(query)
+        return self._search_vector(np.asarray([vector], dtype=np.float32), k)
+
+    def _search_vector(self, vector: np.ndarray, k: int) -> List[str]:
+        cache = get_retrieval_cache() if self.generation is not None else None
+        if cache is not None:
+            key = cache_key(vector.tobytes(), k, ",".join(self.categories), self.generation)
+            cached = cache.get(key)
+            if cached is not None:
+                return json.loads(cached)["ids"]
+
+        result = None
+        if self.shards is not None:
+            try:
+                result = self.shards.search(vector, k, self.positions)
+            except ShardError as e:
+                print(f"分片检索失败，改用进程内检索: {e}")
+        if result is None:
+            if self.positions is not None:
+                result = filtered_search(self.vectorstore.index, vector, k, self.positions)
+            else:
+                result = self.vectorstore.index.search(vector, k)
+        distances, positions = result
+        hits = [(self.vectorstore.index_to_docstore_id[int(i)], float(d))
+                for d, i in zip(distances[0], positions[0]) if i >= 0]
+        doc_ids = [doc_id for doc_id, _ in hits]
+
+        if cache is not None:
+            cache.set(key, json.dumps({"ids": doc_ids, "scores": [score for _, score in hits]}).encode("utf-8"))
+        return doc_ids
+
+    def _load_documents(self, doc_ids: Sequence[str]) -> List[Document]:
+        documents = []
+        for doc_id in doc_ids:
+            doc = self.vectorstore.docstore.search(doc_id)
+            if isinstance(doc, Document):
+                documents.append(doc)
+        return documents
+
+
+def get_retrieval_mode() -> str:
+    """获取配置的检索模式"""
+    mode = CONFIG["RETRIEVAL_MODE"]
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"不支持的检索模式: {mode}，可选: {', '.join(RETRIEVAL_MODES)}")
+    return mode
+
+
+def create_retriever(vectorstore: FAISS) -> BlogRetriever:
+    """创建检索器，倒排索引和分类分区从向量库的版本目录加载（缺失时退化为纯向量检索、不分区）"""
+    mode = get_retrieval_mode()
+    directory = get_index_directory(vectorstore)
+    sparse_index = None
+    if mode != "dense" and directory is not None:
+        sparse_index = SparseIndex.load(directory)
+        if sparse_index is None:
+            print("未找到稀疏索引，使用纯向量检索")
+    return BlogRetriever(
+        vectorstore=vectorstore,
+        sparse_index=sparse_index,
+        partitions=CategoryPartitions.load(directory) if directory is not None else None,
+        mode=mode,
+        k=CONFIG["RETRIEVAL_K"],
+        fetch_k=CONFIG["RETRIEVAL_FETCH_K"],
+        rrf_k=CONFIG["RRF_K"],
+        shards=open_sharded_searcher(directory) if directory is not None else None,
+        generation=get_vectorstore_generation(vectorstore) if CONFIG["QUERY_CACHE_ENABLED"] else None,
+    )
+
+
+# 创建全局检索结果缓存实例
+_retrieval_cache: Optional[QueryCache] = None
+
+
+def get_retrieval_cache() -> QueryCache:
+    """获取稠密检索结果缓存（单例模式，索引更新时清空）"""
+    global _retrieval_cache
+    if _retrieval_cache is None:
+        _retrieval_cache = QueryCache("retrieval", CONFIG["RETRIEVAL_CACHE_SIZE"])
+        add_index_listener(lambda generation: _retrieval_cache.clear())
+    return _retrieval_cache
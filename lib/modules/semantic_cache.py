@@ -0,0 +1,272 @@
+"""语义缓存模块 - 用独立的小型FAISS索引复用相似问题的回答"""
+
+import os
+import json
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+import faiss
+import numpy as np
+
+from .config import CONFIG
+from .vectorstore_manager import _get_embeddings, get_index_generation, add_index_listener
+
+try:
+    import fcntl
+except ImportError:
+    # Windows没有fcntl，只有进程内的锁，只支持单进程部署
+    fcntl = None
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+_INDEX_FILE = "index.faiss"
+_ENTRIES_FILE = "entries.json"
+# 多个worker共用缓存目录：索引和条目在文件锁下一起写入、一起读取，不会配上另一个worker的文件
+_LOCK_FILE = "cache.lock"
+
+
+class SemanticAnswerCache:
+    """语义回答缓存
+
+    已回答的问题向量存放在内积索引中（向量已归一化，内积即余弦相似度），
+    相似度超过阈值且意图相同的新问题直接返回缓存的回答，不再调用语言模型。
+    条目数量有上限，按最近最少使用（LRU）淘汰。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        初始化语义缓存
+
+        Args:
+            path: 持久化目录，如果为None则使用配置中的路径
+        """
+        self.path = path or CONFIG["SEMANTIC_CACHE_PATH"]
+        self.enabled = CONFIG["SEMANTIC_CACHE_ENABLED"]
+        self.threshold = CONFIG["SEMANTIC_CACHE_THRESHOLD"]
+        self.max_size = CONFIG["SEMANTIC_CACHE_MAX_SIZE"]
+        self.save_every = CONFIG["SEMANTIC_CACHE_SAVE_EVERY"]
+
+        self.hits = 0
+        self.misses = 0
+        self._index: Optional[faiss.Index] = None
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._generation: Optional[str] = None
+        self._unsaved = 0
+        self._lock = threading.RLock()
+
+        self._load()
+        add_index_listener(self._on_index_updated)
+
+    def _embed(self, question: str) -> np.ndarray:
+        """计算归一化后的问题向量"""
+        vector = np.asarray([_get_embeddings().embed_query(question)], dtype=np.float32)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def lookup(self, question: str, intent: str, generation: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        查找语义相近的已缓存回答
+
+        Args:
+            question: 用户问题
+            intent: 识别出的意图
+            generation: 回答所用向量库的索引代号，为None时使用当前索引代号
+
+        Returns:
+            Optional[Dict[str, Any]]: {"answer", "sources", "question", "similarity"}，未命中时返回None
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                self.misses += 1
+                return None
+            self._check_generation(generation)
+
+        vector = self._embed(question)
+
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                self.misses += 1
+                return None
+
+            scores, ids = self._index.search(vector, min(4, self._index.ntotal))
+            for score, entry_id in zip(scores[0], ids[0]):
+                if entry_id < 0 or score < self.threshold:
+                    break
+                entry = self._entries.get(int(entry_id))
+                if entry is None or entry["intent"] != intent:
+                    continue
+
+                self._entries.move_to_end(int(entry_id))
+                self.hits += 1
+                return {
+                    "answer": entry["answer"],
+                    "sources": entry["sources"],
+                    "question": entry["question"],
+                    "similarity": float(score),
+                }
+
+            self.misses += 1
+            return None
+
+    def add(self, question: str, intent: str, answer: Dict[str, Any], generation: Optional[str] = None) -> None:
+        """
+        缓存一条新回答
+
+        Args:
+            question: 用户问题
+            intent: 识别出的意图
+            answer: {"answer": str, "sources": list}
+            generation: 生成回答的向量库的索引代号，为None时使用当前索引代号
+        """
+        if not self.enabled:
+            return
+
+        vector = self._embed(question)
+
+        with self._lock:
+            self._check_generation(generation)
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+
+            # 超出容量时淘汰最久未使用的条目
+            while len(self._entries) >= self.max_size:
+                evicted_id, _ = self._entries.popitem(last=False)
+                self._index.remove_ids(np.asarray([evicted_id], dtype=np.int64))
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vector, np.asarray([entry_id], dtype=np.int64))
+            self._entries[entry_id] = {
+                "question": question,
+                "intent": intent,
+                "answer": answer["answer"],
+                "sources": answer["sources"],
+            }
+
+            self._unsaved += 1
+            if self._unsaved >= self.save_every:
+                self.save()
+
+    def clear(self, generation: Optional[str] = None) -> None:
+        """清空缓存，之后的条目属于generation（为None时为当前索引代号）"""
+        with self._lock:
+            if self._index is not None:
+                self._index.reset()
+            self._entries.clear()
+            self._generation = generation or get_index_generation()
+            self.save()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取命中统计"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def _check_generation(self, generation: Optional[str] = None) -> None:
+        """回答所用的索引代号与缓存条目的不同（文档更新）时，旧回答可能已过时，清空缓存"""
+        generation = generation or get_index_generation()
+        if self._generation != generation:
+            if self._entries:
+                logger.info("文档索引已更新，清空语义缓存")
+            self.clear(generation)
+
+    def _on_index_updated(self, generation: str) -> None:
+        """索引更新回调"""
+        self.clear(generation)
+
+    @contextmanager
+    def _file_lock(self):
+        """跨进程的缓存目录锁（flock）"""
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, _LOCK_FILE), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def save(self) -> None:
+        """持久化缓存索引和条目
+
+        各自先写临时文件再替换，在文件锁下一起替换；条目文件记录索引文件的哈希，
+        加载时据此确认两者来自同一次保存。
+        """
+        with self._lock:
+            try:
+                index_path = os.path.join(self.path, _INDEX_FILE)
+                entries_path = os.path.join(self.path, _ENTRIES_FILE)
+                suffix = f".{os.getpid()}.tmp"
+                index_bytes = faiss.serialize_index(self._index).tobytes() if self._index is not None else b""
+                with self._file_lock():
+                    with open(index_path + suffix, 'wb') as f:
+                        f.write(index_bytes)
+                    with open(entries_path + suffix, 'w', encoding='utf-8') as f:
+                        json.dump({
+                            "generation": self._generation,
+                            "next_id": self._next_id,
+                            "index_sha1": hashlib.sha1(index_bytes).hexdigest(),
+                            # 按LRU顺序保存，加载后淘汰顺序不变
+                            "entries": [[entry_id, entry] for entry_id, entry in self._entries.items()],
+                        }, f, ensure_ascii=False)
+                    os.replace(index_path + suffix, index_path)
+                    os.replace(entries_path + suffix, entries_path)
+                self._unsaved = 0
+            except Exception as e:
+                logger.error(f"保存语义缓存失败: {e}")
+
+    def _load(self) -> None:
+        """加载持久化的缓存，索引与条目不是同一次保存的（或数量不符）时丢弃"""
+        index_path = os.path.join(self.path, _INDEX_FILE)
+        entries_path = os.path.join(self.path, _ENTRIES_FILE)
+        if not (os.path.exists(index_path) and os.path.exists(entries_path)):
+            return
+
+        try:
+            with self._file_lock():
+                with open(entries_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                with open(index_path, 'rb') as f:
+                    index_bytes = f.read()
+            entries = OrderedDict((int(entry_id), entry) for entry_id, entry in data.get("entries", []))
+            index = (faiss.deserialize_index(np.frombuffer(index_bytes, dtype=np.uint8))
+                     if index_bytes else None)
+            if (data.get("index_sha1") != hashlib.sha1(index_bytes).hexdigest()
+                    or (index.ntotal if index is not None else 0) != len(entries)):
+                logger.warning("语义缓存的索引与条目不一致，丢弃缓存")
+                return
+            self._index = index
+            self._generation = data.get("generation")
+            self._next_id = data.get("next_id", 0)
+            self._entries = entries
+            logger.info(f"加载语义缓存 {len(self._entries)} 条")
+        except Exception as e:
+            logger.error(f"加载语义缓存失败: {e}")
+            self._index = None
+            self._entries = OrderedDict()
+
+
+# 创建全局语义缓存实例
+_semantic_cache: Optional[SemanticAnswerCache] = None
+
+
+def get_semantic_cache() -> SemanticAnswerCache:
+    """获取语义缓存实例（单例模式）"""
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticAnswerCache()
+    return _semantic_cache
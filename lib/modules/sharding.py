@@ -0,0 +1,383 @@
+"""分片模块 - 把向量索引拆成多个分片，每个分片在独立进程中检索，由协调者合并结果"""
+
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import itertools
+import threading
+import weakref
+import multiprocessing
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import faiss
+import numpy as np
+
+from .config import CONFIG
+from .ann_index import apply_search_params, empty_like, filtered_search, reconstruct_all
+
+SHARDS_FILE = "shards.json"
+SHARD_STRATEGIES = ("file", "category")
+
+
+def shard_key(metadata: Dict[str, Any], strategy: str) -> str:
+    """分片依据：按文件（同一文件的片段在同一分片）或按第一个分类"""
+    if strategy == "category":
+        value = metadata.get("file_categories") or "未分类"
+        if isinstance(value, (list, tuple)):
+            value = value[0] if value else "未分类"
+        return str(value).strip().lower()
+    return str(metadata.get("source", ""))
+
+
+def assign_shards(metadatas: Iterable[Dict[str, Any]], count: int, strategy: str) -> np.ndarray:
+    """按向量位置顺序返回每个向量所属的分片号（稳定哈希，与进程无关）"""
+    if strategy not in SHARD_STRATEGIES:
+        raise ValueError(f"不支持的分片方式: {strategy}，可选: {', '.join(SHARD_STRATEGIES)}")
+    return np.array([
+        int(hashlib.sha1(shard_key(metadata, strategy).encode("utf-8")).hexdigest(), 16) % count
+        for metadata in metadatas
+    ], dtype=np.int32)
+
+
+def write_shards(directory: str, index: faiss.Index, assignment: np.ndarray, count: int, strategy: str) -> None:
+    """
+    把索引拆分写入分片目录
+
+    每个分片保存一个同类型的索引（IVF沿用已训练的聚类中心）和它包含的全局向量位置。
+    分片写入新目录后再原子更新shards.json；上一组分片保留到下次写入，
+    正在使用或刚读到旧shards.json、尚未启动分片进程的worker不受影响。
+
+    Args:
+        directory: 向量库目录
+        index: 完整索引
+        assignment: 每个向量位置的分片号
+        count: 分片数
+        strategy: 分片方式（记录在shards.json中）
+    """
+    previous = load_shard_info(directory)
+    shard_dir = f"shards_{uuid.uuid4().hex[:8]}"
+    os.makedirs(os.path.join(directory, shard_dir))
+
+    vectors = reconstruct_all(index) if index.ntotal else None
+    for shard in range(count):
+        positions = np.flatnonzero(assignment == shard).astype(np.int64)
+        shard_index = empty_like(index)
+        if len(positions):
+            shard_index.add(vectors[positions])
+        faiss.write_index(shard_index, os.path.join(directory, shard_dir, f"shard_{shard}.faiss"))
+        np.save(os.path.join(directory, shard_dir, f"shard_{shard}.npy"), positions)
+
+    path = os.path.join(directory, SHARDS_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"dir": shard_dir, "count": count, "strategy": strategy}, f)
+    os.replace(path + ".tmp", path)
+    _remove_old_shards(directory, keep={shard_dir, previous["dir"] if previous else None})
+    print(f"已写入 {count} 个索引分片（按{'分类' if strategy == 'category' else '文件'}）: "
+          f"{np.bincount(assignment, minlength=count).tolist()}")
+
+
+def remove_shards(directory: str) -> None:
+    """删除分片（不再启用分片时）"""
+    path = os.path.join(directory, SHARDS_FILE)
+    if os.path.exists(path):
+        os.remove(path)
+    _remove_old_shards(directory, keep=set())
+
+
+def _remove_old_shards(directory: str, keep: Set[Optional[str]]) -> None:
+    for name in os.listdir(directory):
+        if name.startswith("shards_") and name not in keep:
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def load_shard_info(directory: str) -> Optional[Dict[str, Any]]:
+    """读取shards.json，不存在时返回None"""
+    try:
+        with open(os.path.join(directory, SHARDS_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _shard_worker(index_path: str, positions_path: str, threads: int, concurrency: int, connection) -> None:
+    """分片进程：加载（内存映射）一个分片，循环处理检索请求
+
+    加载完成后先回复一次None（加载失败时回复异常并退出）；
+    请求为 (请求号, 查询向量, k, 允许的全局位置或None)，回复 (请求号, (距离, 全局位置)) 或 (请求号, 异常)。
+    请求由线程池并发处理（faiss检索时释放GIL），回复的顺序与请求顺序无关。
+    """
+    try:
+        faiss.omp_set_num_threads(threads)
+        index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+        apply_search_params(index)
+        global_positions = np.load(positions_path)
+    except Exception as e:
+        connection.send(e)
+        return
+    connection.send(None)
+    send_lock = threading.Lock()
+
+    def handle(request_id, queries, k, allowed):
+        try:
+            if allowed is not None:
+                # 协调者已取过交集，allowed都在本分片中：全局位置 -> 本分片内的位置
+                distances, labels = filtered_search(index, queries, k,
+                                                    np.searchsorted(global_positions, allowed))
+            else:
+                distances, labels = index.search(queries, k)
+            result = (distances, np.where(labels >= 0, global_positions[np.maximum(labels, 0)], -1))
+        except Exception as e:
+            result = e
+        with send_lock:
+            connection.send((request_id, result))
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="shard-search") as pool:
+        while True:
+            try:
+                request = connection.recv()
+            except EOFError:
+                return
+            if request is None:
+                return
+            pool.submit(handle, *request)
+
+
+class ShardError(RuntimeError):
+    """分片进程启动失败或检索出错"""
+
+
+class _ShardChannel:
+    """一个分片进程和它的管道
+
+    请求带请求号发出，后台线程读取回复并交给对应的Future，多个检索可以同时在途；
+    管道断开（进程退出）时该管道上所有未完成的请求都以ShardError结束。
+    """
+
+    def __init__(self, context, shard: int, shard_dir: str, threads: int, concurrency: int):
+        self.shard = shard
+        parent, child = context.Pipe()
+        self.process = context.Process(
+            target=_shard_worker, name=f"index-shard-{shard}",
+            args=(os.path.join(shard_dir, f"shard_{shard}.faiss"), os.path.join(shard_dir, f"shard_{shard}.npy"),
+                  threads, concurrency, child),
+            daemon=True)
+        self.process.start()
+        child.close()
+        self.connection = parent
+        self._send_lock = threading.Lock()
+        self._pending: Dict[int, Future] = {}
+        self._pending_lock = threading.Lock()
+        self._closed = False
+
+    def wait_ready(self) -> None:
+        """等待分片进程加载完成，之后开始读取回复"""
+        try:
+            reply = self.connection.recv()
+        except (EOFError, OSError):
+            reply = "分片进程意外退出"
+        if reply is not None:
+            raise ShardError(f"分片 {self.shard} 加载失败: {reply}")
+        threading.Thread(target=self._read_replies, name=f"index-shard-{self.shard}-reader", daemon=True).start()
+
+    def alive(self) -> bool:
+        return not self._closed and self.process.is_alive()
+
+    def submit(self, request_id: int, queries: np.ndarray, k: int, allowed: Optional[np.ndarray]) -> Future:
+        """发出一个检索请求，返回等待回复的Future"""
+        future: Future = Future()
+        with self._pending_lock:
+            if self._closed:
+                future.set_exception(ShardError(f"分片 {self.shard}: 分片进程已退出"))
+                return future
+            self._pending[request_id] = future
+        try:
+            with self._send_lock:
+                self.connection.send((request_id, queries, k, allowed))
+        except (OSError, ValueError) as e:
+            with self._pending_lock:
+                unanswered = self._pending.pop(request_id, None)
+            if unanswered is not None:
+                unanswered.set_exception(ShardError(f"分片 {self.shard}: {e}"))
+        return future
+
+    def _read_replies(self) -> None:
+        while True:
+            try:
+                request_id, result = self.connection.recv()
+            except (EOFError, OSError):
+                break
+            with self._pending_lock:
+                future = self._pending.pop(request_id, None)
+            if future is None:
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(ShardError(f"分片 {self.shard}: {result}"))
+            else:
+                future.set_result(result)
+
+        with self._pending_lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(ShardError(f"分片 {self.shard}: 分片进程意外退出"))
+
+    def close(self) -> None:
+        """通知分片进程退出（它关闭管道后读取线程随之结束），超时则终止"""
+        try:
+            with self._send_lock:
+                self.connection.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5)
+        self.connection.close()
+
+
+def _shutdown(channels: List[_ShardChannel]) -> None:
+    for channel in channels:
+        channel.close()
+
+
+class ShardedSearcher:
+    """分片检索协调者
+
+    每个分片一个工作进程（spawn启动，内存映射各自的分片文件），
+    查询向量分发给相关分片并行检索，合并各分片的top-k后返回全局位置，
+    调用方式与faiss的index.search相同。多个线程的检索可以同时在途，
+    每个分片进程内也由线程池并发处理（SHARD_WORKER_CONCURRENCY）。
+    构造时等待全部分片进程加载完成，任一分片加载失败时停止已启动的进程并抛出ShardError。
+    检索出错时等所有分片都回复后再抛出ShardError（调用方改用进程内检索），
+    退出的分片进程在下次检索前重新启动，重启失败后不再尝试。
+
+    分片进程属于创建它的进程：多worker部署时每个worker各自启动一组（worker数×分片数个进程），
+    协调进程仍内存映射完整索引以便回退（未访问的页不占内存，页缓存在进程间共享）。
+    """
+
+    def __init__(self, directory: str, info: Dict[str, Any], threads: Optional[int] = None,
+                 concurrency: Optional[int] = None):
+        self.count = info["count"]
+        self.strategy = info["strategy"]
+        self._shard_dir = os.path.join(directory, info["dir"])
+        self._threads = threads or CONFIG["SHARD_WORKER_THREADS"]
+        self._concurrency = concurrency or CONFIG["SHARD_WORKER_CONCURRENCY"]
+        self._context = multiprocessing.get_context("spawn")
+        self._positions: List[np.ndarray] = []
+        self._channels: List[_ShardChannel] = []
+        self._request_ids = itertools.count()
+        self._broken: Optional[str] = None
+        self._restart_lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, _shutdown, self._channels)
+
+        try:
+            for shard in range(self.count):
+                self._positions.append(np.load(os.path.join(self._shard_dir, f"shard_{shard}.npy")))
+                self._channels.append(self._start(shard))
+            for channel in self._channels:
+                channel.wait_ready()
+        except Exception:
+            self.close()
+            raise
+
+    def _start(self, shard: int) -> _ShardChannel:
+        return _ShardChannel(self._context, shard, self._shard_dir, self._threads, self._concurrency)
+
+    def _restart_dead(self, shards: List[int]) -> None:
+        """重新启动本次检索用到的、已退出的分片进程"""
+        with self._restart_lock:
+            if not self._finalizer.alive:
+                raise ShardError("分片检索已关闭")
+            if self._broken is not None:
+                raise ShardError(self._broken)
+            for shard in shards:
+                channel = self._channels[shard]
+                if channel.alive():
+                    continue
+                print(f"索引分片 {shard} 的进程已退出（exitcode={channel.process.exitcode}），重新启动")
+                channel.close()
+                try:
+                    self._channels[shard] = self._start(shard)
+                    self._channels[shard].wait_ready()
+                except Exception as e:
+                    self._broken = f"分片 {shard} 重启失败: {e}"
+                    raise ShardError(self._broken) from e
+
+    def close(self) -> None:
+        """停止分片进程（正在进行的检索以ShardError结束）"""
+        # 与重启互斥，避免关闭时漏掉刚启动的进程
+        with self._restart_lock:
+            self._finalizer()
+
+    def search(self, queries: np.ndarray, k: int,
+               positions: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        分发检索并合并结果
+
+        Args:
+            queries: 查询向量矩阵
+            k: 返回数量
+            positions: 只在这些全局位置中检索（分类分区），None表示不限定
+
+        Returns:
+            (距离矩阵, 全局位置矩阵)，距离越小越相似
+
+        Raises:
+            ShardError: 有分片检索出错、进程退出或重启失败
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        targets = []
+        for shard in range(self.count):
+            allowed = None
+            if positions is not None:
+                allowed = np.intersect1d(positions, self._positions[shard], assume_unique=True)
+                if not len(allowed):
+                    # 按分类分片时，限定分类的查询只会落到少数分片
+                    continue
+            if len(self._positions[shard]):
+                targets.append((shard, allowed))
+
+        self._restart_dead([shard for shard, _ in targets])
+        futures = [(shard, self._channels[shard].submit(next(self._request_ids), queries, k, allowed))
+                   for shard, allowed in targets]
+        results = []
+        errors = []
+        for shard, future in futures:
+            try:
+                results.append(future.result())
+            except ShardError as e:
+                errors.append(str(e))
+        if errors:
+            raise ShardError("; ".join(errors))
+
+        if not results:
+            return (np.full((len(queries), k), np.inf, dtype=np.float32),
+                    np.full((len(queries), k), -1, dtype=np.int64))
+        distances = np.hstack([d for d, _ in results])
+        labels = np.hstack([i for _, i in results])
+        distances = np.where(labels >= 0, distances, np.inf)
+        order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(distances, order, axis=1), np.take_along_axis(labels, order, axis=1)
+
+
+def open_sharded_searcher(directory: str) -> Optional[ShardedSearcher]:
+    """按shards.json启动分片检索；未启用分片、分片与配置不符或分片进程启动失败时返回None（进程内检索）"""
+    if CONFIG["INDEX_SHARDS"] <= 1:
+        return None
+    info = load_shard_info(directory)
+    if not shards_match(info):
+        return None
+    try:
+        return ShardedSearcher(directory, info)
+    except (ShardError, OSError) as e:
+        print(f"启动索引分片失败，使用进程内检索: {e}")
+        return None
+
+
+def shards_match(info: Optional[Dict[str, Any]]) -> bool:
+    """现有分片是否与INDEX_SHARDS/INDEX_SHARD_BY配置一致"""
+    return (info is not None and info["count"] == CONFIG["INDEX_SHARDS"]
+            and info["strategy"] == CONFIG["INDEX_SHARD_BY"])
@@ -0,0 +1,156 @@
+"""稀疏索引模块 - 基于jieba分词的倒排索引和BM25打分"""
+
+import os
+import math
+from collections import Counter, defaultdict
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+from .tokenizer import search_terms
+
+SPARSE_INDEX_FILE = "sparse_index.npz"
+
+# BM25参数
+_K1 = 1.2
+_B = 0.75
+# 单篇文档内的词频上限（uint16存储）
+_MAX_TF = np.iinfo(np.uint16).max
+
+
+def _pack_strings(values: Sequence[str]) -> np.ndarray:
+    """把字符串列表编码成一个字节数组（以换行分隔，词项不含空白）"""
+    return np.frombuffer("\n".join(values).encode("utf-8"), dtype=np.uint8)
+
+
+def _unpack_strings(blob: np.ndarray) -> List[str]:
+    text = blob.tobytes().decode("utf-8")
+    return text.split("\n") if text else []
+
+
+class SparseIndex:
+    """倒排索引：按词项排序的CSR结构
+
+    offsets[i]:offsets[i+1] 是第i个词项的倒排表，
+    倒排表中存文档序号和词频，文档序号对应 doc_ids 中的docstore id。
+    按向量位置顺序构建时，文档序号就是FAISS中的向量位置。
+    """
+
+    def __init__(self, terms: List[str], doc_ids: List[str], offsets: np.ndarray,
+                 postings: np.ndarray, frequencies: np.ndarray, doc_lengths: np.ndarray):
+        self.terms = terms
+        self.doc_ids = doc_ids
+        self.offsets = offsets
+        self.postings = postings
+        self.frequencies = frequencies
+        self.doc_lengths = doc_lengths
+        self._term_ids = {term: i for i, term in enumerate(terms)}
+        self._avg_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[str, Document]]) -> "SparseIndex":
+        """
+        从 (docstore id, 文档) 序列构建倒排索引
+
+        Args:
+            documents: 与向量库docstore一致的文档序列
+        """
+        postings = defaultdict(list)
+        doc_ids, doc_lengths = [], []
+        for doc_id, doc in documents:
+            counts = Counter(search_terms(doc.page_content))
+            doc_number = len(doc_ids)
+            doc_ids.append(doc_id)
+            doc_lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                postings[term].append((doc_number, min(count, _MAX_TF)))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        for i, term in enumerate(terms):
+            offsets[i + 1] = offsets[i] + len(postings[term])
+        flat = [entry for term in terms for entry in postings[term]]
+        postings_array = np.array([doc for doc, _ in flat], dtype=np.int32)
+        frequencies = np.array([count for _, count in flat], dtype=np.uint16)
+        return cls(terms, doc_ids, offsets, postings_array, frequencies,
+                   np.array(doc_lengths, dtype=np.int32))
+
+    def save(self, directory: str) -> None:
+        """写入倒排文件（先写临时文件再原子替换）"""
+        path = os.path.join(directory, SPARSE_INDEX_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                terms=_pack_strings(self.terms),
+                doc_ids=_pack_strings(self.doc_ids),
+                offsets=self.offsets,
+                postings=self.postings,
+                frequencies=self.frequencies,
+                doc_lengths=self.doc_lengths,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["SparseIndex"]:
+        """读取倒排文件，不存在或损坏时返回None"""
+        path = os.path.join(directory, SPARSE_INDEX_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                return cls(
+                    _unpack_strings(data["terms"]),
+                    _unpack_strings(data["doc_ids"]),
+                    data["offsets"],
+                    data["postings"],
+                    data["frequencies"],
+                    data["doc_lengths"],
+                )
+        except (OSError, KeyError, ValueError) as e:
+            print(f"读取稀疏索引失败: {e}")
+            return None
+
+    def known_terms(self, terms: Iterable[str]) -> List[str]:
+        """过滤出索引中出现过的词项"""
+        return [term for term in terms if term in self._term_ids]
+
+    def search(self, query: str, k: int, positions: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """按BM25检索，返回 [(docstore id, 分数)]，分数从高到低"""
+        return self.search_terms(search_terms(query), k, positions)
+
+    def search_terms(self, terms: Sequence[str], k: int,
+                     positions: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """对已分好的词项检索，positions不为None时只在这些文档序号中取top-k"""
+        if not len(self) or k <= 0:
+            return []
+
+        scores = np.zeros(len(self), dtype=np.float32)
+        total = len(self)
+        for term, query_count in Counter(terms).items():
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.postings[start:end]
+            tf = self.frequencies[start:end].astype(np.float32)
+            df = end - start
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            norm = _K1 * (1 - _B + _B * self.doc_lengths[docs] / self._avg_length)
+            scores[docs] += query_count * idf * tf * (_K1 + 1) / (tf + norm)
+
+        if positions is not None:
+            allowed = np.zeros(len(self), dtype=bool)
+            allowed[positions[positions < len(self)]] = True
+            scores[~allowed] = 0
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(self.doc_ids[i], float(scores[i])) for i in matched]
@@ -0,0 +1,41 @@
+"""分词模块 - 意图识别词汇表和稀疏检索共用的jieba分词"""
+
+import re
+import logging
+from typing import List
+
+import jieba
+
+logger = logging.getLogger(__name__)
+
+# 检索时忽略的高频虚词和问句用语（不影响意图识别的分词结果）
+_STOPWORDS = frozenset([
+    "的", "了", "是", "吗", "呢", "吧", "啊", "和", "与", "及", "或", "在", "有", "也", "都", "就",
+    "我", "你", "他", "她", "它", "我们", "你们", "这", "那", "这个", "那个", "一个", "一些",
+    "什么", "怎么", "怎样", "如何", "哪些", "哪个", "为什么", "是否", "有没有", "可以", "能",
+    "关于", "一下", "请问", "请", "介绍", "博主", "文章", "写", "过", "么",
+])
+
+# 只由空白或标点组成的词
+_PUNCTUATION = re.compile(r"^[\s\W_]+$", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """中文分词"""
+    try:
+        # 使用jieba分词，启用HMM以提高分词准确性
+        return list(jieba.cut(text, HMM=True))
+    except Exception as e:
+        logger.warning(f"jieba分词失败: {e}，使用简单分词")
+        # 回退到简单分词：按字符分割
+        return [char for char in text if char.strip()]
+
+
+def search_terms(text: str) -> List[str]:
+    """检索用的词项：小写化，去掉标点和停用词（保留重复，用于统计词频）"""
+    terms = []
+    for token in tokenize(text.lower()):
+        token = token.strip()
+        if token and token not in _STOPWORDS and not _PUNCTUATION.match(token):
+            terms.append(token)
+    return terms
@@ -1,93 +1,540 @@
-"""向量数据库管理模块 - 处理FAISS向量数据库的创建、加载和更新"""
-
-import os
-from typing import Optional
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain.schema import Document
-
-from .config import CONFIG
-from .document_loader import load_documents
-
-
-
-def initialize_vectorstore() -> FAISS:
-    """初始化或加载向量数据库"""
-    embeddings = _get_embeddings()
-    
-    if _vectorstore_exists():
-        vectorstore = _load_existing_vectorstore(embeddings)
-        _update_vectorstore_if_needed(vectorstore)
-        return vectorstore
-    else:
-        return _create_new_vectorstore(embeddings)
-
-def _get_embeddings() -> HuggingFaceEmbeddings:
-    """获取嵌入模型"""
-    return HuggingFaceEmbeddings(
-        model_name=CONFIG["MODEL_DIR"],
-        model_kwargs={"device": "cpu"},
-        encode_kwargs={"normalize_embeddings": True}
-    )
-
-def _vectorstore_exists() -> bool:
-    """检查向量数据库是否存在"""
-    return os.path.exists(CONFIG["VECTORSTORE_PATH"]) and os.path.isdir(CONFIG["VECTORSTORE_PATH"])
-
-def _load_existing_vectorstore(embeddings: HuggingFaceEmbeddings) -> FAISS:
-    """加载现有的向量数据库"""
-    try:
-        vectorstore = FAISS.load_local(
-            CONFIG["VECTORSTORE_PATH"], 
-            embeddings, 
-            allow_dangerous_deserialization=True
-        )
-        print("成功加载现有向量数据库")
-        return vectorstore
-    except Exception:
-        print("向量数据库损坏，重建中...")
-        return None
-
-def _update_vectorstore_if_needed(vectorstore: FAISS) -> None:
-    """检查并更新向量数据库（如果需要）"""
-    data = load_documents()
-    
-    existing_files = {doc.metadata['source'] for doc in vectorstore.docstore._dict.values()}
-    current_files = {doc.metadata['source'] for doc in data}
-    new_files = current_files - existing_files
-    modified_files = set()
-
-    # 检查修改的文件
-    for doc in data:
-        source = doc.metadata['source']
-        if source in existing_files:
-            existing_doc = next(d for d in vectorstore.docstore._dict.values() 
-                               if d.metadata['source'] == source)
-            if doc.metadata['last_modified'] > existing_doc.metadata.get('last_modified', 0):
-                modified_files.add(source)
-    
-    # 如果有新文件或修改的文件，进行更新
-    if new_files or modified_files:
-        updated_docs = [doc for doc in data 
-                       if doc.metadata['source'] in (new_files | modified_files)]
-        vectorstore.add_documents(updated_docs)
-        print(f"🆕 增量更新 {len(updated_docs)} 个文档片段")
-        vectorstore.save_local(CONFIG["VECTORSTORE_PATH"])
-    else:
-        print("⏩ 未检测到文件变更，无需更新")
-
-def _create_new_vectorstore(embeddings: HuggingFaceEmbeddings) -> FAISS:
-    """创建新的向量数据库"""
-    from langchain.indexes import VectorstoreIndexCreator
-    
-    data = load_documents()
-    
-    index_creator = VectorstoreIndexCreator(
-        embedding=embeddings,
-        vectorstore_cls=FAISS,
-    )
-    index = index_creator.from_documents(data)
-    vectorstore = index.vectorstore
-    vectorstore.save_local(CONFIG["VECTORSTORE_PATH"])
-    print(f"已创建新的向量数据库，包含 {len(vectorstore.index_to_docstore_id)} 个文档")
-    return vectorstore
+"""向量数据库管理模块 - 处理FAISS向量数据库的创建、加载和更新"""
+
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import weakref
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Optional, Callable, List, Dict, Any, Iterator, Tuple
+import faiss
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+from langchain.schema import Document
+
+from .config import CONFIG
+from .document_loader import load_documents, iter_documents, list_markdown_files, evict_parsed
+from .embeddings import create_embeddings, BatchedEmbeddings, CachedEmbeddings
+from .index_builder import add_documents_batched, build_vectorstore
+from .ann_index import apply_search_params, supports_removal, rebuild_without_positions, describe_index
+from .disk_docstore import SqliteDocstore, SqliteIdMap, save_docstore
+from .sparse_index import SparseIndex
+from .partitions import CategoryPartitions
+from .sharding import assign_shards, write_shards, remove_shards, load_shard_info, shards_match
+
+try:
+    import fcntl
+except ImportError:
+    # Windows没有fcntl，只有进程内的锁，只支持单进程部署
+    fcntl = None
+
+_INDEX_FILE = "index.faiss"
+# 每次保存都写入一个新的版本目录（v_<代号>），写完后原子替换指针文件切换到新版本：
+# 索引、文档库、稀疏索引、分类分区、分片和文件清单总是来自同一次保存
+_POINTER_FILE = "current.json"
+_VERSION_PREFIX = "v_"
+# 文件清单：记录每个源文件的大小、修改时间、内容哈希和对应的docstore id，以及建索引时的分块参数，用于增量更新
+_MANIFEST_FILE = "manifest.json"
+_MANIFEST_VERSION = 3
+# 旧格式的索引文件（版本目录之前直接写在VECTORSTORE_PATH下），重建后删除
+_LEGACY_FILES = {_INDEX_FILE, "index.pkl", _MANIFEST_FILE, "docstore.sqlite", "sparse_index.npz",
+                 "partitions.json", "shards.json"}
+# 写锁文件：多个worker中同一时间只有一个构建或修改索引
+_LOCK_FILE = "index.lock"
+_writer_lock = threading.Lock()
+# 索引代号：每次索引内容变化时更新，供缓存作为键的一部分（保存在指针文件中）
+_index_generation: Optional[str] = None
+# 上次读取时指针文件的修改时间，其他进程（worker）更新索引后随之变化
+_pointer_mtime: Optional[int] = None
+_index_listeners: List[Callable[[str], None]] = []
+_embeddings: Optional[Embeddings] = None
+# 已加载的向量库 -> (版本目录, 索引代号)
+_loaded_versions: "weakref.WeakKeyDictionary[FAISS, Tuple[str, str]]" = weakref.WeakKeyDictionary()
+
+
+def _read_pointer() -> Optional[Dict[str, str]]:
+    """读取指针文件 {"dir": 版本目录名, "generation": 索引代号}，不存在时返回None"""
+    try:
+        with open(os.path.join(CONFIG["VECTORSTORE_PATH"], _POINTER_FILE), 'r', encoding='utf-8') as f:
+            pointer = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not os.path.isdir(os.path.join(CONFIG["VECTORSTORE_PATH"], pointer.get("dir", ""))):
+        return None
+    return pointer
+
+def current_index_dir() -> Optional[str]:
+    """当前版本目录的路径，还没有索引时返回None"""
+    pointer = _read_pointer()
+    return os.path.join(CONFIG["VECTORSTORE_PATH"], pointer["dir"]) if pointer else None
+
+def get_index_directory(vectorstore: FAISS) -> Optional[str]:
+    """向量库所属的版本目录（稀疏索引、分类分区和分片从这里加载）"""
+    version = _loaded_versions.get(vectorstore)
+    return version[0] if version else current_index_dir()
+
+def get_vectorstore_generation(vectorstore: FAISS) -> str:
+    """向量库对应的索引代号"""
+    version = _loaded_versions.get(vectorstore)
+    return version[1] if version else get_index_generation()
+
+def get_index_generation() -> str:
+    """获取当前索引代号
+
+    每次调用检查指针文件的修改时间，其他worker更新索引后重新读取并通知监听者，
+    各worker的缓存键随之一致。还没有索引时使用进程内的临时代号。
+    """
+    global _index_generation, _pointer_mtime
+    try:
+        mtime = os.stat(os.path.join(CONFIG["VECTORSTORE_PATH"], _POINTER_FILE)).st_mtime_ns
+    except OSError:
+        mtime = None
+    
+    if mtime is not None and mtime != _pointer_mtime:
+        pointer = _read_pointer()
+        if pointer is not None:
+            _pointer_mtime = mtime
+            previous, _index_generation = _index_generation, pointer["generation"]
+            if previous is not None and previous != _index_generation:
+                _notify_index_listeners(_index_generation)
+    
+    if _index_generation is None:
+        _index_generation = uuid.uuid4().hex
+    return _index_generation
+
+def add_index_listener(callback: Callable[[str], None]) -> None:
+    """注册索引更新回调，参数为新的索引代号"""
+    _index_listeners.append(callback)
+
+def _notify_index_listeners(generation: str) -> None:
+    for callback in _index_listeners:
+        try:
+            callback(generation)
+        except Exception as e:
+            print(f"索引更新回调失败: {e}")
+
+@contextmanager
+def _index_writer_lock():
+    """跨进程的索引写锁（flock），持有期间其他worker的构建、更新和切换版本都会等待"""
+    root = CONFIG["VECTORSTORE_PATH"]
+    os.makedirs(root, exist_ok=True)
+    with _writer_lock, open(os.path.join(root, _LOCK_FILE), 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _publish_version(name: str, generation: str) -> None:
+    """原子替换指针文件切换到新版本目录，通知监听者，并删除更早的版本目录
+    
+    上一个版本保留到下次切换：其他worker在重新加载前仍可能从中打开文件。
+    """
+    global _index_generation, _pointer_mtime
+    root = CONFIG["VECTORSTORE_PATH"]
+    previous = _read_pointer()
+    path = os.path.join(root, _POINTER_FILE)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump({"dir": name, "generation": generation}, f)
+    os.replace(path + ".tmp", path)
+    _index_generation = generation
+    _pointer_mtime = os.stat(path).st_mtime_ns
+    _notify_index_listeners(generation)
+    
+    keep = {name, previous["dir"] if previous else None}
+    for entry in os.listdir(root):
+        if entry.startswith(_VERSION_PREFIX) and entry not in keep:
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+
+
+def initialize_vectorstore() -> FAISS:
+    """初始化或加载向量数据库
+    
+    在索引写锁下进行：多个worker同时启动时只有第一个构建或更新索引，
+    其余的等它完成后直接加载，检查文件变更时已没有需要更新的内容。
+    """
+    embeddings = _get_embeddings()
+    
+    with _index_writer_lock():
+        if _vectorstore_exists():
+            vectorstore = _load_existing_vectorstore(embeddings)
+            if vectorstore is not None:
+                _backfill_shards(vectorstore)
+                return _update_vectorstore_if_needed(vectorstore)
+        elif os.path.exists(os.path.join(CONFIG["VECTORSTORE_PATH"], _INDEX_FILE)):
+            print("🔄 索引目录为旧格式（没有版本目录），重新构建向量数据库")
+            vectorstore = _create_new_vectorstore(embeddings)
+            _remove_legacy_files()
+            return vectorstore
+        return _create_new_vectorstore(embeddings)
+
+def _remove_legacy_files() -> None:
+    """删除旧格式（直接存放在VECTORSTORE_PATH下）的索引文件，重建后它们不会再被读取"""
+    root = CONFIG["VECTORSTORE_PATH"]
+    for entry in os.listdir(root):
+        path = os.path.join(root, entry)
+        if entry in _LEGACY_FILES:
+            os.remove(path)
+        elif entry.startswith("shards_") and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+def index_outdated(vectorstore: FAISS) -> bool:
+    """当前版本是否已不是该向量库所属的版本（其他worker已更新索引）"""
+    return get_index_generation() != get_vectorstore_generation(vectorstore)
+
+def _get_embeddings() -> Embeddings:
+    """获取嵌入模型（进程内只加载一次）
+
+    启用微批处理时并发的查询嵌入合并计算；启用查询缓存时重复的问题直接复用向量。
+    """
+    global _embeddings
+    if _embeddings is None:
+        embeddings = create_embeddings()
+        if CONFIG["EMBED_MICRO_BATCH_ENABLED"]:
+            embeddings = BatchedEmbeddings(embeddings)
+        if CONFIG["QUERY_CACHE_ENABLED"]:
+            embeddings = CachedEmbeddings(embeddings, f"{CONFIG['MODEL_DIR']}:{CONFIG['EMBEDDING_BACKEND']}")
+        _embeddings = embeddings
+    return _embeddings
+
+def _vectorstore_exists() -> bool:
+    """检查向量数据库是否存在"""
+    return _read_pointer() is not None
+
+def _load_existing_vectorstore(embeddings: Embeddings, mode: Optional[str] = None,
+                               pointer: Optional[Dict[str, str]] = None) -> Optional[FAISS]:
+    """加载现有的向量数据库
+    
+    Args:
+        embeddings: 嵌入模型
+        mode: mmap - 索引以只读方式内存映射，文档只在命中时从SQLite读取，多个worker共享页缓存；
+              memory - 索引和文档全部读入内存，可以修改。为None时使用VECTORSTORE_LOAD_MODE
+        pointer: 要加载的版本（_read_pointer的结果），为None时加载当前版本
+    """
+    mode = mode or CONFIG["VECTORSTORE_LOAD_MODE"]
+    try:
+        pointer = pointer or _read_pointer()
+        path = os.path.join(CONFIG["VECTORSTORE_PATH"], pointer["dir"])
+        if mode == "mmap":
+            index = faiss.read_index(os.path.join(path, _INDEX_FILE),
+                                     faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+            docstore = SqliteDocstore(path)
+            index_to_docstore_id = SqliteIdMap(path)
+        else:
+            index = faiss.read_index(os.path.join(path, _INDEX_FILE))
+            docstore = InMemoryDocstore(dict(SqliteDocstore(path).iter_documents()))
+            index_to_docstore_id = dict(SqliteIdMap(path).items())
+        
+        vectorstore = FAISS(
+            embedding_function=embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id,
+        )
+        _loaded_versions[vectorstore] = (path, pointer["generation"])
+        apply_search_params(vectorstore.index)
+        print(f"成功加载现有向量数据库({mode}): {describe_index(vectorstore.index)}")
+        return vectorstore
+    except Exception as e:
+        print(f"向量数据库损坏，重建中... ({e})")
+        return None
+
+def _pointer_of(vectorstore: FAISS) -> Optional[Dict[str, str]]:
+    """向量库所属版本对应的指针内容（不是从磁盘加载的向量库返回None，即当前版本）"""
+    version = _loaded_versions.get(vectorstore)
+    return {"dir": os.path.basename(version[0]), "generation": version[1]} if version else None
+
+def _is_read_only(vectorstore: FAISS) -> bool:
+    """mmap模式加载的向量库不能修改"""
+    return isinstance(vectorstore.docstore, SqliteDocstore)
+
+def _open_for_serving(vectorstore: FAISS) -> FAISS:
+    """保存后按配置的加载模式重新打开（mmap模式下释放内存副本）"""
+    if CONFIG["VECTORSTORE_LOAD_MODE"] != "mmap":
+        return vectorstore
+    reopened = _load_existing_vectorstore(vectorstore.embedding_function, mode="mmap",
+                                          pointer=_pointer_of(vectorstore))
+    return reopened if reopened is not None else vectorstore
+
+def _iter_docstore(vectorstore: FAISS) -> Iterator[Tuple[str, Document]]:
+    """遍历向量库中的全部文档"""
+    if isinstance(vectorstore.docstore, SqliteDocstore):
+        return vectorstore.docstore.iter_documents()
+    return iter(vectorstore.docstore._dict.items())
+
+def _iter_by_position(vectorstore: FAISS) -> Iterator[Tuple[str, Document]]:
+    """按向量位置顺序遍历 (docstore id, 文档)"""
+    for position in range(len(vectorstore.index_to_docstore_id)):
+        doc_id = vectorstore.index_to_docstore_id[position]
+        yield doc_id, vectorstore.docstore.search(doc_id)
+
+def _write_search_files(vectorstore: FAISS, path: str) -> None:
+    """写入稀疏倒排索引和分类分区（文档序号与向量位置一致）"""
+    SparseIndex.build(_iter_by_position(vectorstore)).save(path)
+    CategoryPartitions.build(doc for _, doc in _iter_by_position(vectorstore)).save(path)
+
+def _write_shards(vectorstore: FAISS, path: str) -> None:
+    """按INDEX_SHARDS拆分索引；不分片时删除旧的分片"""
+    count = CONFIG["INDEX_SHARDS"]
+    if count <= 1:
+        remove_shards(path)
+        return
+    strategy = CONFIG["INDEX_SHARD_BY"]
+    assignment = assign_shards((doc.metadata for _, doc in _iter_by_position(vectorstore)), count, strategy)
+    index = vectorstore.index
+    if _is_read_only(vectorstore):
+        # 内存映射的索引不能克隆后清空，拆分时读入一份内存副本
+        index = faiss.read_index(os.path.join(path, _INDEX_FILE))
+    write_shards(path, index, assignment, count, strategy)
+
+def _backfill_shards(vectorstore: FAISS) -> None:
+    """已有版本的分片与INDEX_SHARDS/INDEX_SHARD_BY不一致时补写分片
+    
+    只在索引写锁下调用，同一时间只有一个worker写分片。失败时只是不启用分片检索，不影响向量库本身。
+    """
+    path = get_index_directory(vectorstore)
+    if CONFIG["INDEX_SHARDS"] <= 1 or shards_match(load_shard_info(path)):
+        return
+    try:
+        _write_shards(vectorstore, path)
+    except Exception as e:
+        print(f"写入索引分片失败，使用进程内检索: {e}")
+
+def _write_vectorstore_files(vectorstore: FAISS, path: str) -> None:
+    """在新的版本目录中写入索引文件、SQLite文档库、稀疏倒排索引、分类分区和索引分片"""
+    os.makedirs(path, exist_ok=True)
+    save_docstore(path, _iter_docstore(vectorstore), vectorstore.index_to_docstore_id)
+    _write_search_files(vectorstore, path)
+    faiss.write_index(vectorstore.index, os.path.join(path, _INDEX_FILE))
+    _write_shards(vectorstore, path)
+
+def _load_manifest(directory: str) -> Optional[Dict[str, Any]]:
+    """加载版本目录中的文件清单，不存在或版本不符时返回None"""
+    path = os.path.join(directory, _MANIFEST_FILE)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != _MANIFEST_VERSION:
+        return None
+    return manifest
+
+def _save_manifest(manifest: Dict[str, Any], directory: str) -> None:
+    """原子地写入文件清单"""
+    path = os.path.join(directory, _MANIFEST_FILE)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+def _hash_file(path: str) -> str:
+    """计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _fingerprint_file(path: str) -> Dict[str, Any]:
+    """记录文件的大小、修改时间和内容哈希"""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": _hash_file(path)}
+
+def _detect_changes(indexed_files: Dict[str, Dict[str, Any]]):
+    """对比博客目录与文件清单，返回 (新增, 修改, 删除, 清单是否需要回写)
+    
+    大小和修改时间都没变的文件直接跳过；只有stat变化时才计算哈希，
+    内容没变（例如只是touch过）的文件只更新清单中的stat，不重新解析。
+    """
+    current_files = list_markdown_files()
+    new_files, modified_files = set(), set()
+    manifest_dirty = False
+    
+    for path in current_files:
+        entry = indexed_files.get(path)
+        if entry is None:
+            new_files.add(path)
+            continue
+        
+        stat = os.stat(path)
+        if entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime:
+            continue
+        
+        fingerprint = _fingerprint_file(path)
+        if fingerprint["sha256"] == entry.get("sha256") or (
+                "sha256" not in entry and stat.st_mtime <= entry["last_modified"]):
+            # 内容未变化，或旧清单中尚无哈希且文件未在建索引后修改
+            entry.update(fingerprint)
+            manifest_dirty = True
+        else:
+            modified_files.add(path)
+    
+    deleted_files = set(indexed_files) - set(current_files)
+    return new_files, modified_files, deleted_files, manifest_dirty
+
+def _chunk_settings() -> Dict[str, int]:
+    """当前的分块参数，与清单中记录的不同时已有片段需要全部重新切分"""
+    return {"max_tokens": CONFIG["CHUNK_MAX_TOKENS"], "overlap_tokens": CONFIG["CHUNK_OVERLAP_TOKENS"]}
+
+def _build_manifest_from_docstore(vectorstore: FAISS) -> Dict[str, Any]:
+    """从docstore一次遍历生成新建索引的文件清单"""
+    files: Dict[str, Dict[str, Any]] = {}
+    for doc_id, doc in _iter_docstore(vectorstore):
+        source = doc.metadata['source']
+        entry = files.setdefault(source, {"ids": [], "last_modified": 0})
+        entry["ids"].append(doc_id)
+        entry["last_modified"] = max(entry["last_modified"], doc.metadata.get('last_modified', 0))
+    return {"version": _MANIFEST_VERSION, "chunking": _chunk_settings(), "files": files}
+
+def _fingerprint_manifest(manifest: Dict[str, Any]) -> Dict[str, Any]:
+    """为清单中的每个文件补充大小、修改时间和内容哈希"""
+    for source, entry in manifest["files"].items():
+        if os.path.exists(source):
+            entry.update(_fingerprint_file(source))
+    return manifest
+
+def _save_vectorstore(vectorstore: FAISS, manifest: Dict[str, Any]) -> None:
+    """把向量数据库和文件清单写入新的版本目录，再切换指针（新的索引代号）"""
+    generation = uuid.uuid4().hex
+    name = f"{_VERSION_PREFIX}{generation[:12]}"
+    path = os.path.join(CONFIG["VECTORSTORE_PATH"], name)
+    _write_vectorstore_files(vectorstore, path)
+    _save_manifest(manifest, path)
+    _loaded_versions[vectorstore] = (path, generation)
+    _publish_version(name, generation)
+
+def _delete_documents(vectorstore: FAISS, ids: List[str]) -> None:
+    """从向量库删除指定文档；IVF和HNSW索引改为用剩余向量重建"""
+    if supports_removal(vectorstore.index):
+        vectorstore.delete(ids)
+        return
+    
+    id_set = set(ids)
+    positions = [position for position, doc_id in vectorstore.index_to_docstore_id.items() if doc_id in id_set]
+    vectorstore.index = rebuild_without_positions(vectorstore.index, positions)
+    vectorstore.docstore.delete(ids)
+    remaining = [doc_id for _, doc_id in sorted(vectorstore.index_to_docstore_id.items()) if doc_id not in id_set]
+    vectorstore.index_to_docstore_id = dict(enumerate(remaining))
+
+def refresh_vectorstore(current: FAISS) -> Optional[FAISS]:
+    """在影子副本上增量更新向量库，供运行中热更新使用
+    
+    当前向量库不会被修改，正在进行的查询不受影响。在索引写锁下进行，
+    只有一个worker重建；其他worker拿到锁时若当前版本已不是自己加载的版本，
+    直接加载该版本（再检查是否还有新的变更），不会对着已更新的清单误判为没有变化。
+    
+    Returns:
+        Optional[FAISS]: 更新后的新向量库；没有文件变更且没有新版本时返回None
+    """
+    with _index_writer_lock():
+        base = current
+        pointer = _read_pointer()
+        if pointer is not None and pointer["generation"] != get_vectorstore_generation(current):
+            latest = _load_existing_vectorstore(current.embedding_function, pointer=pointer)
+            if latest is not None:
+                print("🔄 索引已由其他进程更新，加载新版本")
+                _backfill_shards(latest)
+                base = latest
+        updated = _update_vectorstore_if_needed(base, copy_on_write=True)
+        return None if updated is current else updated
+
+def _update_vectorstore_if_needed(vectorstore: FAISS, copy_on_write: bool = False) -> FAISS:
+    """检查并增量更新向量数据库（如果需要），返回更新后的向量库
+    
+    新增文件直接插入；修改的文件先删除旧向量再插入；已删除的文件移除其向量。
+    没有变更时原样返回传入的向量库。
+    
+    Args:
+        vectorstore: 当前向量库
+        copy_on_write: 为True时从磁盘加载一份副本进行修改，不改动传入的向量库
+    """
+    directory = get_index_directory(vectorstore)
+    manifest = _load_manifest(directory)
+    if manifest is None or manifest.get("chunking") != _chunk_settings():
+        # 没有清单的旧索引无法得知分块参数；参数变化后增量更新会混用新旧两种片段，都整体重建
+        print("🔄 分块参数已变化或索引缺少文件清单，重新构建向量数据库")
+        return _create_new_vectorstore(vectorstore.embedding_function)
+    indexed_files = manifest["files"]
+    
+    new_files, modified_files, deleted_files, manifest_dirty = _detect_changes(indexed_files)
+    
+    if not (new_files or modified_files or deleted_files):
+        if manifest_dirty:
+            _save_manifest(manifest, directory)
+        print("⏩ 未检测到文件变更，无需更新")
+        return vectorstore
+    
+    # 只解析新增和修改的文件
+    data = load_documents(sorted(new_files | modified_files)) if (new_files or modified_files) else []
+    docs_by_source: Dict[str, List[Document]] = defaultdict(list)
+    for doc in data:
+        docs_by_source[doc.metadata['source']].append(doc)
+    
+    stale_ids = [doc_id for source in modified_files | deleted_files
+                 for doc_id in indexed_files[source]["ids"]]
+    # 变更的文件都没有片段（空文件、解析失败）时索引内容不变，只需更新清单
+    changes_index = bool(stale_ids or data)
+    original = vectorstore
+    
+    if changes_index and (copy_on_write or _is_read_only(vectorstore)):
+        # mmap模式加载的索引只读；热更新时不能改动正在服务的向量库。两种情况都完整读入一份内存副本再修改
+        shadow = _load_existing_vectorstore(vectorstore.embedding_function, mode="memory",
+                                            pointer=_pointer_of(vectorstore))
+        if shadow is None:
+            print("加载向量库副本失败，跳过本次更新")
+            return vectorstore
+        vectorstore = shadow
+    
+    # 删除修改文件和已删除文件的旧向量
+    if stale_ids:
+        _delete_documents(vectorstore, stale_ids)
+    stale_hashes = {indexed_files[source].get("sha256") for source in modified_files | deleted_files}
+    for source in deleted_files:
+        del indexed_files[source]
+    
+    # 插入新增和修改文件的向量
+    updated_docs = []
+    updated_ids = []
+    for source in new_files | modified_files:
+        docs = docs_by_source.get(source, [])
+        ids = [str(uuid.uuid4()) for _ in docs]
+        updated_docs.extend(docs)
+        updated_ids.extend(ids)
+        # 没有片段的文件（内容为空或解析失败）也记录指纹，内容变化前不再当作变更反复处理
+        indexed_files[source] = {
+            "ids": ids,
+            "last_modified": os.path.getmtime(source),
+            **_fingerprint_file(source)
+        }
+    if updated_docs:
+        add_documents_batched(vectorstore, updated_docs, vectorstore.embedding_function, ids=updated_ids)
+    
+    # 旧内容的解析缓存不会再命中（内容与其他现存文件相同的除外）
+    evict_parsed(stale_hashes - {entry.get("sha256") for entry in indexed_files.values()} - {None})
+    
+    print(f"🆕 增量更新: 新增 {len(new_files)} 个文件, 修改 {len(modified_files)} 个文件, "
+          f"删除 {len(deleted_files)} 个文件, 移除 {len(stale_ids)} 个旧片段, 写入 {len(updated_docs)} 个片段")
+    if not changes_index:
+        # 不发布新版本：发布会重写整个索引、更换索引代号并清空各级缓存
+        _save_manifest(manifest, directory)
+        return original
+    _save_vectorstore(vectorstore, manifest)
+    return _open_for_serving(vectorstore)
+
+def _create_new_vectorstore(embeddings: Embeddings) -> FAISS:
+    """创建新的向量数据库（流式解析文档，分批、可多进程计算嵌入）"""
+    files = list_markdown_files()
+    vectorstore = build_vectorstore(iter_documents(), embeddings)
+    manifest = _build_manifest_from_docstore(vectorstore)
+    for path in files:
+        # 没有片段的文件（内容为空或解析失败）也记入清单，下次不会被当作新文件
+        manifest["files"].setdefault(path, {"ids": [], "last_modified": 0})
+    _save_vectorstore(vectorstore, _fingerprint_manifest(manifest))
+    print(f"已创建新的向量数据库，包含 {len(vectorstore.index_to_docstore_id)} 个文档")
+    return _open_for_serving(vectorstore)
@@ -0,0 +1,59 @@
+"""意图模型离线训练脚本 - 部署前训练并保存全部模型文件，服务启动时直接加载，不再在请求中训练
+
+生成的文件（MODEL_DIR下）:
+    simple_intent_classifier.pth                        PyTorch模型（含词汇表和标签）
+    simple_intent_classifier.int8.pt                    TorchScript + 动态int8量化模型（INTENT_COMPILED_MODEL）
+    simple_intent_classifier.npz / .json                NumPy后端的权重和词汇表
+
+用法:
+    python lib/train_intent_model.py
+    python lib/train_intent_model.py --force --model-dir /path/to/model
+"""
+
+import os
+import sys
+import argparse
+from pathlib import Path
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.modules.config import CONFIG
+
+
+def main():
+    parser = argparse.ArgumentParser(description="训练意图识别模型并保存全部模型文件")
+    parser.add_argument("--model-dir", default=CONFIG["MODEL_DIR"], help="模型目录")
+    parser.add_argument("--force", action="store_true", help="已有模型时也重新训练")
+    args = parser.parse_args()
+
+    CONFIG["MODEL_DIR"] = args.model_dir
+    CONFIG["QUERY_CACHE_ENABLED"] = False
+    CONFIG["INTENT_MICRO_BATCH_ENABLED"] = False
+    from lib.modules.intent_recognition import SimpleIntentRecognizer
+
+    model_dir = Path(args.model_dir)
+    existed = (model_dir / "simple_intent_classifier.pth").exists()
+    # 没有模型时构造过程中同步训练；已有模型时加载，并重新导出过期的量化模型和NumPy模型文件
+    recognizer = SimpleIntentRecognizer(background_training=False)
+    if existed and args.force:
+        recognizer._train_model()
+    elif existed:
+        print("已有模型，未重新训练（使用 --force 重新训练）")
+
+    if recognizer.model is None:
+        print("意图识别模型不可用，见上方日志")
+        sys.exit(1)
+
+    data = recognizer._load_training_data()
+    predictions = recognizer._predict([item["text"] for item in data])
+    accuracy = sum(intent == item["label"] for (intent, _), item in zip(predictions, data)) / len(data)
+    print(f"训练数据准确率: {accuracy:.3f}（{len(data)} 条，推理模型: {type(recognizer.model).__name__}）")
+
+    print(f"模型目录: {model_dir}")
+    for path in sorted(model_dir.glob("simple_*")):
+        print(f"  {path.name:<36} {path.stat().st_size / 1024:8.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+分块测试脚本
+检查合并后的片段（含开头的标题路径）不超过token上限
+"""
+
+import sys
+import os
+import random
+
+# 添加项目路径
+sys.path.append(os.path.dirname(__file__))
+
+from langchain.schema import Document
+from lib.modules.chunker import chunk_documents, count_tokens
+
+
+def _element(text: str, category: str = "NarrativeText", depth: int = 0) -> Document:
+    return Document(page_content=text, metadata={"source": "test.md", "category": category,
+                                                 "category_depth": depth})
+
+
+def test_heading_change_within_budget():
+    """短片段中出现子标题后，溢出的新片段换用更长的标题路径时仍不超过上限"""
+    elements = [
+        _element("标题一", "Title", 0),
+        _element("正文"),
+        _element("二级", "Title", 1),
+        _element("字" * 61),
+    ]
+    chunks = chunk_documents(elements, max_tokens=64, overlap_tokens=8)
+    for chunk in chunks:
+        assert count_tokens(chunk.page_content) <= 64, chunk.page_content
+    assert chunks[-1].metadata["headings"] == "标题一 > 二级"
+
+
+def test_random_documents_within_budget():
+    """随机的标题和正文组合，所有片段都不超过上限"""
+    rng = random.Random(0)
+    for _ in range(500):
+        elements = []
+        for _ in range(rng.randint(1, 15)):
+            if rng.random() < 0.3:
+                elements.append(_element("标题" * rng.randint(1, 5) + " word" * rng.randint(0, 5),
+                                         "Title", rng.randint(0, 3)))
+            else:
+                elements.append(_element("字" * rng.randint(1, 120)))
+        max_tokens = rng.choice([16, 32, 64, 100])
+        overlap_tokens = rng.choice([0, 8, 16])
+        for chunk in chunk_documents(elements, max_tokens, overlap_tokens):
+            assert count_tokens(chunk.page_content) <= max_tokens, chunk.page_content
+
+
+if __name__ == "__main__":
+    test_heading_change_within_budget()
+    test_random_documents_within_budget()
+    print("分块测试通过")
@@ -1,5 +1,5 @@
-"""测试增强后的意图识别功能"""
-
-import sys
-import os
-
+"""测试增强后的意图识别功能"""
+
+import sys
+import os
+
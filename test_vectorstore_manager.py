@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+向量库增量更新测试脚本
+检查没有片段的文件（空文章）不会让每次启动或热更新都发布新版本
+"""
+
+import sys
+import os
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+
+# 添加项目路径
+sys.path.append(os.path.dirname(__file__))
+
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+from lib.modules.config import CONFIG
+from lib.modules import vectorstore_manager as vm
+
+
+class _HashEmbeddings(Embeddings):
+    """按字符哈希生成的小向量，不需要加载嵌入模型"""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        vector = np.full(8, 0.01)
+        for char in text:
+            vector[ord(char) % 8] += 1
+        return list(vector / np.linalg.norm(vector))
+
+
+def _load_lines(paths=None):
+    """每个非空行一个片段（代替Markdown解析）"""
+    documents = []
+    for path in paths or vm.list_markdown_files():
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f.read().splitlines():
+                if line.strip():
+                    documents.append(Document(page_content=line, metadata={
+                        "source": path, "last_modified": os.path.getmtime(path)}))
+    return documents
+
+
+@contextmanager
+def _isolated_index(root: str):
+    """在临时目录中建索引，结束后恢复配置和被替换的函数"""
+    saved_config = {key: CONFIG[key] for key in ("VECTORSTORE_PATH", "BLOG_FILES_PATH", "INDEX_SHARDS")}
+    saved = (vm.load_documents, vm.iter_documents, vm._embeddings)
+    CONFIG["VECTORSTORE_PATH"] = os.path.join(root, "index")
+    CONFIG["BLOG_FILES_PATH"] = os.path.join(root, "blog")
+    CONFIG["INDEX_SHARDS"] = 1
+    os.makedirs(CONFIG["BLOG_FILES_PATH"])
+    vm.load_documents, vm.iter_documents, vm._embeddings = _load_lines, _load_lines, _HashEmbeddings()
+    try:
+        yield CONFIG["BLOG_FILES_PATH"]
+    finally:
+        CONFIG.update(saved_config)
+        vm.load_documents, vm.iter_documents, vm._embeddings = saved
+
+
+def _write(path: str, text: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _versions() -> list:
+    return sorted(name for name in os.listdir(CONFIG["VECTORSTORE_PATH"]) if name.startswith("v_"))
+
+
+def test_empty_post_does_not_republish():
+    """空文章记入清单；再次启动、热更新和新增空文章都不发布新版本"""
+    with tempfile.TemporaryDirectory() as root, _isolated_index(root) as blog:
+        _write(os.path.join(blog, "post.md"), "第一行\n第二行\n")
+        _write(os.path.join(blog, "empty.md"), "")
+
+        vectorstore = vm.initialize_vectorstore()
+        pointer = vm._read_pointer()
+        assert len(vectorstore.index_to_docstore_id) == 2
+
+        # 第二次启动：没有变更
+        vectorstore = vm.initialize_vectorstore()
+        assert vm._read_pointer() == pointer
+        assert vm.refresh_vectorstore(vectorstore) is None
+
+        # 新增一个空文章：只更新清单
+        _write(os.path.join(blog, "empty2.md"), "\n")
+        assert vm.refresh_vectorstore(vectorstore) is None
+        assert vm._read_pointer() == pointer
+        assert _versions() == [pointer["dir"]]
+        manifest = vm._load_manifest(vm.current_index_dir())
+        assert manifest["files"][os.path.join(blog, "empty2.md")]["ids"] == []
+        assert "sha256" in manifest["files"][os.path.join(blog, "empty2.md")]
+        assert vm.refresh_vectorstore(vectorstore) is None
+
+        # 有内容的变更仍然发布新版本
+        _write(os.path.join(blog, "empty.md"), "新内容\n")
+        updated = vm.refresh_vectorstore(vectorstore)
+        assert updated is not None and len(updated.index_to_docstore_id) == 3
+        assert vm._read_pointer() != pointer
+
+
+if __name__ == "__main__":
+    test_empty_post_does_not_republish()
+    print("向量库增量更新测试通过")